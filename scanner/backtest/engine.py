@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from scanner.storage.columnar import BarStore, load_bars
+from scanner.utils.config import cfg_get
+
+# Vectorized backtest of WATCH_ENTER signals. Each signal becomes one row of an
+# (n_signals x max_hold) OHLC path matrix starting at the next session's open;
+# stops, scaled take-profits, earnings and time exits are first-hit searches
+# over those matrices, so there is no per-trade Python loop.
+#
+# Fill model (daily bars, so intrabar order is unknown):
+# - entry at the open of the first bar after the signal date
+# - a gap through a level fills at the open, otherwise at the level
+# - if the stop and a target are both inside the same bar, the stop wins
+# - anything still open exits at the close of the last bar held
+# - an earnings_anticipation signal whose report falls on the entry session is
+#   never filled (there is no session before the report to hold it in)
+
+EXIT_REASONS = ("stop", "take_profit", "earnings", "time")
+
+TRADE_COLUMNS = ["symbol", "signal_date", "setup", "entry", "exit_1", "exit_2",
+                 "return", "days_held", "exit_reason", "tp1_hit"]
+
+
+@dataclass(frozen=True)
+class BacktestParams:
+    stop_loss_pct: float = 0.10
+    first_take_profit_pct: float = 0.10
+    second_take_profit_pct: float = 0.20
+    # Share of the position sold at the first target; the rest rides to the second.
+    first_tp_fraction: float = 0.5
+    max_hold_days: int = 10
+    avoid_holding_through_earnings: bool = True
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> "BacktestParams":
+        """
+        Exit levels from `risk:`, simulation knobs from `backtest:`.
+        """
+        d = cls()
+        return cls(
+            stop_loss_pct=float(cfg_get(cfg, "risk.stop_loss_pct", d.stop_loss_pct)),
+            first_take_profit_pct=float(cfg_get(cfg, "risk.first_take_profit_pct", d.first_take_profit_pct)),
+            second_take_profit_pct=float(cfg_get(cfg, "risk.second_take_profit_pct", d.second_take_profit_pct)),
+            first_tp_fraction=float(cfg_get(cfg, "backtest.first_tp_fraction", d.first_tp_fraction)),
+            max_hold_days=int(cfg_get(cfg, "backtest.max_hold_days", d.max_hold_days)),
+            avoid_holding_through_earnings=bool(
+                cfg_get(cfg, "risk.avoid_holding_through_earnings", d.avoid_holding_through_earnings)
+            ),
+        )
+
+
+@dataclass
+class OhlcPaths:
+    """
+    Bars after each signal, one row per signal. Columns past a symbol's last
+    stored bar are NaN and flagged False in `valid`.
+    """
+    signals: pd.DataFrame   # symbol, date, setup
+    day: np.ndarray         # int64 day ordinals, -1 where invalid
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    valid: np.ndarray
+    # Day ordinal of the first earnings date on/after entry; -1 if none known.
+    next_earnings: np.ndarray
+
+    @property
+    def horizon(self) -> int:
+        return self.open.shape[1]
+
+
+def _day_ordinals(dates) -> np.ndarray:
+    return pd.to_datetime(pd.Series(dates, dtype=object)).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def build_paths(
+    bars: pd.DataFrame,
+    signals: pd.DataFrame,
+    horizon: int,
+    earnings: Optional[pd.DataFrame] = None,
+) -> OhlcPaths:
+    """
+    bars: symbol, date, open, high, low, close. signals: symbol, date, setup.
+    earnings: optional symbol, date of scheduled reports.
+    Row i of every matrix is the `horizon` bars after signals.date[i].
+    """
+    b = bars.sort_values(["symbol", "date"], kind="stable").reset_index(drop=True)
+    sig = signals.reset_index(drop=True)
+
+    # (symbol code, day) packed into one sorted int64 key, so every lookup below
+    # is a single searchsorted over the whole panel.
+    symbols = pd.Index(sorted(b["symbol"].unique()))
+    codes = symbols.get_indexer(b["symbol"]).astype(np.int64)
+    scode = symbols.get_indexer(sig["symbol"]).astype(np.int64)
+    known = scode >= 0
+    scode = np.maximum(scode, 0)
+    bday = _day_ordinals(b["date"])
+    sday = _day_ordinals(sig["date"])
+    lo = int(min(bday.min(initial=0), sday.min(initial=0))) - 1
+    span = int(max(bday.max(initial=0), sday.max(initial=0))) - lo + 1
+    keys = codes * span + (bday - lo)
+
+    group_end = np.searchsorted(keys, (scode + 1) * span, side="left")
+    entry = np.searchsorted(keys, scode * span + (sday - lo), side="right")
+
+    idx = entry[:, None] + np.arange(horizon)[None, :]
+    valid = (idx < group_end[:, None]) & known[:, None]
+    safe = np.where(valid, idx, 0)
+
+    def gather(x: np.ndarray, fill) -> np.ndarray:
+        return np.where(valid, x[safe], fill) if len(x) else np.full(valid.shape, fill)
+
+    day = gather(bday, -1)
+    next_earnings = np.full(len(sig), -1, dtype=np.int64)
+    if earnings is not None and not earnings.empty and len(sig):
+        e = earnings[earnings["symbol"].isin(symbols)]
+        ekeys = np.sort(symbols.get_indexer(e["symbol"]).astype(np.int64) * span + (_day_ordinals(e["date"]) - lo))
+        want = scode * span + (day[:, 0] - lo)
+        j = np.searchsorted(ekeys, want, side="left")
+        jc = np.minimum(j, max(len(ekeys) - 1, 0))
+        ok = valid[:, 0] & (j < len(ekeys)) & (ekeys[jc] // span == scode) if len(ekeys) else np.zeros(len(sig), bool)
+        next_earnings = np.where(ok, ekeys[jc] % span + lo, -1)
+
+    return OhlcPaths(
+        sig, day,
+        *(gather(b[col].astype(float).to_numpy(), np.nan) for col in ("open", "high", "low", "close")),
+        valid, next_earnings,
+    )
+
+
+def _first(mask: np.ndarray) -> np.ndarray:
+    """
+    Column of the first True per row; mask.shape[1] where there is none.
+    """
+    hit = mask.any(axis=1)
+    return np.where(hit, mask.argmax(axis=1), mask.shape[1])
+
+
+def simulate(paths: OhlcPaths, params: BacktestParams) -> pd.DataFrame:
+    """
+    One row per signal: entry/exit prices, return, holding days and exit reason.
+    Signals with no bar after them, or (with avoid_holding_through_earnings)
+    anticipation signals reporting on the entry session, are dropped (never
+    filled).
+    """
+    if params.max_hold_days < 1:
+        raise RuntimeError(f"max_hold_days must be >= 1, got {params.max_hold_days}")
+    H = min(paths.horizon, params.max_hold_days)
+    o, h, l, c = (m[:, :H] for m in (paths.open, paths.high, paths.low, paths.close))
+    valid = paths.valid[:, :H]
+    filled = valid[:, 0]
+
+    entry = o[:, 0]
+    stop = entry * (1.0 - params.stop_loss_pct)
+    tp1 = entry * (1.0 + params.first_take_profit_pct)
+    tp2 = entry * (1.0 + params.second_take_profit_pct)
+
+    with np.errstate(invalid="ignore"):
+        s = _first(valid & (l <= stop[:, None]))
+        t1 = _first(valid & (h >= tp1[:, None]))
+        t2 = _first(valid & (h >= tp2[:, None]))
+
+    # Last column held: data end or max hold, pulled in by the earnings exit.
+    last = np.maximum(valid.sum(axis=1) - 1, 0)
+    earn = np.full(len(last), H, dtype=np.int64)
+    if params.avoid_holding_through_earnings:
+        # Anticipation trades are out by the close of the last session before the report.
+        anticipation = (paths.signals["setup"] == "earnings_anticipation").to_numpy() & (paths.next_earnings >= 0)
+        report = _first(valid & (paths.day[:, :H] >= paths.next_earnings[:, None]))
+        earn = np.where(anticipation & (report < H), np.maximum(report - 1, 0), H)
+        filled = filled & ~(anticipation & (report == 0))
+    end = np.minimum(last, earn)
+
+    rows = np.arange(len(entry))
+
+    def leg(target_col: np.ndarray, target: np.ndarray):
+        at_stop = s <= np.minimum(target_col, end)
+        at_target = ~at_stop & (target_col <= end)
+        dc = np.minimum.reduce([s, target_col, end])
+        op = o[rows, dc]
+        price = np.where(
+            at_stop, np.minimum(op, stop),
+            np.where(at_target, np.maximum(op, target), c[rows, dc]),
+        )
+        reason = np.where(at_stop, "stop", np.where(at_target, "take_profit",
+                          np.where((earn <= last) & (dc == earn), "earnings", "time")))
+        return dc, price, reason
+
+    d1, p1, r1 = leg(t1, tp1)
+    d2, p2, r2 = leg(t2, tp2)
+    f = params.first_tp_fraction
+    ret = f * (p1 / entry - 1.0) + (1.0 - f) * (p2 / entry - 1.0)
+
+    sig = paths.signals
+    out = pd.DataFrame({
+        "symbol": sig["symbol"].to_numpy(),
+        "signal_date": sig["date"].to_numpy(),
+        "setup": sig["setup"].to_numpy(),
+        "entry": entry,
+        "exit_1": p1,
+        "exit_2": p2,
+        "return": ret,
+        "days_held": np.maximum(d1, d2) + 1,
+        "exit_reason": r2,
+        "tp1_hit": r1 == "take_profit",
+    })
+    return out[filled].reset_index(drop=True)
+
+
+def summarize(trades: pd.DataFrame) -> dict:
+    if trades.empty:
+        return {"trades": 0}
+    r = trades["return"].to_numpy()
+    gains, losses = r[r > 0].sum(), -r[r < 0].sum()
+    return {
+        "trades": int(len(r)),
+        "win_rate": float((r > 0).mean()),
+        "avg_return": float(r.mean()),
+        "median_return": float(np.median(r)),
+        "profit_factor": float(gains / losses) if losses > 0 else float("inf"),
+        "avg_days_held": float(trades["days_held"].mean()),
+        **{f"exit_{k}": int((trades["exit_reason"] == k).sum()) for k in EXIT_REASONS},
+    }
+
+
+def load_signals(con: sqlite3.Connection, start: str, end: str, signal: str = "WATCH_ENTER") -> pd.DataFrame:
+    df = pd.read_sql_query(
+        "SELECT symbol, date, rationale_json FROM signals WHERE signal = ? AND date >= ? AND date <= ? ORDER BY date, symbol",
+        con, params=[signal, start, end],
+    )
+    df["setup"] = [json.loads(r).get("setup", "") for r in df["rationale_json"]]
+    return df.drop(columns="rationale_json")
+
+
+def backtest(
+    con: sqlite3.Connection,
+    start: str,
+    end: str,
+    params: BacktestParams,
+    earnings: Optional[pd.DataFrame] = None,
+    store: Optional[BarStore] = None,
+) -> pd.DataFrame:
+    """
+    Stored WATCH_ENTER signals in [start, end] against stored daily_bars
+    (or the columnar `store`).
+    """
+    signals = load_signals(con, start, end)
+    if signals.empty:
+        return pd.DataFrame(columns=TRADE_COLUMNS)
+    # Calendar slack so max_hold_days sessions after the last signal are loaded.
+    bars_end = (pd.Timestamp(end) + timedelta(days=params.max_hold_days * 2 + 10)).date().isoformat()
+    bars = load_bars(con, sorted(signals["symbol"].unique()), start, bars_end, store)
+    return simulate(build_paths(bars, signals, params.max_hold_days, earnings), params)
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import itertools
+import random
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields, replace
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from scanner.features.panel import SCORE_FEATURES
+from scanner.pipeline.eod import LOOKBACK_DAYS, build_gates
+from scanner.pipeline.replay import replay_panel
+from scanner.scoring.scorecard import ScoreWeights, score_batch
+from scanner.storage.columnar import BarStore, load_bars
+from scanner.universe.builder import UniverseFilter
+from scanner.utils.config import cfg_get
+
+from .engine import BacktestParams, OhlcPaths, build_paths, simulate, summarize
+
+# Parameter sweep over scoring weights, the signal threshold and backtest exits.
+# Features, gates and every candidate row's forward OHLC path are computed once
+# in the parent and saved as .npy files; workers memory-map them read-only, so
+# each configuration costs one score_batch plus one simulate over shared pages.
+
+WEIGHT_KEYS = {f.name for f in fields(ScoreWeights)}
+PARAM_KEYS = {f.name for f in fields(BacktestParams)}
+SWEEP_KEYS = WEIGHT_KEYS | PARAM_KEYS | {"min_score"}
+
+# setup_code -> setup_class; codes > 0 are the setups generate_signal acts on.
+SETUPS = np.array(["none", "earnings_anticipation", "post_earnings_continuation"], dtype=object)
+
+GATE_COLUMNS = ["liquidity_ok", "sec_current", "recent_dilution_risk",
+                "earnings_anticipation_window", "post_earnings_window"]
+
+PATH_ARRAYS = ("day", "open", "high", "low", "close", "valid", "next_earnings")
+
+
+@dataclass
+class SweepData:
+    """
+    Directory of .npy arrays, one row per scoreable (symbol, date):
+    features f_<name>, gates g_<name>, setup codes, and the OhlcPaths matrices.
+    """
+    root: Path
+
+    def save(self, name: str, arr: np.ndarray) -> None:
+        np.save(self.root / f"{name}.npy", np.ascontiguousarray(arr), allow_pickle=False)
+
+    def load(self, name: str) -> np.ndarray:
+        return np.load(self.root / f"{name}.npy", mmap_mode="r")
+
+
+def prepare(
+    con: sqlite3.Connection,
+    cfg: dict,
+    start: date,
+    end: date,
+    max_hold_days: int,
+    root: Path,
+    earnings: Optional[pd.DataFrame] = None,
+) -> int:
+    """
+    Compute everything configuration-independent into `root`. Returns row count.
+    """
+    bars = load_bars(con, None, (start - timedelta(days=LOOKBACK_DAYS)).isoformat(),
+                     (end + timedelta(days=max_hold_days * 2 + 10)).isoformat(), BarStore.from_config(cfg))
+    if bars.empty:
+        raise RuntimeError(f"No stored bars between {start} and {end}; sync daily_bars first.")
+    panel = replay_panel(bars, start, end, UniverseFilter.from_config(cfg))
+    gates = build_gates(panel, cfg, con)
+    ea = gates["earnings_anticipation_window"].to_numpy(dtype=bool)
+    pe = gates["post_earnings_window"].to_numpy(dtype=bool)
+    setup_code = np.where(ea, 1, np.where(pe, 2, 0)).astype(np.int8)
+    setup = SETUPS[setup_code]
+
+    data = SweepData(root)
+    for name in SCORE_FEATURES:
+        data.save(f"f_{name}", panel[name].astype(float).to_numpy())
+    for name in GATE_COLUMNS:
+        data.save(f"g_{name}", gates[name].astype(bool).to_numpy())
+    symbols, codes = np.unique(panel["symbol"].to_numpy(dtype=str), return_inverse=True)
+    data.save("symbols", symbols)
+    data.save("symbol_code", codes.astype(np.int32))
+    data.save("date", panel["date"].to_numpy(dtype="U10"))
+    data.save("setup_code", setup_code)
+
+    cands = pd.DataFrame({"symbol": panel["symbol"], "date": panel["date"], "setup": setup})
+    paths = build_paths(bars, cands, max_hold_days, earnings)
+    for name in PATH_ARRAYS:
+        data.save(name, getattr(paths, name))
+    return len(panel)
+
+
+# -- worker side ----------------------------------------------------------------
+
+_DATA: dict[str, np.ndarray] = {}
+
+
+def _init_worker(root: str) -> None:
+    data = SweepData(Path(root))
+    for p in Path(root).glob("*.npy"):
+        _DATA[p.stem] = data.load(p.stem)
+
+
+def _check(config: dict) -> None:
+    unknown = set(config) - SWEEP_KEYS
+    if unknown:
+        raise RuntimeError(f"Unknown sweep keys: {sorted(unknown)}")
+
+
+@dataclass(frozen=True)
+class SweepBase:
+    """
+    What a configuration overrides: weights and exits from config.yaml, plus signals.min_score.
+    """
+    weights: ScoreWeights
+    params: BacktestParams
+    min_score: float
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> "SweepBase":
+        return cls(ScoreWeights.from_config(cfg), BacktestParams.from_config(cfg),
+                   float(cfg_get(cfg, "signals.min_score", 70)))
+
+
+def evaluate(config: dict, base: SweepBase, require_setup: bool = True) -> dict:
+    """
+    Score every prepared row under `config`, keep rows that would signal, and
+    backtest them. Runs in a worker; reads only the shared arrays.
+    """
+    _check(config)
+    weights = replace(base.weights, **{k: float(v) for k, v in config.items() if k in WEIGHT_KEYS})
+    params = replace(base.params, **{k: v for k, v in config.items() if k in PARAM_KEYS})
+    min_score = float(config.get("min_score", base.min_score))
+
+    feats = pd.DataFrame({name: _DATA[f"f_{name}"] for name in SCORE_FEATURES}, copy=False)
+    gates = pd.DataFrame({name: _DATA[f"g_{name}"] for name in GATE_COLUMNS}, copy=False)
+    total = score_batch(feats, gates, weights)["total"].to_numpy()
+
+    take = total >= min_score
+    if require_setup:
+        take &= _DATA["setup_code"] > 0
+    idx = np.flatnonzero(take)
+
+    signals = pd.DataFrame({
+        "symbol": _DATA["symbols"][_DATA["symbol_code"][idx]],
+        "date": _DATA["date"][idx],
+        "setup": SETUPS[_DATA["setup_code"][idx]],
+    })
+    paths = OhlcPaths(signals, *(np.asarray(_DATA[name][idx]) for name in PATH_ARRAYS))
+    return {**config, "signals": int(len(idx)), **summarize(simulate(paths, params))}
+
+
+def grid(space: dict[str, list]) -> list[dict]:
+    keys = sorted(space)
+    return [dict(zip(keys, combo)) for combo in itertools.product(*(space[k] for k in keys))]
+
+
+def sample(space: dict[str, list], n: int, seed: int = 0) -> list[dict]:
+    """
+    n distinct random points of the grid (all of it if the grid is smaller).
+    """
+    full = grid(space)
+    if n >= len(full):
+        return full
+    return random.Random(seed).sample(full, n)
+
+
+def run_sweep(
+    root: Path,
+    configs: list[dict],
+    base: SweepBase,
+    max_workers: Optional[int] = None,
+    require_setup: bool = True,
+) -> list[dict]:
+    for c in configs:
+        _check(c)  # fail fast on typos before starting workers
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(str(root),)) as pool:
+        futures = [pool.submit(evaluate, c, base, require_setup) for c in configs]
+        return [f.result() for f in futures]
+
+
+def rank(results: list[dict], by: str = "avg_return", min_trades: int = 20) -> pd.DataFrame:
+    """
+    Best first by `by`; configurations with fewer than min_trades trades sort last.
+    """
+    df = pd.DataFrame(results)
+    if df.empty:
+        return df
+    if by not in df.columns:
+        df[by] = np.nan
+    enough = df["trades"] >= min_trades
+    df = df.assign(_ok=enough).sort_values(["_ok", by], ascending=[False, False], na_position="last")
+    df = df.drop(columns="_ok").reset_index(drop=True)
+    df.index = df.index + 1
+    df.index.name = "rank"
+    return df
+
+
+def sweep(
+    con: sqlite3.Connection,
+    cfg: dict,
+    start: date,
+    end: date,
+    configs: list[dict],
+    max_workers: Optional[int] = None,
+    require_setup: bool = True,
+    earnings: Optional[pd.DataFrame] = None,
+    workdir: Optional[Path] = None,
+) -> list[dict]:
+    """
+    Prepare shared arrays (in a temp dir under workdir) and evaluate every
+    configuration across a process pool. Returns unranked results.
+    """
+    base = SweepBase.from_config(cfg)
+    hold = max(int(c.get("max_hold_days", base.params.max_hold_days)) for c in [*configs, {}])
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        root = Path(tmp)
+        rows = prepare(con, cfg, start, end, hold, root, earnings)
+        print(f"Prepared {rows} scoreable rows ({start}..{end}) for {len(configs)} configurations")
+        return run_sweep(root, configs, base, max_workers, require_setup)
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+from .mock_servers import MockStack, MockUniverse, symbol
+
+# End-to-end benchmarks against MockStack. Each case runs in its own child
+# process (python -m scanner.scripts.bench --child ...) so peak RSS comes from
+# wait4() for that case alone; the parent owns the mock servers and counts the
+# requests each case made.
+#
+# Cases, in order, sharing one workdir per universe size:
+#   eod_cold        run_eod on an empty database and HTTP cache
+#   eod_warm        the same date again with --force: everything should be incremental
+#   eod_prices      TiingoClient.eod_prices for the whole universe, no storage
+#   edgar_snapshot  get_edgar_snapshot one symbol at a time (facts over HTTP, going-concern scan)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+CASES = ("eod_cold", "eod_warm", "eod_prices", "edgar_snapshot")
+RESULT_PREFIX = "BENCH_RESULT "
+
+# Fixed so every run (and the baseline) sees the same synthetic data.
+BENCH_DATE = date(2026, 6, 30)
+
+# get_edgar_snapshot is sequential; cap how many symbols it covers.
+SNAPSHOT_SAMPLE = 100
+
+# A metric regresses when it exceeds baseline * (1 + tolerance) and by more than
+# this absolute floor (timer noise on short stages, allocator noise on RSS).
+MIN_DELTA = {"wall_s": 0.25, "peak_rss_mb": 25.0}
+
+
+@dataclass
+class CaseResult:
+    case: str
+    size: int
+    wall_s: float
+    peak_rss_mb: float
+    stages: dict[str, float] = field(default_factory=dict)
+    requests: dict[str, int] = field(default_factory=dict)
+    rps: dict[str, float] = field(default_factory=dict)
+    throttled: dict[str, int] = field(default_factory=dict)
+    ok: bool = True
+    error: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}/{self.size}"
+
+
+def bench_config(base: dict, workdir: Path) -> dict:
+    """
+    base config with limits opened up for local servers and all paths under workdir.
+    """
+    cfg = json.loads(json.dumps(base))  # deep copy
+    cfg.setdefault("universe", {}).pop("symbols", None)
+    cfg["universe"]["exchanges"] = ["NASDAQ"]
+    cfg["tiingo"] = {**cfg.get("tiingo", {}), "max_workers": 16, "max_rps": 400, "burst": 50}
+    edgar = {**cfg.get("edgar", {}), "max_rps": 400, "burst": 50, "max_workers": 16}
+    edgar["cache"] = {**edgar.get("cache", {}), "dir": str(workdir / "http_cache"), "offline": False}
+    cfg["edgar"] = edgar
+    cfg["storage"] = {**cfg.get("storage", {}), "columnar_dir": str(workdir / "bars")}
+    return cfg
+
+
+# -- child side -------------------------------------------------------------------
+
+def _stage_walls(db: Path, day: date) -> dict[str, float]:
+    import sqlite3
+    con = sqlite3.connect(str(db))
+    try:
+        rows = con.execute(
+            """
+            SELECT stage, wall_s FROM run_stages
+            WHERE run_id = (SELECT run_id FROM runs WHERE run_id LIKE ? ORDER BY started_at DESC LIMIT 1)
+            """,
+            (f"{day.isoformat()}_%",),
+        ).fetchall()
+    finally:
+        con.close()
+    return {stage: float(w or 0.0) for stage, w in rows}
+
+
+def run_child(case: str, size: int, workdir: Path, dd: bool) -> dict:
+    """
+    Run one case in this process and return its timings (JSON-able).
+    """
+    cfg_path, db = workdir / "config.yaml", workdir / "scanner.sqlite"
+    t0 = time.perf_counter()
+    stages: dict[str, float] = {}
+
+    if case in ("eod_cold", "eod_warm"):
+        from scanner.scripts import run_eod
+        argv = ["run_eod", "--date", BENCH_DATE.isoformat(), "--config", str(cfg_path), "--db", str(db)]
+        if case == "eod_warm":
+            argv.append("--force")
+        if dd:
+            argv.append("--dd")
+        sys.argv = argv
+        run_eod.main()
+        stages = _stage_walls(db, BENCH_DATE)
+
+    elif case == "eod_prices":
+        from scanner.market.tiingo import TiingoClient
+        from scanner.pipeline.eod import LOOKBACK_DAYS
+        from scanner.utils.config import load_config
+        client = TiingoClient.from_config(load_config(cfg_path))
+        df = client.eod_prices([symbol(i) for i in range(size)], BENCH_DATE - timedelta(days=LOOKBACK_DAYS), BENCH_DATE)
+        stages = {"rows": float(len(df))}
+
+    elif case == "edgar_snapshot":
+        from scanner.edgar.client import EdgarClient
+        from scanner.edgar.snapshot import get_edgar_snapshot
+        from scanner.storage.db import connect, init_db
+        from scanner.utils.config import load_config
+        cfg = load_config(cfg_path)
+        con = connect(db)
+        init_db(con)
+        client = EdgarClient.from_config(cfg, user_agent=os.environ["SEC_USER_AGENT"])
+        n = min(size, SNAPSHOT_SAMPLE)
+        for i in range(n):
+            get_edgar_snapshot(symbol(i), client, con)
+        stages = {"per_symbol_s": (time.perf_counter() - t0) / n}
+
+    else:
+        raise RuntimeError(f"Unknown bench case {case!r}; expected one of {CASES}")
+    return {"wall_s": time.perf_counter() - t0, "stages": stages}
+
+
+# -- parent side ------------------------------------------------------------------
+
+def _spawn(case: str, size: int, workdir: Path, env: dict, dd: bool, verbose: bool) -> tuple[dict, float, Optional[str]]:
+    """
+    Run a child case; returns (result, peak_rss_mb, error).
+    """
+    cmd = [sys.executable, "-m", "scanner.scripts.bench", "--child", case,
+           "--sizes", str(size), "--workdir", str(workdir)] + (["--dd"] if dd else [])
+    child_env = {**os.environ, **env, "PYTHONPATH": os.pathsep.join([str(REPO_ROOT), os.environ.get("PYTHONPATH", "")])}
+    p = subprocess.Popen(cmd, cwd=workdir, env=child_env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    out = p.stdout.read()
+    _, status, usage = os.wait4(p.pid, 0)
+    p.returncode = os.waitstatus_to_exitcode(status)
+    if verbose:
+        print(out, end="")
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    lines = [ln for ln in out.splitlines() if ln.startswith(RESULT_PREFIX)]
+    if p.returncode != 0 or not lines:
+        tail = "\n".join(out.strip().splitlines()[-5:])
+        return {}, rss_mb, f"exit {p.returncode}: {tail}"
+    return json.loads(lines[-1][len(RESULT_PREFIX):]), rss_mb, None
+
+
+def run_size(
+    size: int,
+    root: Path,
+    base_cfg: dict,
+    cases: tuple[str, ...] = CASES,
+    latency_ms: float = 20.0,
+    server_rps: Optional[float] = None,
+    dd: bool = False,
+    verbose: bool = False,
+) -> list[CaseResult]:
+    workdir = root / f"n{size}"
+    if workdir.exists():
+        shutil.rmtree(workdir)
+    workdir.mkdir(parents=True)
+    (workdir / "config.yaml").write_text(yaml.safe_dump(bench_config(base_cfg, workdir)), encoding="utf-8")
+
+    stack = MockStack.start(MockUniverse(size), latency_ms=latency_ms,
+                            tiingo_rps=server_rps, edgar_rps=server_rps, openai_rps=server_rps)
+    results = []
+    try:
+        for case in cases:
+            stack.reset_stats()
+            got, rss_mb, err = _spawn(case, size, workdir, stack.env(), dd, verbose)
+            stats = stack.stats()
+            wall = float(got.get("wall_s", 0.0))
+            results.append(CaseResult(
+                case=case,
+                size=size,
+                wall_s=wall,
+                peak_rss_mb=rss_mb,
+                stages=got.get("stages", {}),
+                requests={k: v["requests"] for k, v in stats.items() if v["requests"]},
+                rps={k: v["requests"] / wall for k, v in stats.items() if v["requests"] and wall > 0},
+                throttled={k: v["throttled"] for k, v in stats.items() if v["throttled"]},
+                ok=err is None,
+                error=err,
+            ))
+    finally:
+        stack.stop()
+    return results
+
+
+def metrics(r: CaseResult) -> dict[str, float]:
+    """
+    Flat metric name -> value used for baseline comparison (lower is better).
+    """
+    out = {"wall_s": r.wall_s, "peak_rss_mb": r.peak_rss_mb}
+    out.update({f"stage.{k}": v for k, v in r.stages.items() if k not in ("rows",)})
+    return out
+
+
+def save_baseline(results: list[CaseResult], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {r.key: metrics(r) for r in results if r.ok}
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def compare(results: list[CaseResult], baseline: dict, tolerance: float) -> list[str]:
+    """
+    Regressions against a saved baseline, as printable lines.
+    """
+    out = []
+    for r in results:
+        base = baseline.get(r.key)
+        if not base or not r.ok:
+            continue
+        for name, value in metrics(r).items():
+            ref = base.get(name)
+            if ref is None:
+                continue
+            floor = MIN_DELTA["peak_rss_mb"] if name == "peak_rss_mb" else MIN_DELTA["wall_s"]
+            if value > ref * (1 + tolerance) and value - ref > floor:
+                out.append(f"{r.key} {name}: {value:.3f} vs baseline {ref:.3f} (+{(value / ref - 1) * 100:.0f}%)")
+    return out
+
+
+def format_results(results: list[CaseResult]) -> str:
+    lines = []
+    for r in results:
+        head = f"{r.key:<22} {'ok' if r.ok else 'FAILED':<6} wall={r.wall_s:8.2f}s  peak_rss={r.peak_rss_mb:7.1f}MB"
+        lines.append(head)
+        if r.error:
+            lines.append(f"    {r.error}")
+        for name, n in sorted(r.requests.items()):
+            thr = f", {r.throttled[name]} throttled" if name in r.throttled else ""
+            lines.append(f"    {name:<8} {n:>7} requests  {r.rps.get(name, 0.0):8.1f} req/s{thr}")
+        for stage, w in r.stages.items():
+            lines.append(f"    {stage:<16} {w:8.3f}")
+    return "\n".join(lines)
+
+
+def results_json(results: list[CaseResult]) -> list[dict]:
+    return [{**asdict(r), "key": r.key} for r in results]
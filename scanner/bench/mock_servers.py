@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+from scanner.edgar.facts import INDEXED_TAGS
+from scanner.utils.ratelimit import TokenBucket
+
+# Local stand-ins for Tiingo, EDGAR (data.sec.gov + www.sec.gov) and the OpenAI
+# Responses API, for benchmarks and offline runs. Every payload is a pure
+# function of (symbol index, date), so overlapping requests agree and reruns
+# see identical data. Each server adds a fixed latency per request and, with
+# max_rps set, answers 429 + Retry-After once its own bucket is empty.
+#
+# Point the clients at them with TIINGO_BASE_URL, SEC_DATA_URL, SEC_WWW_URL and
+# OPENAI_RESPONSES_URL (see MockStack.env).
+
+# Latest date with synthetic filings/bars; later requests just get nothing new.
+DATA_END = date(2026, 12, 31)
+
+
+def symbol(i: int) -> str:
+    # 4-5 letters, no digits, so they look like real tickers.
+    s = ""
+    n = i + 26 ** 3
+    while n:
+        n, r = divmod(n, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+def cik10(i: int) -> str:
+    return f"{i + 1000001:010d}"
+
+
+# Tag -> share of revenue, so margins and cash flows look like a small money-losing issuer.
+_FACT_RATIOS = {
+    "GrossProfit": 0.35,
+    "OperatingIncomeLoss": -0.2,
+    "NetIncomeLoss": -0.25,
+    "NetCashProvidedByUsedInOperatingActivities": -0.15,
+    "PaymentsToAcquirePropertyPlantAndEquipment": 0.05,
+}
+
+
+def _unit(i: int, salt: str) -> float:
+    """
+    Deterministic pseudo-random float in [0, 1) for (i, salt).
+    """
+    h = hashlib.blake2b(f"{i}:{salt}".encode(), digest_size=8).digest()
+    return int.from_bytes(h, "big") / 2 ** 64
+
+
+@dataclass
+class MockUniverse:
+    size: int
+    # Share of companies whose latest 10-K/10-Q carries going-concern language.
+    going_concern_rate: float = 0.15
+    # Share with a recent S-3 / 424B5 / 8-K 3.02.
+    dilution_rate: float = 0.25
+    doc_kb: int = 256
+
+    def index(self, sym: str) -> Optional[int]:
+        n = 0
+        for ch in sym:
+            if not "A" <= ch <= "Z":
+                return None
+            n = n * 26 + ord(ch) - 65
+        i = n - 26 ** 3
+        return i if 0 <= i < self.size else None
+
+    def cik_index(self, cik: str) -> Optional[int]:
+        i = int(cik) - 1000001
+        return i if 0 <= i < self.size else None
+
+    # -- Tiingo ---------------------------------------------------------
+
+    def bars(self, i: int, start: date, end: date) -> list[dict]:
+        base = 0.6 + 4.0 * _unit(i, "px")
+        phase = 6.3 * _unit(i, "ph")
+        vol = 2e6 + 8e6 * _unit(i, "vol")
+        out = []
+        d = start
+        while d <= min(end, DATA_END):
+            if d.weekday() < 5:
+                t = d.toordinal()
+                close = base * math.exp(0.25 * math.sin(t / 11 + phase) + 0.05 * math.sin(t / 2.3 + phase))
+                open_ = close * (1 + 0.01 * math.sin(t + phase))
+                spike = 3.0 if (t + i) % 17 == 0 else 1.0
+                out.append({
+                    "date": f"{d.isoformat()}T00:00:00.000Z",
+                    "open": round(open_, 4),
+                    "high": round(max(open_, close) * 1.03, 4),
+                    "low": round(min(open_, close) * 0.97, 4),
+                    "close": round(close, 4),
+                    "volume": float(int(vol * spike * (1 + 0.4 * math.sin(t / 5 + phase)))),
+                })
+            d += timedelta(days=1)
+        return out
+
+    # -- EDGAR ----------------------------------------------------------
+
+    def _quarters(self, n: int = 12) -> list[tuple[date, date, str, str, int]]:
+        """
+        (period_end, filed, form, fp, fy), newest last.
+        """
+        out = []
+        y, q = DATA_END.year, 4
+        for _ in range(n):
+            end = date(y, 3 * q, 30 if q in (2, 3) else 31)
+            form, fp = ("10-K", "FY") if q == 4 else ("10-Q", f"Q{q}")
+            filed = end + timedelta(days=80 if q == 4 else 40)
+            out.append((end, filed, form, fp, y))
+            y, q = (y - 1, 4) if q == 1 else (y, q - 1)
+        return out[::-1]
+
+    def filings(self, i: int) -> list[dict]:
+        rows = []
+        for k, (end, filed, form, fp, fy) in enumerate(self._quarters()):
+            rows.append({"form": form, "filed": filed, "items": "", "doc": f"f{fy}{fp.lower()}.htm"})
+            rows.append({"form": "8-K", "filed": filed - timedelta(days=2), "items": "2.02,9.01", "doc": f"e{k}.htm"})
+        if _unit(i, "dil") < self.dilution_rate:
+            for k, form in enumerate(("S-3", "424B5", "8-K")):
+                day = DATA_END - timedelta(days=int(200 * _unit(i, f"dil{k}")))
+                rows.append({"form": form, "filed": day, "items": "3.02" if form == "8-K" else "", "doc": f"d{k}.htm"})
+        rows = [r for r in rows if r["filed"] <= DATA_END]
+        rows.sort(key=lambda r: r["filed"], reverse=True)
+        for k, r in enumerate(rows):
+            r["accession"] = f"{cik10(i)}-{r['filed'].year % 100:02d}-{k:06d}"
+        return rows
+
+    def submissions(self, i: int) -> dict:
+        rows = self.filings(i)
+        return {
+            "cik": cik10(i),
+            "name": f"{symbol(i)} Holdings Inc",
+            "tickers": [symbol(i)],
+            "exchanges": ["Nasdaq"],
+            "filings": {"recent": {
+                "accessionNumber": [r["accession"] for r in rows],
+                "filingDate": [r["filed"].isoformat() for r in rows],
+                "form": [r["form"] for r in rows],
+                "primaryDocument": [r["doc"] for r in rows],
+                "items": [r["items"] for r in rows],
+            }},
+        }
+
+    def company_facts(self, i: int) -> dict:
+        scale = 1e6 * (1 + 50 * _unit(i, "size"))
+        gaap: dict = {}
+        for t, (tag, unit) in enumerate(INDEXED_TAGS):
+            vals = []
+            for k, (end, filed, form, fp, fy) in enumerate(self._quarters()):
+                revenue = scale * (0.8 + 0.4 * _unit(i, f"rev{k}"))
+                v = revenue * _FACT_RATIOS.get(tag, 0.5 + _unit(i * 131 + t, f"{k}"))
+                if unit == "shares":
+                    v = 2e7 + 3e8 * _unit(i, "shares") * (1 + 0.05 * k)
+                vals.append({"end": end.isoformat(), "val": round(v), "form": form, "fp": fp, "fy": fy,
+                             "filed": filed.isoformat(), "accn": f"{cik10(i)}-{fy % 100:02d}-q{k}"})
+            gaap[tag] = {"units": {unit: vals}}
+        return {"cik": int(cik10(i)), "entityName": f"{symbol(i)} Holdings Inc", "facts": {"us-gaap": gaap}}
+
+    def document(self, i: int, doc: str) -> bytes:
+        para = ("<p style=\"font-family:Times\">Revenue, operating expenses and liquidity are discussed in "
+                "Note&nbsp;3 and in <b>Item&#160;7</b>. Amounts are in thousands.</p>\n")
+        filler = para * max(self.doc_kb * 1024 // len(para) // 2, 1)
+        gc = _unit(i, "gc") < self.going_concern_rate and doc.startswith("f")
+        middle = ("<p>These conditions raise <b>substantial doubt</b> about the Company&#8217;s ability to "
+                  "continue as a going concern.</p>" if gc else
+                  "<p>Management concluded there is no substantial doubt about our ability to continue "
+                  "as a going concern.</p>")
+        return f"<html><body>{filler}{middle}{filler}</body></html>".encode()
+
+    def tickers_exchange(self) -> dict:
+        return {
+            "fields": ["cik", "name", "ticker", "exchange"],
+            "data": [[int(cik10(i)), f"{symbol(i)} Holdings Inc", symbol(i), "Nasdaq"] for i in range(self.size)],
+        }
+
+    def tickers(self) -> dict:
+        return {str(i): {"cik_str": int(cik10(i)), "ticker": symbol(i), "title": f"{symbol(i)} Holdings Inc"}
+                for i in range(self.size)}
+
+
+# -- HTTP plumbing --------------------------------------------------------------
+
+@dataclass
+class ServerStats:
+    requests: int = 0
+    throttled: int = 0      # 429s sent
+    not_modified: int = 0   # 304s sent
+    bytes_out: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {"requests": self.requests, "throttled": self.throttled,
+                    "not_modified": self.not_modified, "bytes_out": self.bytes_out}
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests = self.throttled = self.not_modified = self.bytes_out = 0
+
+
+# A route returns (status, body, content_type) or None for 404.
+Route = Callable[[str, dict, bytes], Optional[tuple[int, bytes, str]]]
+
+
+class MockServer:
+    """
+    ThreadingHTTPServer on 127.0.0.1:<free port> answering via `route`.
+    """
+
+    def __init__(self, name: str, route: Route, latency_ms: float = 0.0, max_rps: Optional[float] = None):
+        self.name = name
+        self.route = route
+        self.latency_s = latency_ms / 1000.0
+        self.bucket = TokenBucket(max_rps, max_rps) if max_rps else None
+        self.stats = ServerStats()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name=f"mock-{name}", daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def start(self) -> "MockServer":
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without this, Nagle plus
+            # the client's delayed ACK adds ~40ms to every keep-alive response.
+            disable_nagle_algorithm = True
+
+            def log_message(self, *a):
+                pass
+
+            def _serve(self, method: str) -> None:
+                body_in = self.rfile.read(int(self.headers.get("Content-Length") or 0)) if method == "POST" else b""
+                with server.stats.lock:
+                    server.stats.requests += 1
+                if server.latency_s:
+                    time.sleep(server.latency_s)
+                if server.bucket is not None and not server.bucket.try_acquire():
+                    with server.stats.lock:
+                        server.stats.throttled += 1
+                    self._send(429, b'{"error": "rate limited"}', "application/json", {"Retry-After": "1"})
+                    return
+                got = server.route(self.path, dict(self.headers), body_in)
+                if got is None:
+                    self._send(404, b'{"error": "not found"}', "application/json")
+                    return
+                status, body, ctype = got
+                etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+                if method == "GET" and self.headers.get("If-None-Match") == etag:
+                    with server.stats.lock:
+                        server.stats.not_modified += 1
+                    self._send(304, b"", ctype, {"ETag": etag})
+                    return
+                self._send(status, body, ctype, {"ETag": etag})
+
+            def _send(self, status: int, body: bytes, ctype: str, headers: Optional[dict] = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+                with server.stats.lock:
+                    server.stats.bytes_out += len(body)
+
+            def do_GET(self):
+                self._serve("GET")
+
+            def do_POST(self):
+                self._serve("POST")
+
+        return Handler
+
+
+def _json(obj) -> tuple[int, bytes, str]:
+    return 200, json.dumps(obj, separators=(",", ":")).encode(), "application/json"
+
+
+_PRICES_RE = re.compile(r"^/tiingo/daily/([^/]+)/prices$")
+_META_RE = re.compile(r"^/tiingo/daily/([^/]+)$")
+_SUBMISSIONS_RE = re.compile(r"^/submissions/CIK(\d{10})\.json$")
+_FACTS_RE = re.compile(r"^/api/xbrl/companyfacts/CIK(\d{10})\.json$")
+_DOC_RE = re.compile(r"^/Archives/edgar/data/(\d+)/\d+/([^/]+)$")
+
+
+def tiingo_route(u: MockUniverse) -> Route:
+    def route(path: str, headers: dict, body: bytes):
+        p = urlparse(path)
+        q = parse_qs(p.query)
+        m = _PRICES_RE.match(p.path)
+        if m and (i := u.index(m.group(1).upper())) is not None:
+            start = date.fromisoformat(q.get("startDate", ["2000-01-01"])[0])
+            end = date.fromisoformat(q.get("endDate", [DATA_END.isoformat()])[0])
+            return _json(u.bars(i, start, end))
+        m = _META_RE.match(p.path)
+        if m and (i := u.index(m.group(1).upper())) is not None:
+            return _json({"ticker": symbol(i), "name": f"{symbol(i)} Holdings Inc", "exchangeCode": "NASDAQ"})
+        return None
+    return route
+
+
+def edgar_route(u: MockUniverse) -> Route:
+    # One server plays both data.sec.gov and www.sec.gov; their paths don't overlap.
+    def route(path: str, headers: dict, body: bytes):
+        p = urlparse(path).path
+        if p == "/files/company_tickers_exchange.json":
+            return _json(u.tickers_exchange())
+        if p == "/files/company_tickers.json":
+            return _json(u.tickers())
+        for rx, fn in ((_SUBMISSIONS_RE, u.submissions), (_FACTS_RE, u.company_facts)):
+            m = rx.match(p)
+            if m:
+                i = u.cik_index(m.group(1))
+                return _json(fn(i)) if i is not None else None
+        m = _DOC_RE.match(p)
+        if m and (i := u.cik_index(m.group(1))) is not None:
+            return 200, u.document(i, m.group(2)), "text/html"
+        return None
+    return route
+
+
+def openai_route(u: MockUniverse) -> Route:
+    def route(path: str, headers: dict, body: bytes):
+        if urlparse(path).path != "/v1/responses":
+            return None
+        req = json.loads(body or b"{}")
+        text = ("- Recommendation tier: Neutral\n- Confidence: Low\n- Setup fit: earnings anticipation\n"
+                f"- Key positives: synthetic note ({len(json.dumps(req.get('input', [])))} input chars)\n")
+        return _json({"id": "resp_mock", "model": req.get("model"),
+                      "output": [{"type": "message", "content": [{"type": "output_text", "text": text}]}]})
+    return route
+
+
+@dataclass
+class MockStack:
+    """
+    The three stand-ins for one universe.
+    """
+    universe: MockUniverse
+    tiingo: MockServer
+    edgar: MockServer
+    openai: MockServer
+
+    @classmethod
+    def start(
+        cls,
+        universe: MockUniverse,
+        latency_ms: float = 0.0,
+        tiingo_rps: Optional[float] = None,
+        edgar_rps: Optional[float] = None,
+        openai_rps: Optional[float] = None,
+    ) -> "MockStack":
+        return cls(
+            universe,
+            MockServer("tiingo", tiingo_route(universe), latency_ms, tiingo_rps).start(),
+            MockServer("edgar", edgar_route(universe), latency_ms, edgar_rps).start(),
+            MockServer("openai", openai_route(universe), latency_ms, openai_rps).start(),
+        )
+
+    def servers(self) -> list[MockServer]:
+        return [self.tiingo, self.edgar, self.openai]
+
+    def env(self) -> dict[str, str]:
+        return {
+            "TIINGO_BASE_URL": f"{self.tiingo.url}/tiingo",
+            "TIINGO_API_KEY": "mock",
+            "SEC_DATA_URL": self.edgar.url,
+            "SEC_WWW_URL": self.edgar.url,
+            "SEC_USER_AGENT": "penny-dd-scanner bench (mock@example.com)",
+            "OPENAI_RESPONSES_URL": f"{self.openai.url}/v1/responses",
+            "OPENAI_API_KEY": "mock",
+        }
+
+    def stats(self) -> dict[str, dict]:
+        return {s.name: s.stats.snapshot() for s in self.servers()}
+
+    def reset_stats(self) -> None:
+        for s in self.servers():
+            s.stats.reset()
+
+    def stop(self) -> None:
+        for s in self.servers():
+            s.stop()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Optional
+
+from scanner.utils.hash import sha256_json
+
+from .openai_dd import dd_note_from_context
+
+
+@dataclass
+class DDBatchResult:
+    notes: dict[str, str] = field(default_factory=dict)     # symbol -> note_md
+    cached: int = 0
+    generated: int = 0
+    failures: dict[str, str] = field(default_factory=dict)  # symbol -> error
+
+
+def cached_note(con: sqlite3.Connection, context_hash: str, model: str) -> Optional[str]:
+    row = con.execute(
+        "SELECT note_md FROM dd_notes WHERE context_hash = ? AND model = ? LIMIT 1",
+        (context_hash, model),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def dd_notes_batch(
+    con: sqlite3.Connection,
+    contexts: list[dict],
+    model: str,
+    max_workers: int = 4,
+    max_retries: int = 3,
+    backoff_s: float = 2.0,
+) -> DDBatchResult:
+    """
+    DD notes for many candidates. Each context is keyed by sha256_json(context)
+    and model; a note already stored under that key is reused instead of calling
+    the API again. The rest run with at most max_workers requests in flight.
+
+    SQLite is only touched from the calling thread.
+    """
+    res = DDBatchResult()
+    todo: list[tuple[dict, str]] = []
+    for ctx in contexts:
+        h = sha256_json(ctx)
+        note = cached_note(con, h, model)
+        if note is not None:
+            res.notes[ctx["symbol"]] = note
+            res.cached += 1
+            store_note(con, ctx, model, note, h)
+        else:
+            todo.append((ctx, h))
+
+    if todo:
+        with ThreadPoolExecutor(max_workers=max(int(max_workers), 1)) as pool:
+            futs = {
+                pool.submit(dd_note_from_context, ctx, model, max_retries, backoff_s): (ctx, h)
+                for ctx, h in todo
+            }
+            for fut in as_completed(futs):
+                ctx, h = futs[fut]
+                try:
+                    note = fut.result()
+                except Exception as e:
+                    res.failures[ctx["symbol"]] = f"{type(e).__name__}: {e}"
+                    continue
+                store_note(con, ctx, model, note, h)
+                # Commit as we go so a crash mid-batch doesn't re-bill finished notes.
+                con.commit()
+                res.notes[ctx["symbol"]] = note
+                res.generated += 1
+    con.commit()
+    return res
+
+
+def store_note(con: sqlite3.Connection, ctx: dict, model: str, note: str, context_hash: str) -> None:
+    con.execute(
+        "INSERT OR REPLACE INTO dd_notes(symbol,date,model,note_md,context_hash) VALUES (?,?,?,?,?)",
+        (ctx["symbol"], ctx["date"], model, note, context_hash),
+    )
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import argparse
+import os
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -12,6 +15,7 @@ DD_DIR = Path(__file__).parent
 REPORTS_DIR = DD_DIR / "reports"
 
 
+@lru_cache(maxsize=None)
 def load_md(name: str) -> str:
     p = DD_DIR / name
     if not p.exists():
@@ -74,10 +78,11 @@ def render_filled_scorecard(
     industry: str | None,
     market: BasicMarketSnapshot,
     edgar: BasicEdgarSnapshot,
+    score_date: str | None = None,
 ) -> str:
-    scorecard = load_md("scorecard_v1.md")
+    scorecard = load_md("scorecard_v1.md")  # read once per process
 
-    now = datetime.now().strftime("%Y-%m-%d")
+    now = score_date or datetime.now().strftime("%Y-%m-%d")
     filled = scorecard
     filled = filled.replace("Ticker:", f"Ticker: {ticker}")
     filled = filled.replace("Company:", f"Company: {company or 'NA'}")
@@ -111,34 +116,90 @@ def render_filled_scorecard(
     return filled + appendix
 
 
-def main() -> None:
-    import sys
+def parse_args():
+    p = argparse.ArgumentParser(description="Fill the DD scorecard template for one or more tickers")
+    p.add_argument("tickers", nargs="*", help="Tickers to fill (default: --top from scores_daily)")
+    p.add_argument("--top", type=int, default=None, help="Top N by score_total on --date (default 10 without tickers)")
+    p.add_argument("--date", type=str, default=None,
+                   help="YYYY-MM-DD; scores date for --top (default: latest scored) and as-of date for bars")
+    p.add_argument("--config", type=str, default="config/config.yaml")
+    p.add_argument("--db", type=str, default="data/scanner.sqlite")
+    p.add_argument("--offline", action="store_true", help="Use stored bars only; no Tiingo calls")
+    return p.parse_args()
 
-    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
 
+def main() -> None:
     # Usage:
-    #   python scanner/dd_brain/generate_scorecard.py AAPL
-    ticker = sys.argv[1].upper().strip() if len(sys.argv) > 1 else "AAPL"
+    #   python -m scanner.dd_brain.generate_scorecard AAPL SOUN
+    #   python -m scanner.dd_brain.generate_scorecard --top 20
+    args = parse_args()
 
     # Adapters (keep dd_brain clean)
-    from scanner.market.snapshot import get_market_snapshot
-    from scanner.edgar.snapshot import get_edgar_snapshot
-
-    market = get_market_snapshot(ticker)
-    edgar = get_edgar_snapshot(ticker)
-
-    md = render_filled_scorecard(
-        ticker=ticker,
-        company=None,
-        sector=None,
-        industry=None,
-        market=market,
-        edgar=edgar,
+    from scanner.edgar.client import EdgarClient
+    from scanner.edgar.snapshot import edgar_snapshots
+    from scanner.market.snapshot import market_snapshots
+    from scanner.market.tiingo import TiingoClient
+    from scanner.storage.columnar import BarStore
+    from scanner.storage.db import connect, init_db
+    from scanner.storage.queries import latest_score_date, top_scores
+    from scanner.utils.config import cfg_get, load_config
+
+    cfg = load_config(args.config)
+    con = connect(Path(args.db))
+    init_db(con)
+
+    if args.tickers and args.top is None:
+        tickers = sorted({t.upper().strip() for t in args.tickers})
+        asof = date.fromisoformat(args.date) if args.date else date.today()
+    else:
+        day = args.date or latest_score_date(con)
+        if not day:
+            raise SystemExit("No scores_daily rows; run the EOD scan first or pass tickers.")
+        tickers = [r.symbol for r in top_scores(con, day, args.top or 10)]
+        if not tickers:
+            raise SystemExit(f"No scores for {day}")
+        asof = date.fromisoformat(day)
+
+    tiingo = None
+    if not args.offline:
+        try:
+            tiingo = TiingoClient.from_config(cfg)
+        except RuntimeError as e:
+            print(f"{e}; using stored bars only")
+    market, sync = market_snapshots(con, tickers, asof, tiingo, BarStore.from_config(cfg))
+    if sync is not None:
+        print(f"Bars: fetched {sync.requested} symbols ({sync.up_to_date} already current)")
+
+    ua = os.getenv("SEC_USER_AGENT") or cfg_get(cfg, "edgar.user_agent")
+    edgar_client = EdgarClient.from_config(cfg, user_agent=ua)
+    batch = edgar_snapshots(
+        con, edgar_client, tickers,
+        max_workers=int(cfg_get(cfg, "edgar.max_workers", 4)),
+        filings_max_age_hours=float(cfg_get(cfg, "edgar.filings_refresh_hours", 12)),
     )
+    print(f"EDGAR: {batch.from_store} from stored facts, {batch.fetched} fetched")
+    for w in batch.warnings:
+        print(f"  {w}")
+    for sym, err in sorted(batch.failures.items()):
+        print(f"  {sym}: {err}")
 
-    out = REPORTS_DIR / f"{ticker}_{datetime.now().strftime('%Y-%m-%d')}.md"
-    out.write_text(md, encoding="utf-8")
-    print(f"Wrote: {out}")
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    for ticker in tickers:
+        m, e = market[ticker], batch.snapshots[ticker]
+        if m.market_cap is None and m.price is not None and e.shares_outstanding:
+            m.market_cap = m.price * e.shares_outstanding
+        md = render_filled_scorecard(
+            ticker=ticker,
+            company=None,
+            sector=None,
+            industry=None,
+            market=m,
+            edgar=e,
+            score_date=asof.isoformat(),
+        )
+        out = REPORTS_DIR / f"{ticker}_{asof.isoformat()}.md"
+        out.write_text(md, encoding="utf-8")
+        print(f"Wrote: {out}")
 
 
 if __name__ == "__main__":
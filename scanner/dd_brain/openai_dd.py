@@ -2,12 +2,15 @@ from __future__ import annotations
 import os
 import requests
 
+from scanner.utils.metrics import metrics
+from scanner.utils.retry import send_with_retry
+
 # This uses the OpenAI Responses API (recommended for new projects).
 # Docs: https://platform.openai.com/docs/api-reference/responses
 
 OPENAI_BASE = "https://api.openai.com/v1/responses"
 
-def dd_note_from_context(context: dict, model: str | None = None) -> str:
+def dd_note_from_context(context: dict, model: str | None = None, max_retries: int = 3, backoff_s: float = 2.0) -> str:
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("Missing OPENAI_API_KEY")
@@ -32,14 +35,17 @@ Do not predict price targets. Do not mention placing trades.
         ],
         "max_output_tokens": 800,
     }
-    r = requests.post(
-        OPENAI_BASE,
-        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
-        json=payload,
-        timeout=60,
+    url = os.getenv("OPENAI_RESPONSES_URL", OPENAI_BASE)
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    # No retry on read timeouts: the POST may already have produced (and billed) a response.
+    r = send_with_retry(
+        lambda: requests.post(url, headers=headers, json=payload, timeout=60),
+        "openai", max_retries, backoff_s, retry_timeouts=False,
     )
-    r.raise_for_status()
     data = r.json()
+    usage = data.get("usage") or {}
+    if usage.get("total_tokens"):
+        metrics().incr("openai.tokens", usage["total_tokens"])
     # Responses API returns an output array. We'll join text parts.
     out = []
     for item in data.get("output", []):
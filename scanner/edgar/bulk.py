@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from scanner.storage.db import bulk_write
+
+from .facts import usable_facts
+from .parsers import cik_pad, filing_url, normalize_exchange, recent_filings
+from .snapshot import SNAPSHOT_TAGS
+from .store import replace_facts
+
+# SEC nightly bulk archives:
+#   https://www.sec.gov/Archives/edgar/daily-index/xbrl/companyfacts.zip
+#   https://www.sec.gov/Archives/edgar/daily-index/bulkdata/submissions.zip
+# Download them once (they're several GB) and point this module at the files.
+
+_MEMBER_RE = re.compile(r"CIK(\d{10})(-submissions-\d+)?\.json$")
+
+
+@dataclass
+class IngestStats:
+    members: int = 0
+    companies: int = 0
+    rows: int = 0
+    skipped: int = 0
+
+
+def _iter_members(zip_path: Path) -> Iterator[tuple[str, bool, dict]]:
+    """
+    Yield (cik10, is_supplemental_page, parsed_json) per archive member.
+    Each member is decompressed straight from the ZIP stream; nothing is
+    extracted to disk and only one company is in memory at a time.
+    """
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in zf.infolist():
+            m = _MEMBER_RE.search(info.filename)
+            if info.is_dir() or not m:
+                continue
+            with zf.open(info) as fh:
+                try:
+                    data = json.load(fh)
+                except ValueError:
+                    continue
+            yield m.group(1), m.group(2) is not None, data
+
+
+def _fact_rows(company_facts: dict) -> list[tuple]:
+    gaap = company_facts.get("facts", {}).get("us-gaap", {})
+    rows = []
+    for tag, unit in SNAPSHOT_TAGS:
+        vals = gaap.get(tag, {}).get("units", {}).get(unit, [])
+        if not isinstance(vals, list):
+            continue
+        # Same filter FactSeries applies to API responses.
+        for seq, (v, val) in enumerate(usable_facts(vals)):
+            rows.append((tag, unit, seq, str(v["end"]), val, v.get("form"), v.get("fp"),
+                         v.get("fy"), v.get("filed"), v.get("accn")))
+    return rows
+
+
+def ingest_companyfacts_zip(con: sqlite3.Connection, zip_path: Path, commit_every: int = 500) -> IngestStats:
+    """
+    Load the SNAPSHOT_TAGS subset of every company in companyfacts.zip into xbrl_facts.
+    Each CIK's rows are replaced wholesale, so re-running on a newer archive is safe.
+    """
+    stats = IngestStats()
+    for cik10, _, data in _iter_members(zip_path):
+        stats.members += 1
+        rows = _fact_rows(data)
+        if not rows:
+            stats.skipped += 1
+            continue
+        replace_facts(con, cik10, rows)
+        stats.companies += 1
+        stats.rows += len(rows)
+        if stats.companies % commit_every == 0:
+            con.commit()
+    con.commit()
+    return stats
+
+
+def ingest_submissions_zip(con: sqlite3.Connection, zip_path: Path) -> IngestStats:
+    """
+    Load filings (and ticker -> CIK/exchange mappings) from submissions.zip.
+    Main members carry filings under "filings.recent"; the -submissions-NNN.json
+    pages hold the same columnar arrays at the top level.
+
+    Filings stream straight from the archive into bulk_write; tickers (one small
+    list per company) are written once at the end.
+    """
+    stats = IngestStats()
+    tickers: list[tuple] = []
+
+    def filing_rows() -> Iterator[tuple]:
+        for cik10, supplemental, data in _iter_members(zip_path):
+            stats.members += 1
+            cik10 = cik_pad(data.get("cik", cik10)) if not supplemental else cik10
+            if not supplemental:
+                exchanges = data.get("exchanges", []) or []
+                tickers.extend(
+                    (str(t).upper(), normalize_exchange(exchanges[i]) or None if i < len(exchanges) else None, cik10)
+                    for i, t in enumerate(data.get("tickers", []) or []) if t
+                )
+            stats.companies += 1
+            for f in recent_filings({"filings": {"recent": data}} if supplemental else data):
+                yield (cik10, f["accession"], f["form"], f["filed_at"], f["primary_doc"],
+                       filing_url(cik10, f["accession"], f["primary_doc"]), f["items"])
+
+    stats.rows = bulk_write(con, "filings", filing_rows()).changed
+    bulk_write(con, "tickers", tickers)
+    return stats
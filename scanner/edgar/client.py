@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-import time
+import json
+import os
 from dataclasses import dataclass
+from typing import Iterator, Optional
 
-import requests
+from scanner.utils.http_cache import HttpCache
+from scanner.utils.metrics import metrics
+
+from .transport import SEC_DATA_ENV, SEC_WWW_ENV, shared_transport
 
 SEC_DATA = "https://data.sec.gov"
+SEC_WWW = "https://www.sec.gov"
 SEC_ARCHIVES = "https://www.sec.gov/Archives"
 
 
@@ -13,25 +19,29 @@ SEC_ARCHIVES = "https://www.sec.gov/Archives"
 class EdgarClient:
     user_agent: str
     max_rps: float = 5.0
+    burst: Optional[float] = None
+    cache: Optional[HttpCache] = None
 
     def __post_init__(self):
-        self.s = requests.Session()
-        # Let requests set the Host header automatically based on the URL.
-        self.s.headers.update(
-            {
-                "User-Agent": self.user_agent,
-                "Accept-Encoding": "gzip, deflate",
-            }
+        # Rate limit and connection pool are process-wide; see transport.py.
+        self.transport = shared_transport(self.max_rps, self.burst)
+        self.s = self.transport.session
+        self.headers = {"User-Agent": self.user_agent}
+        self.data_base = os.getenv(SEC_DATA_ENV, SEC_DATA).rstrip("/")
+        self.www_base = os.getenv(SEC_WWW_ENV, SEC_WWW).rstrip("/")
+
+    @classmethod
+    def from_config(cls, cfg: dict, user_agent: str) -> "EdgarClient":
+        e = cfg.get("edgar", {}) or {}
+        return cls(
+            user_agent=user_agent,
+            max_rps=float(e.get("max_rps", 5.0)),
+            burst=e.get("burst"),
+            cache=HttpCache.from_config(cfg, "edgar"),
         )
-        self._min_interval = 1.0 / max(self.max_rps, 0.1)
-        self._last = 0.0
 
     def _throttle(self) -> None:
-        now = time.time()
-        wait = self._min_interval - (now - self._last)
-        if wait > 0:
-            time.sleep(wait)
-        self._last = time.time()
+        self.transport.throttle()
 
     def get_json(self, path: str, host: str = "data") -> dict:
         """
@@ -39,16 +49,19 @@ class EdgarClient:
           - "data" -> https://data.sec.gov
           - otherwise -> https://www.sec.gov
         """
-        self._throttle()
-
         if host == "data":
-            url = f"{SEC_DATA}{path}"
+            url = f"{self.data_base}{path}"
         else:
-            url = f"https://www.sec.gov{path}"
+            url = f"{self.www_base}{path}"
+
+        if self.cache is None:
+            r = self.transport.get(url, headers=self.headers, timeout=30)
+            return r.json()
 
-        r = self.s.get(url, timeout=30)
-        r.raise_for_status()
-        return r.json()
+        body = self.cache.fetch(
+            url, lambda extra: self.transport.get(url, headers={**self.headers, **extra}, timeout=30)
+        )
+        return json.loads(body)
 
     def company_submissions(self, cik10: str) -> dict:
         # cik10 should be zero-padded 10 digits
@@ -56,3 +69,20 @@ class EdgarClient:
 
     def company_facts(self, cik10: str) -> dict:
         return self.get_json(f"/api/xbrl/companyfacts/CIK{cik10}.json", host="data")
+
+    def iter_document(self, url: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Stream a filing document (Archives URL) in raw chunks. Not cached: callers
+        keep the result, not the document.
+        """
+        if url.startswith(SEC_WWW):
+            url = self.www_base + url[len(SEC_WWW):]
+        r = self.transport.get(url, headers=self.headers, timeout=60, stream=True)
+        n = 0
+        try:
+            for chunk in r.iter_content(chunk_size=chunk_size):
+                n += len(chunk)
+                yield chunk
+        finally:
+            r.close()
+            metrics().incr("http.edgar.bytes", n)
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import math
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+# Concept -> ordered (us-gaap tag, unit) fallback chain. The first tag with any
+# usable entries wins, e.g. Revenues before the pre-ASC 606 SalesRevenueNet.
+CONCEPTS: dict[str, tuple[tuple[str, str], ...]] = {
+    "revenue": (("Revenues", "USD"), ("SalesRevenueNet", "USD")),
+    "net_income": (("NetIncomeLoss", "USD"),),
+    "gross_profit": (("GrossProfit", "USD"),),
+    "operating_income": (("OperatingIncomeLoss", "USD"),),
+    "cash": (
+        ("CashAndCashEquivalentsAtCarryingValue", "USD"),
+        ("CashCashEquivalentsRestrictedCashAndRestrictedCashEquivalents", "USD"),
+    ),
+    "debt": (("Debt", "USD"),),
+    "debt_current": (("LongTermDebtCurrent", "USD"),),
+    "debt_noncurrent": (("LongTermDebtNoncurrent", "USD"),),
+    "shares_outstanding": (("CommonStockSharesOutstanding", "shares"),),
+    "operating_cash_flow": (("NetCashProvidedByUsedInOperatingActivities", "USD"),),
+    "capex": (("PaymentsToAcquirePropertyPlantAndEquipment", "USD"),),
+}
+
+INDEXED_TAGS: tuple[tuple[str, str], ...] = tuple(
+    dict.fromkeys(key for chain in CONCEPTS.values() for key in chain)
+)
+
+
+def _end_key(v: dict) -> str:
+    return str(v.get("end", ""))
+
+
+def _form(v: dict) -> str:
+    return str(v.get("form", "")).upper()
+
+
+def _to_float(v) -> float:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def usable_facts(items: Iterable) -> Iterator[tuple[dict, float]]:
+    """
+    companyfacts entries with an end date and a numeric val, paired with the
+    parsed value. The one filter for both the API path (FactSeries) and the
+    bulk path (xbrl_facts), so they agree on what "latest" is.
+    """
+    for v in items:
+        if isinstance(v, dict) and v.get("end"):
+            val = _to_float(v.get("val"))
+            if not math.isnan(val):
+                yield v, val
+
+
+class FactSeries:
+    """
+    One (tag, unit), filtered (usable_facts) and sorted by end date exactly once
+    (stable, so published order breaks ties), held as parallel columns: end
+    (YYYY-MM-DD strings, sorted), val (float64), form and fp.
+
+    latest / ttm / annual lookups scan backwards from the newest entry and stop
+    early, so they're O(1) in practice; results are memoized. latest_asof is a
+    binary search on end.
+    """
+
+    def __init__(self, items: list[dict]):
+        self.end = np.array([_end_key(v) for v in items], dtype="U10")
+        self.val = np.fromiter((_to_float(v["val"]) for v in items), dtype=np.float64, count=len(items))
+        self.form = [_form(v) for v in items]
+        self.fp = [str(v.get("fp") or "").upper() for v in items]
+        self._cache: dict = {}
+
+    @classmethod
+    def from_items(cls, items: Iterable[dict]) -> "FactSeries":
+        """
+        items: raw companyfacts entries; ones usable_facts rejects are dropped.
+        """
+        return cls(sorted((v for v, _ in usable_facts(items)), key=_end_key))
+
+    def __len__(self) -> int:
+        return len(self.val)
+
+    def _value(self, i: int) -> Optional[float]:
+        v = self.val[i]
+        return None if math.isnan(v) else float(v)
+
+    def _last_of_form(self, form: str, n: int) -> list[int]:
+        """
+        Positions of up to the last `n` entries with `form`, oldest first.
+        """
+        out = []
+        for i in range(len(self.form) - 1, -1, -1):
+            if self.form[i] == form:
+                out.append(i)
+                if len(out) == n:
+                    break
+        out.reverse()
+        return out
+
+    def _memo(self, key: str, compute):
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def latest(self) -> Optional[float]:
+        return self._value(-1) if len(self) else None
+
+    def latest_asof(self, end: str) -> Optional[float]:
+        """
+        Most recent value with period end <= `end` (YYYY-MM-DD).
+        """
+        i = int(np.searchsorted(self.end, end, side="right")) - 1
+        return self._value(i) if i >= 0 else None
+
+    def ttm_quarters(self) -> Optional[float]:
+        """
+        Sum of the last four 10-Q values, or None with fewer than four.
+        """
+        def compute() -> Optional[float]:
+            last4 = self._last_of_form("10-Q", 4)
+            if len(last4) < 4:
+                return None
+            ttm = float(sum(float(self.val[i]) for i in last4))
+            return None if math.isnan(ttm) else ttm
+        return self._memo("ttm", compute)
+
+    def latest_annual(self) -> Optional[float]:
+        """
+        Most recent 10-K value; falls back to the latest value of any form.
+        """
+        def compute() -> Optional[float]:
+            k = self._last_of_form("10-K", 1)
+            return self._value(k[0]) if k else self.latest()
+        return self._memo("annual", compute)
+
+    def ttm_or_annual(self) -> Optional[float]:
+        ttm = self.ttm_quarters()
+        if ttm is not None:
+            return ttm
+        return self.latest_annual()
+
+
+_EMPTY = FactSeries([])
+
+
+class FactIndex:
+    """
+    Per-company index of FactSeries keyed by (tag, unit), queried by concept
+    name. Each series is filtered and sorted at most
+    once, on first use, so unused fallback tags cost nothing.
+    """
+
+    def __init__(self, entries: dict[tuple[str, str], list]):
+        self._entries = entries
+        self.series: dict[tuple[str, str], FactSeries] = {}
+
+    @classmethod
+    def from_company_facts(
+        cls, company_facts: dict, keys: Iterable[tuple[str, str]] = INDEXED_TAGS
+    ) -> "FactIndex":
+        gaap = company_facts.get("facts", {}).get("us-gaap", {})
+        entries = {}
+        for tag, unit in keys:
+            vals = gaap.get(tag, {}).get("units", {}).get(unit, [])
+            if isinstance(vals, list) and vals:
+                entries[(tag, unit)] = vals
+        return cls(entries)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "FactIndex":
+        """
+        rows: (tag, unit, end, val, form, fp) in published order per (tag, unit).
+        """
+        entries: dict[tuple[str, str], list] = {}
+        for tag, unit, end, val, form, fp in rows:
+            entries.setdefault((tag, unit), []).append({"end": end, "val": val, "form": form, "fp": fp})
+        return cls(entries)
+
+    def get(self, tag: str, unit: str) -> FactSeries:
+        key = (tag, unit)
+        s = self.series.get(key)
+        if s is None:
+            s = FactSeries.from_items(self._entries.pop(key, ()))
+            self.series[key] = s
+        return s
+
+    def concept(self, name: str) -> FactSeries:
+        """
+        First non-empty series along the concept's fallback chain.
+        """
+        for tag, unit in CONCEPTS[name]:
+            s = self.get(tag, unit)
+            if len(s):
+                return s
+        return _EMPTY
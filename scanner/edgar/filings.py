@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from scanner.storage.db import WRITE_SPECS, WriteStats, bulk_write, in_chunks
+
+from .client import EdgarClient
+from .parsers import filing_url, recent_filings
+
+# Filings ingestion and the two filing gates.
+#
+# sync_filings pulls EDGAR submissions for CIKs not synced within max_age_hours
+# (responses go through the HTTP cache, so unchanged ones revalidate cheaply),
+# drops accessions already stored with one indexed lookup per batch of CIKs, and
+# bulk-inserts the rest.
+#
+# filing_gates answers both gates for every (symbol, date) row at once from one
+# query over the filings table:
+#   sec_current           a 10-K/10-Q filed within fresh_days before the date
+#   recent_dilution_risk  an S-1/S-3 (or amendment), 424B prospectus or 8-K with
+#                         item 3.02 (unregistered equity sale) within dilution_days
+
+PERIODIC_FORMS = ("10-K", "10-Q", "10-KT", "10-QT")
+DILUTION_FORMS = ("S-1", "S-1/A", "S-3", "S-3/A",
+                  "424B1", "424B2", "424B3", "424B4", "424B5", "424B7", "424B8")
+# 8-K "items" is a comma-separated list such as "3.02,9.01".
+DILUTION_8K_ITEM_RE = r"(?:^|,)\s*3\.02\b"
+
+# Every gate form spelled out so each one is an idx_filings_form_filed range scan.
+FILING_EVENTS_SQL = f"""
+SELECT t.symbol, f.filed_at, f.form, f.items
+FROM filings f JOIN tickers t ON t.cik = f.cik
+WHERE f.form IN ({", ".join(f"'{x}'" for x in (*PERIODIC_FORMS, *DILUTION_FORMS, "8-K"))})
+  AND f.filed_at >= ? AND f.filed_at <= ?
+"""
+
+@dataclass
+class FilingsSync:
+    requested: int = 0
+    fresh: int = 0                  # synced within max_age_hours, not pulled
+    fetched: int = 0
+    new: pd.DataFrame = field(default_factory=pd.DataFrame)
+    failures: dict[str, str] = field(default_factory=dict)
+    write: Optional[WriteStats] = None
+
+
+def symbol_ciks(con: sqlite3.Connection, symbols: Iterable[str]) -> dict[str, str]:
+    """
+    symbol -> cik10 from the tickers table, for the symbols that have one.
+    """
+    out: dict[str, str] = {}
+    for part in in_chunks(sorted({s.upper() for s in symbols})):
+        cur = con.execute(
+            f"SELECT symbol, cik FROM tickers WHERE cik IS NOT NULL AND symbol IN ({','.join('?' * len(part))})",
+            part,
+        )
+        out.update(cur.fetchall())
+    return out
+
+
+def _known_accessions(con: sqlite3.Connection, ciks: list[str]) -> set[tuple[str, str]]:
+    known: set[tuple[str, str]] = set()
+    for part in in_chunks(ciks):
+        cur = con.execute(f"SELECT cik, accession FROM filings WHERE cik IN ({','.join('?' * len(part))})", part)
+        known.update(cur.fetchall())
+    return known
+
+
+def due_ciks(con: sqlite3.Connection, ciks: Iterable[str], max_age_hours: float = 12.0) -> list[str]:
+    """
+    Sorted CIKs from `ciks` not synced within max_age_hours.
+    """
+    cutoff = (datetime.now() - timedelta(hours=max_age_hours)).isoformat(timespec="seconds")
+    recent = {r[0] for r in con.execute("SELECT cik FROM filings_sync WHERE synced_at >= ?", (cutoff,))}
+    return [c for c in sorted(set(ciks)) if c not in recent]
+
+
+def fetch_filing_rows(client: EdgarClient, cik10: str) -> list[tuple]:
+    """
+    One CIK's recent filings as rows in WRITE_SPECS["filings"] column order.
+    """
+    return [
+        (cik10, f["accession"], f["form"], f["filed_at"], f["primary_doc"],
+         filing_url(cik10, f["accession"], f["primary_doc"]), f["items"])
+        for f in recent_filings(client.company_submissions(cik10))
+    ]
+
+
+def store_filing_rows(
+    con: sqlite3.Connection,
+    synced: list[str],
+    rows: list[tuple],
+) -> tuple[pd.DataFrame, WriteStats]:
+    """
+    Insert accessions in `rows` not stored yet and mark `synced` CIKs as synced
+    now. Returns the new filings and the write stats.
+    """
+    known = _known_accessions(con, synced)
+    new = [r for r in rows if (r[0], r[1]) not in known]
+    write = bulk_write(con, "filings", new)
+    now = datetime.now().isoformat(timespec="seconds")
+    bulk_write(con, "filings_sync", ((c, now) for c in synced))
+    return pd.DataFrame(new, columns=list(WRITE_SPECS["filings"].columns)), write
+
+
+def sync_filings(
+    con: sqlite3.Connection,
+    client: EdgarClient,
+    ciks: Iterable[str],
+    max_age_hours: float = 12.0,
+    max_workers: int = 4,
+) -> FilingsSync:
+    """
+    Pull submissions for `ciks` that are due and insert accessions not stored yet.
+    Fetch failures are collected per CIK, not raised; those CIKs stay due.
+    """
+    ciks = sorted(set(ciks))
+    res = FilingsSync(requested=len(ciks))
+    due = due_ciks(con, ciks, max_age_hours)
+    res.fresh = len(ciks) - len(due)
+
+    def fetch(cik10: str):
+        try:
+            return fetch_filing_rows(client, cik10)
+        except Exception as e:
+            return e
+
+    rows: list[tuple] = []
+    synced: list[str] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for cik10, got in zip(due, pool.map(fetch, due)):
+            if isinstance(got, Exception):
+                res.failures[cik10] = f"{type(got).__name__}: {got}"
+                continue
+            synced.append(cik10)
+            rows.extend(got)
+    res.fetched = len(synced)
+    res.new, res.write = store_filing_rows(con, synced, rows)
+    return res
+
+
+def filing_events(
+    con: sqlite3.Connection,
+    start: str,
+    end: str,
+    symbols: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """
+    Gate-relevant filings filed in [start, end], by ticker symbol (only
+    `symbols` when given). Columns: symbol, filed_at, periodic (bool), dilution (bool).
+    """
+    if symbols is None:
+        got = con.execute(FILING_EVENTS_SQL, (start, end)).fetchall()
+    else:
+        got = []
+        for part in in_chunks(sorted(set(symbols))):
+            sql = FILING_EVENTS_SQL + f" AND t.symbol IN ({','.join('?' * len(part))})"
+            got.extend(con.execute(sql, (start, end, *part)).fetchall())
+    df = pd.DataFrame(got, columns=["symbol", "filed_at", "form", "items"])
+    items = df["items"].fillna("").astype(str)
+    df["periodic"] = df["form"].isin(PERIODIC_FORMS)
+    df["dilution"] = df["form"].isin(DILUTION_FORMS) | (
+        (df["form"] == "8-K") & items.str.contains(DILUTION_8K_ITEM_RE)
+    )
+    return df.loc[df["periodic"] | df["dilution"], ["symbol", "filed_at", "periodic", "dilution"]]
+
+
+def _day(values) -> np.ndarray:
+    return pd.to_datetime(np.asarray(values)).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def filing_gates(
+    events: pd.DataFrame,
+    symbols: np.ndarray,
+    dates: np.ndarray,
+    fresh_days: int,
+    dilution_days: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (sec_current, recent_dilution_risk) for each (symbols[i], dates[i]).
+    Filings on the row's own date count. Rows need not be sorted.
+    """
+    n = len(symbols)
+    if n == 0 or events.empty:
+        return np.zeros(n, dtype=bool), np.zeros(n, dtype=bool)
+
+    index = pd.Index(pd.unique(np.asarray(symbols)))
+    codes = index.get_indexer(np.asarray(symbols)).astype(np.int64)
+    days = _day(dates)
+    ev_codes = index.get_indexer(events["symbol"].to_numpy()).astype(np.int64)
+    ev_days = _day(events["filed_at"].to_numpy())
+
+    # One sorted key per (symbol, day): window bounds become searchsorted calls.
+    lo = min(days.min(), ev_days.min()) - max(fresh_days, dilution_days) - 1
+    span = int(max(days.max(), ev_days.max()) - lo) + 1
+    keys = codes * span + (days - lo)
+
+    def sorted_keys(mask: np.ndarray) -> np.ndarray:
+        m = mask & (ev_codes >= 0)
+        return np.sort(ev_codes[m] * span + (ev_days[m] - lo))
+
+    periodic = sorted_keys(events["periodic"].to_numpy(dtype=bool))
+    last = np.searchsorted(periodic, keys, side="right") - 1
+    prev = periodic[np.maximum(last, 0)] if len(periodic) else np.zeros(n, dtype=np.int64)
+    # Same symbol block and within fresh_days (a key from another symbol is >= span away).
+    sec_current = (last >= 0) & (keys - prev <= fresh_days)
+
+    dilution = sorted_keys(events["dilution"].to_numpy(dtype=bool))
+    hits = np.searchsorted(dilution, keys, side="right") - np.searchsorted(dilution, keys - dilution_days, side="left")
+    return sec_current, hits > 0
+
+
+def load_filing_gates(
+    con: sqlite3.Connection,
+    symbols: np.ndarray,
+    dates: np.ndarray,
+    fresh_days: int,
+    dilution_days: int,
+    only_rows_symbols: bool = False,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    filing_gates over filing_events read for exactly the window the rows need.
+    only_rows_symbols=True also restricts the read to the rows' symbols (cheaper
+    when they are a small slice of the universe).
+    """
+    if len(dates) == 0:
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype=bool)
+    d = pd.to_datetime(np.asarray(dates))
+    start = (d.min() - timedelta(days=max(fresh_days, dilution_days))).date().isoformat()
+    events = filing_events(con, start, d.max().date().isoformat(),
+                           symbols=pd.unique(np.asarray(symbols)) if only_rows_symbols else None)
+    return filing_gates(events, symbols, dates, fresh_days, dilution_days)
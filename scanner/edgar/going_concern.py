@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import codecs
+import html
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from scanner.storage.queries import latest_filings
+
+from .client import EdgarClient
+from .filings import PERIODIC_FORMS
+
+# Going-concern text scan over 10-K/10-Q primary documents.
+#
+# Documents are streamed in chunks; markup is stripped with a carry-over buffer
+# so a tag or entity split across chunks is handled, and matching runs on the
+# stripped text plus an overlap tail of the previous window. Memory stays at
+# roughly one chunk regardless of document size. Results are kept per accession
+# in going_concern_scans, so each filing is downloaded and scanned once.
+
+CHUNK_BYTES = 64 * 1024
+
+# Stripped text carried into the next window so a phrase spanning chunks matches.
+OVERLAP_CHARS = 1024
+
+# One pass, all phrasings.
+GOING_CONCERN_RE = re.compile(
+    r"""
+    (?P<doubt>substantial\s+doubt\W+(?:\w+\W+){0,15}?going\s+concern)
+    |
+    (?P<term>going\s+concern\s+(?:qualification|uncertainty|explanatory\s+paragraph|emphasis))
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# Checked just before a "substantial doubt" hit: the ASC 205-40 "no substantial
+# doubt" disclosures healthy issuers also make don't set the flag. Only a
+# negation governing "substantial doubt" itself counts ("no (longer) substantial
+# doubt", "does not raise substantial doubt", "does not believe that there is
+# substantial doubt"); "we have not generated revenue; substantial doubt ..." flags.
+NEGATION_RE = re.compile(
+    r"""
+    (?:\bno(?:\s+longer)?
+     |(?:\bnot|n't)
+     |(?:\bnot|n't)\s+(?:raise|create|give\s+rise\s+to)
+     |(?:\bnot|n't)\s+(?:believe|conclude|think)\s+(?:that\s+)?there\s+(?:is|are|was|were|exists?)
+    )(?:\s+any)?\s+$
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# "plans (have) alleviated substantial doubt" is negated too, unless the
+# alleviation itself is: "did not (fully) alleviate substantial doubt".
+ALLEVIATE_RE = re.compile(
+    r"(?P<not>(?:\bnot|n't|\bnever)(?:\s+\w+){0,2}?\s+)?\balleviat(?:e|es|ed|ing)\s+$", re.IGNORECASE,
+)
+
+# The ASC 205-40 evaluation lead-in: "management evaluated whether there are
+# conditions ... that raise substantial doubt ...". Negated only when the
+# evaluating verb, "whether" and the hit share one clause; "we are uncertain
+# whether ..., and these conditions raise substantial doubt" flags.
+EVALUATE_WHETHER_RE = re.compile(r"\b(?:evaluat|assess|consider)\w*(?:\s+of)?\s+whether\b", re.IGNORECASE)
+CLAUSE_BREAK_RE = re.compile(
+    r"[.;:]|,\s*(?:and|but|so|which)\b|\b(?:concluded|determined|found|noted|believes?)\b", re.IGNORECASE,
+)
+LEAD_IN_TAIL_RE = re.compile(r"(?:^|\braise[sd]?|\bthere\s+(?:is|are|was|were|exists?))\s*$", re.IGNORECASE)
+
+# Checked right after a hit: "... going concern no longer exists / has been alleviated".
+NEGATED_AFTER_RE = re.compile(
+    r"\W*(?:(?:has|have|had)\s+been\s+|(?:is|was|were)\s+)?(?:no\s+longer\s+exists?|alleviated)\b",
+    re.IGNORECASE,
+)
+
+# Text inspected on either side of a hit for the checks above; the lead-in
+# check looks back a whole sentence.
+NEGATION_CHARS = 80
+SENTENCE_CHARS = 240
+
+# Longest markup run treated as a tag. A "<" with no ">" within this many
+# characters is text ("revenue < $1 million"), not an open tag to carry forward.
+MAX_TAG_CHARS = 4096
+
+_TAG_RE = re.compile(rf"<[^<>]{{0,{MAX_TAG_CHARS}}}>")
+_SPACE_RE = re.compile(r"\s+")
+
+EXCERPT_CHARS = 240
+
+
+@dataclass
+class GoingConcernScan:
+    flag: bool = False
+    hits: int = 0           # doubt/term matches that set the flag
+    negated: int = 0        # "no substantial doubt ..." matches
+    excerpt: Optional[str] = None
+    bytes: int = 0
+
+
+def _strip(text: str, final: bool = False) -> tuple[str, str]:
+    """
+    Markup-free text for the complete part of `text`, plus the unfinished tail
+    (an open tag or entity, at most MAX_TAG_CHARS) to prepend to the next chunk.
+    """
+    cut = len(text)
+    if not final:
+        lt = text.rfind("<")
+        if lt != -1 and text.find(">", lt) == -1 and len(text) - lt <= MAX_TAG_CHARS + 1:
+            cut = lt
+        amp = text.rfind("&", 0, cut)
+        if amp != -1 and cut - amp < 12 and ";" not in text[amp:cut]:
+            cut = amp
+    body = html.unescape(_TAG_RE.sub(" ", text[:cut]))
+    return _SPACE_RE.sub(" ", body), text[cut:]
+
+
+def scan_chunks(chunks: Iterable[bytes], encoding: str = "utf-8") -> GoingConcernScan:
+    """
+    Scan a document delivered as byte chunks (HTML or plain text).
+    """
+    res = GoingConcernScan()
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    carry = ""
+    tail = ""
+    scanned = 0
+    for chunk in chunks:
+        res.bytes += len(chunk)
+        text, carry = _strip(carry + decoder.decode(chunk))
+        tail, scanned = _match(tail + text, scanned, res)
+    text, _ = _strip(carry + decoder.decode(b"", final=True), final=True)
+    _match(tail + text, scanned, res, final=True)
+    return res
+
+
+def _lead_in(window: str, start: int) -> bool:
+    before = window[max(start - SENTENCE_CHARS, 0):start]
+    m = None
+    for m in EVALUATE_WHETHER_RE.finditer(before):
+        pass
+    if m is None:
+        return False
+    clause = before[m.end():]
+    return not CLAUSE_BREAK_RE.search(clause) and bool(LEAD_IN_TAIL_RE.search(clause))
+
+
+def _negated(window: str, start: int, end: int) -> bool:
+    before = window[max(start - NEGATION_CHARS, 0):start]
+    m = ALLEVIATE_RE.search(before)
+    if m:
+        return m.group("not") is None
+    return bool(
+        NEGATION_RE.search(before)
+        or NEGATED_AFTER_RE.match(window, end)
+        or _lead_in(window, start)
+    )
+
+
+def _match(window: str, scanned: int, res: GoingConcernScan, final: bool = False) -> tuple[str, int]:
+    """
+    Record matches in `window` ending past `scanned` (the part already handled
+    last time). Unless final, a match too close to the end to see what follows
+    it is left for the next window. Returns the overlap tail and how much of
+    it has been handled.
+    """
+    limit = len(window) if final else len(window) - NEGATION_CHARS
+    tail = window[-OVERLAP_CHARS:]
+    # Every phrasing ends in or contains "concern"; skip the regex when it's absent.
+    if "concern" in window.lower():
+        for m in GOING_CONCERN_RE.finditer(window):
+            if m.end() <= scanned or m.end() > limit:
+                continue
+            if m.group("doubt") and _negated(window, m.start(), m.end()):
+                res.negated += 1
+                continue
+            res.hits += 1
+            if res.excerpt is None:
+                a = max(m.start() - EXCERPT_CHARS // 4, 0)
+                res.excerpt = window[a:a + EXCERPT_CHARS].strip()
+        res.flag = res.hits > 0
+    return tail, max(limit - (len(window) - len(tail)), 0)
+
+
+def iter_file(path: Path, chunk_size: int = CHUNK_BYTES) -> Iterator[bytes]:
+    with open(path, "rb") as fh:
+        while chunk := fh.read(chunk_size):
+            yield chunk
+
+
+def scan_file(path: Path, chunk_size: int = CHUNK_BYTES) -> GoingConcernScan:
+    return scan_chunks(iter_file(path, chunk_size))
+
+
+def cached_scan(con: sqlite3.Connection, accession: str) -> Optional[GoingConcernScan]:
+    row = con.execute(
+        "SELECT flag, hits, negated, excerpt, bytes FROM going_concern_scans WHERE accession = ?", (accession,),
+    ).fetchone()
+    if row is None:
+        return None
+    return GoingConcernScan(bool(row[0]), row[1], row[2], row[3], row[4])
+
+
+def scan_filing(
+    con: sqlite3.Connection,
+    client: EdgarClient,
+    cik10: str,
+    accession: str,
+    url: str,
+) -> GoingConcernScan:
+    """
+    Stored result for `accession`, or stream its document, scan and store.
+    """
+    hit = cached_scan(con, accession)
+    if hit is not None:
+        return hit
+    res = scan_chunks(client.iter_document(url, CHUNK_BYTES))
+    con.execute(
+        """
+        INSERT OR REPLACE INTO going_concern_scans
+          (accession, cik, flag, hits, negated, excerpt, bytes, scanned_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (accession, cik10, int(res.flag), res.hits, res.negated, res.excerpt, res.bytes,
+         datetime.now().isoformat(timespec="seconds")),
+    )
+    con.commit()
+    return res
+
+
+def latest_going_concern(
+    con: sqlite3.Connection,
+    client: EdgarClient,
+    cik10: str,
+) -> Optional[bool]:
+    """
+    Going-concern flag from the CIK's latest stored 10-K/10-Q, or None when
+    there is no such filing with a document URL.
+    """
+    latest = next((f for f in latest_filings(con, PERIODIC_FORMS, cik=cik10) if f.url), None)
+    if latest is None:
+        return None
+    return scan_filing(con, client, cik10, latest.accession, latest.url).flag
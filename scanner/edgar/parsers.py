@@ -1,10 +1,17 @@
 from __future__ import annotations
+import re
 from typing import Any, Iterable
 
 def cik_pad(cik: str) -> str:
     c = "".join(ch for ch in str(cik) if ch.isdigit())
     return c.zfill(10)
 
+def normalize_exchange(name) -> str:
+    """
+    "NYSE American" / "NYSE-AMERICAN" / "nyseamerican" -> "NYSEAMERICAN".
+    """
+    return re.sub(r"[^A-Z]", "", str(name or "").upper())
+
 def recent_filings(submissions_json: dict) -> list[dict]:
     # Normalize recent filings list from submissions JSON.
     rec = submissions_json.get("filings", {}).get("recent", {})
@@ -12,6 +19,7 @@ def recent_filings(submissions_json: dict) -> list[dict]:
     acc = rec.get("accessionNumber", []) or []
     filed = rec.get("filingDate", []) or []
     primary = rec.get("primaryDocument", []) or []
+    items = rec.get("items", []) or []
     out = []
     n = min(len(forms), len(acc), len(filed))
     for i in range(n):
@@ -20,5 +28,12 @@ def recent_filings(submissions_json: dict) -> list[dict]:
             "accession": acc[i],
             "filed_at": filed[i],
             "primary_doc": primary[i] if i < len(primary) else None,
+            # 8-K item numbers, e.g. "3.02,9.01"; empty for other forms
+            "items": (items[i] or None) if i < len(items) else None,
         })
     return out
+
+def filing_url(cik: str, accession: str, primary_doc: str | None) -> str | None:
+    if not primary_doc:
+        return None
+    return f"https://www.sec.gov/Archives/edgar/data/{int(cik_pad(cik))}/{accession.replace('-', '')}/{primary_doc}"
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Iterable
+from pathlib import Path
+from typing import Optional
+
+from scanner.utils.http_cache import HttpCache
 
 from .client import EdgarClient
 from .parsers import cik_pad
+from .facts import INDEXED_TAGS, FactIndex
+from .filings import symbol_ciks, sync_filings
+from .going_concern import latest_going_concern
+from .store import cik_for_ticker, fact_rows, has_facts
 
 
 @dataclass
@@ -19,11 +28,16 @@ class EdgarSnapshot:
     cash: Optional[float] = None
     debt: Optional[float] = None
     shares_outstanding: Optional[float] = None
-    going_concern_flag: Optional[bool] = None  # v1: left as NA
+    going_concern_flag: Optional[bool] = None  # None: no scanned 10-K/10-Q (needs con)
 
 
 _TICKER_CIK_CACHE: Optional[dict[str, str]] = None
 
+DEFAULT_EDGAR_CACHE = Path("data/http_cache/edgar")
+
+# Every (us-gaap tag, unit) get_edgar_snapshot reads. Bulk ingestion keeps only these.
+SNAPSHOT_TAGS: tuple[tuple[str, str], ...] = INDEXED_TAGS
+
 
 def _require_user_agent() -> str:
     ua = os.getenv("SEC_USER_AGENT") or os.getenv("EDGAR_USER_AGENT")
@@ -32,7 +46,7 @@ def _require_user_agent() -> str:
     return ua
 
 
-def _load_ticker_cik_map(client: EdgarClient) -> dict[str, str]:
+def load_ticker_cik_map(client: EdgarClient) -> dict[str, str]:
     """
     Loads SEC ticker-to-CIK mapping. Cached per process.
     Source is on www.sec.gov.
@@ -53,131 +67,140 @@ def _load_ticker_cik_map(client: EdgarClient) -> dict[str, str]:
     return out
 
 
-def _facts_list(company_facts: dict, tag: str, unit: str) -> list[dict]:
-    """
-    Pull a list of fact entries for a us-gaap tag and unit.
-    Returns [] if missing.
-    """
-    facts = company_facts.get("facts", {}).get("us-gaap", {})
-    node = facts.get(tag, {})
-    units = node.get("units", {})
-    vals = units.get(unit, [])
-    if not isinstance(vals, list):
-        return []
-    # Filter out malformed entries
-    return [v for v in vals if isinstance(v, dict) and v.get("val") is not None and v.get("end")]
-
-
-def _sort_by_end(items: Iterable[dict]) -> list[dict]:
-    def key(x: dict) -> str:
-        return str(x.get("end", ""))
-    return sorted(list(items), key=key)
-
-
-def _latest_value(items: list[dict]) -> Optional[float]:
-    if not items:
-        return None
-    items = _sort_by_end(items)
-    v = items[-1].get("val")
-    try:
-        return float(v)
-    except Exception:
-        return None
-
-
-def _ttm_sum_quarters(items: list[dict]) -> Optional[float]:
+def get_edgar_snapshot(
+    ticker: str,
+    client: Optional[EdgarClient] = None,
+    con: Optional[sqlite3.Connection] = None,
+) -> EdgarSnapshot:
     """
-    Prefer summing last 4 quarterly values if present.
-    Otherwise return None.
+    con: if given and the bulk store (xbrl_facts, tickers) covers this ticker,
+    facts are read from SQLite instead of companyfacts. The going-concern flag
+    also needs con: it comes from the latest 10-K/10-Q in `filings`, scanned
+    once per accession, so that document is still downloaded the first time.
     """
-    if not items:
-        return None
-    items = _sort_by_end(items)
-
-    # Favor 10-Q entries
-    q_items = [x for x in items if str(x.get("form", "")).upper() == "10-Q"]
-    if len(q_items) >= 4:
-        last4 = q_items[-4:]
-        try:
-            return float(sum(float(x["val"]) for x in last4))
-        except Exception:
-            return None
-
-    return None
+    sym = ticker.upper().strip()
 
+    def edgar() -> EdgarClient:
+        nonlocal client
+        if client is None:
+            client = EdgarClient(user_agent=_require_user_agent(), cache=HttpCache(DEFAULT_EDGAR_CACHE, name="edgar"))
+        return client
 
-def _latest_annual(items: list[dict]) -> Optional[float]:
-    """
-    Best-effort annual fallback: most recent 10-K value.
-    """
-    if not items:
-        return None
-    items = _sort_by_end(items)
-    k_items = [x for x in items if str(x.get("form", "")).upper() == "10-K"]
-    if k_items:
-        return _latest_value(k_items)
-    # If no 10-K, just take latest
-    return _latest_value(items)
+    index = None
+    cik10 = cik_for_ticker(con, sym) if con is not None else None
+    if cik10 and has_facts(con, cik10):
+        index = FactIndex.from_rows(fact_rows(con, cik10))
 
+    if index is None:
+        if not cik10:
+            cik10 = load_ticker_cik_map(edgar()).get(sym)
+        if not cik10:
+            return EdgarSnapshot()
+        index = FactIndex.from_company_facts(edgar().company_facts(cik10))
 
-def _ttm_or_annual(items: list[dict]) -> Optional[float]:
-    ttm = _ttm_sum_quarters(items)
-    if ttm is not None:
-        return ttm
-    return _latest_annual(items)
+    snap = snapshot_from_index(index)
+    if con is not None:
+        snap.going_concern_flag = latest_going_concern(con, edgar(), cik10)
+    return snap
 
 
-def get_edgar_snapshot(ticker: str) -> EdgarSnapshot:
-    sym = ticker.upper().strip()
-    client = EdgarClient(user_agent=_require_user_agent())
-
-    mapping = _load_ticker_cik_map(client)
-    cik10 = mapping.get(sym)
-    if not cik10:
-        return EdgarSnapshot()
+@dataclass
+class SnapshotBatch:
+    snapshots: dict[str, EdgarSnapshot]
+    from_store: int = 0         # facts read from xbrl_facts
+    fetched: int = 0            # companyfacts pulled over HTTP
+    failures: dict[str, str] = field(default_factory=dict)
+    warnings: list[str] = field(default_factory=list)   # batch-level problems that didn't stop it
+
+
+def edgar_snapshots(
+    con: sqlite3.Connection,
+    client: EdgarClient,
+    symbols: list[str],
+    max_workers: int = 4,
+    filings_max_age_hours: float = 12.0,
+) -> SnapshotBatch:
+    """
+    get_edgar_snapshot for many symbols with one client. Facts come from
+    xbrl_facts where stored; the rest are fetched concurrently. Filings are
+    synced incrementally first so going-concern flags use the latest 10-K/10-Q.
+    Per-symbol failures leave an empty snapshot and land in `failures`, not
+    raised; batch-level ones in `warnings`.
+    """
+    syms = [s.upper().strip() for s in symbols]
+    ciks = symbol_ciks(con, syms)
+    batch = SnapshotBatch({s: EdgarSnapshot() for s in syms})
+    if any(s not in ciks for s in syms):
+        try:
+            mapping = load_ticker_cik_map(client)
+        except Exception as e:
+            batch.warnings.append(f"EDGAR ticker map unavailable ({type(e).__name__}); skipping unmapped symbols")
+            mapping = {}
+        ciks.update({s: mapping[s] for s in syms if s not in ciks and s in mapping})
+    stored = {c for c in set(ciks.values()) if has_facts(con, c)}
+    todo = sorted(set(ciks.values()) - stored)
+
+    def fetch(cik10: str):
+        try:
+            return FactIndex.from_company_facts(client.company_facts(cik10))
+        except Exception as e:
+            return e
 
-    facts = client.company_facts(cik10)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        fetched = dict(zip(todo, pool.map(fetch, todo)))
 
-    # Revenue: try common tags in order
-    revenue_items = _facts_list(facts, "Revenues", "USD")
-    if not revenue_items:
-        revenue_items = _facts_list(facts, "SalesRevenueNet", "USD")
-    revenue_ttm = _ttm_or_annual(revenue_items)
+    sync_filings(con, client, ciks.values(), max_age_hours=filings_max_age_hours, max_workers=max_workers)
 
-    net_income_items = _facts_list(facts, "NetIncomeLoss", "USD")
-    net_income_ttm = _ttm_or_annual(net_income_items)
+    for sym in syms:
+        cik10 = ciks.get(sym)
+        if cik10 is None:
+            batch.failures[sym] = "no CIK mapping"
+            continue
+        try:
+            if cik10 in stored:
+                index = FactIndex.from_rows(fact_rows(con, cik10))
+                batch.from_store += 1
+            elif isinstance(fetched[cik10], Exception):
+                raise fetched[cik10]
+            else:
+                index = fetched[cik10]
+                batch.fetched += 1
+            batch.snapshots[sym] = snapshot_from_index(index)
+        except Exception as e:
+            batch.failures[sym] = f"{type(e).__name__}: {e}"
+            continue
+        try:
+            batch.snapshots[sym].going_concern_flag = latest_going_concern(con, client, cik10)
+        except Exception as e:
+            batch.failures[sym] = f"going-concern scan: {type(e).__name__}: {e}"
+    return batch
 
-    gross_profit_items = _facts_list(facts, "GrossProfit", "USD")
-    gross_profit_ttm = _ttm_or_annual(gross_profit_items)
 
-    op_income_items = _facts_list(facts, "OperatingIncomeLoss", "USD")
-    op_income_ttm = _ttm_or_annual(op_income_items)
+def snapshot_from_index(index: FactIndex) -> EdgarSnapshot:
+    revenue_ttm = index.concept("revenue").ttm_or_annual()
+    net_income_ttm = index.concept("net_income").ttm_or_annual()
+    gross_profit_ttm = index.concept("gross_profit").ttm_or_annual()
+    op_income_ttm = index.concept("operating_income").ttm_or_annual()
 
     # Cash and debt: latest point-in-time values
-    cash_items = _facts_list(facts, "CashAndCashEquivalentsAtCarryingValue", "USD")
-    if not cash_items:
-        cash_items = _facts_list(facts, "CashCashEquivalentsRestrictedCashAndRestrictedCashEquivalents", "USD")
-    cash = _latest_value(cash_items)
+    cash = index.concept("cash").latest()
 
     debt = None
-    debt_items = _facts_list(facts, "Debt", "USD")
-    if debt_items:
-        debt = _latest_value(debt_items)
+    debt_series = index.concept("debt")
+    if len(debt_series):
+        debt = debt_series.latest()
     else:
         # Try summing common components if Debt isn't present
-        ltd_current = _latest_value(_facts_list(facts, "LongTermDebtCurrent", "USD"))
-        ltd_noncurrent = _latest_value(_facts_list(facts, "LongTermDebtNoncurrent", "USD"))
+        ltd_current = index.concept("debt_current").latest()
+        ltd_noncurrent = index.concept("debt_noncurrent").latest()
         if ltd_current is not None or ltd_noncurrent is not None:
             debt = float(ltd_current or 0.0) + float(ltd_noncurrent or 0.0)
 
-    shares_items = _facts_list(facts, "CommonStockSharesOutstanding", "shares")
-    shares_outstanding = _latest_value(shares_items)
+    shares_outstanding = index.concept("shares_outstanding").latest()
 
     # FCF: CFO - CapEx (best-effort)
-    cfo_items = _facts_list(facts, "NetCashProvidedByUsedInOperatingActivities", "USD")
-    capex_items = _facts_list(facts, "PaymentsToAcquirePropertyPlantAndEquipment", "USD")
-    cfo_ttm = _ttm_or_annual(cfo_items)
-    capex_ttm = _ttm_or_annual(capex_items)
+    cfo_ttm = index.concept("operating_cash_flow").ttm_or_annual()
+    capex_ttm = index.concept("capex").ttm_or_annual()
     free_cash_flow_ttm = None
     if cfo_ttm is not None and capex_ttm is not None:
         free_cash_flow_ttm = float(cfo_ttm) - float(capex_ttm)
@@ -199,5 +222,5 @@ def get_edgar_snapshot(ticker: str) -> EdgarSnapshot:
         cash=cash,
         debt=debt,
         shares_outstanding=shares_outstanding,
-        going_concern_flag=None,  # v1: we add text-scan later
+        going_concern_flag=None,  # set by get_edgar_snapshot from the text scan
     )
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Iterable, Optional
+
+# Read/write helpers for the xbrl_facts / tickers / filings tables populated by
+# scanner.edgar.bulk. Facts come back as flat (tag, unit, end, val, form, fp)
+# rows in published order, which FactIndex.from_rows indexes the same way as a
+# companyfacts API response.
+
+
+def cik_for_ticker(con: sqlite3.Connection, ticker: str) -> Optional[str]:
+    row = con.execute("SELECT cik FROM tickers WHERE symbol = ?", (ticker.upper().strip(),)).fetchone()
+    return row[0] if row and row[0] else None
+
+
+def has_facts(con: sqlite3.Connection, cik10: str) -> bool:
+    return con.execute("SELECT 1 FROM xbrl_facts WHERE cik = ? LIMIT 1", (cik10,)).fetchone() is not None
+
+
+def fact_rows(con: sqlite3.Connection, cik10: str) -> sqlite3.Cursor:
+    """
+    (tag, unit, end, val, form, fp) rows for one CIK in published order; feeds FactIndex.from_rows.
+    """
+    return con.execute(
+        "SELECT tag, unit, end, val, form, fp FROM xbrl_facts WHERE cik = ? ORDER BY tag, unit, seq",
+        (cik10,),
+    )
+
+
+def replace_facts(con: sqlite3.Connection, cik10: str, rows: Iterable[tuple]) -> int:
+    """
+    Replace all stored facts for one CIK.
+    rows: (tag, unit, seq, end, val, form, fp, fy, filed, accn)
+    """
+    con.execute("DELETE FROM xbrl_facts WHERE cik = ?", (cik10,))
+    cur = con.executemany(
+        """
+        INSERT INTO xbrl_facts (cik, tag, unit, seq, end, val, form, fp, fy, filed, accn)
+        VALUES (?,?,?,?,?,?,?,?,?,?,?)
+        """,
+        ((cik10, *r) for r in rows),
+    )
+    return cur.rowcount
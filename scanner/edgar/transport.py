@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scanner.utils.metrics import metrics
+from scanner.utils.ratelimit import TokenBucket
+from scanner.utils.retry import send_with_retry
+
+# SEC fair-access policy: no more than 10 requests/second per host (user agent).
+SEC_MAX_RPS = 10.0
+
+
+# Base-URL overrides for stand-in servers (scanner.bench.mock_servers); read by EdgarClient.
+SEC_DATA_ENV = "SEC_DATA_URL"
+SEC_WWW_ENV = "SEC_WWW_URL"
+
+
+def sec_rps_cap() -> float:
+    """
+    SEC_MAX_RPS, lifted only when both SEC hosts are overridden to something
+    other than sec.gov (benchmarks against a local stand-in).
+    """
+    urls = [os.getenv(k, "") for k in (SEC_DATA_ENV, SEC_WWW_ENV)]
+    local = all(u and "sec.gov" not in u for u in urls)
+    return float("inf") if local else SEC_MAX_RPS
+
+
+class EdgarTransport:
+    """
+    Process-wide HTTP transport for SEC hosts.
+
+    One token bucket and one pooled keep-alive session are shared by every
+    EdgarClient in the process, so max_rps holds across threads and across the
+    throwaway clients created by get_edgar_snapshot.
+
+    A full bucket plus one second of refill (burst + max_rps) is what can go
+    out in any one-second window, so both are clamped to keep that sum within
+    the SEC cap.
+    """
+
+    def __init__(
+        self,
+        max_rps: float = 5.0,
+        burst: Optional[float] = None,
+        pool_size: int = 16,
+        max_retries: int = 4,
+        backoff_s: float = 1.0,
+    ):
+        cap = sec_rps_cap()
+        rate = min(float(max_rps), cap - 1.0)
+        self.bucket = TokenBucket(rate, min(burst or rate, cap - rate))
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+    def tighten(self, max_rps: float, burst: Optional[float] = None) -> None:
+        # Never loosen the shared limit: the strictest caller wins. Lowering
+        # either side keeps burst + rate within the cap.
+        self.bucket.tighten(max_rps, burst)
+
+    def throttle(self) -> float:
+        waited = self.bucket.acquire()
+        metrics().throttled("edgar", waited)
+        return waited
+
+    def get(self, url: str, headers: Optional[dict] = None, timeout: float = 30, **kw) -> requests.Response:
+        """
+        Throttled GET with retry on 429/5xx. Honors Retry-After and pauses the
+        shared bucket so other threads back off too. Raises for non-retryable
+        errors and once retries are exhausted.
+        """
+        # Streamed bodies are counted by the reader (EdgarClient.iter_document).
+        return send_with_retry(
+            lambda: self.session.get(url, headers=headers, timeout=timeout, **kw),
+            "edgar", self.max_retries, self.backoff_s,
+            limiter=self.bucket, pause_status=(429, 503), count_bytes=not kw.get("stream"),
+        )
+
+
+_TRANSPORT: Optional[EdgarTransport] = None
+_TRANSPORT_LOCK = threading.Lock()
+
+
+def shared_transport(max_rps: float = 5.0, burst: Optional[float] = None) -> EdgarTransport:
+    """
+    The process-wide EdgarTransport. Created on first use; later callers can only
+    tighten its rate.
+    """
+    global _TRANSPORT
+    with _TRANSPORT_LOCK:
+        if _TRANSPORT is None:
+            _TRANSPORT = EdgarTransport(max_rps=max_rps, burst=burst)
+        else:
+            _TRANSPORT.tighten(max_rps, burst)
+        return _TRANSPORT
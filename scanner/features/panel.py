@@ -0,0 +1,139 @@
+from __future__ import annotations
+from typing import Union
+
+import pandas as pd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from scanner.storage.columnar import BarColumns
+
+# Whole-universe feature engine. One sort by (symbol, date), then every feature is
+# a NumPy pass over the stacked columns with per-row "bars available so far"
+# masking, instead of slicing the frame once per symbol.
+#
+# Numbers match stacked_returns / volume_expansion applied to each symbol's
+# history up to that row (same float ops, same pairwise sums for the means).
+
+RETURN_WINDOWS = (5, 10, 20)
+
+# name -> (source column, window). Adding a rolling mean is one line here.
+ROLLING_MEANS: dict[str, tuple[str, int]] = {
+    "vol_5": ("volume", 5),
+    "vol_30": ("volume", 30),
+    "dvol_5": ("dollar_volume", 5),
+    "dvol_30": ("dollar_volume", 30),
+    "adv_20d": ("dollar_volume", 20),
+}
+
+# name -> (numerator, denominator)
+RATIOS: dict[str, tuple[str, str]] = {
+    "vol_ratio_5_30": ("vol_5", "vol_30"),
+    "dvol_ratio_5_30": ("dvol_5", "dvol_30"),
+}
+
+# Columns score_candidate reads
+SCORE_FEATURES = ["ret_5d", "ret_10d", "ret_20d", "accel", "vol_ratio_5_30", "dvol_ratio_5_30"]
+
+
+def _positions(codes: np.ndarray) -> np.ndarray:
+    """
+    0-based row position within each group; codes must be sorted.
+    """
+    n = len(codes)
+    starts = np.r_[0, np.flatnonzero(codes[1:] != codes[:-1]) + 1] if n else np.array([], dtype=np.int64)
+    first = np.zeros(n, dtype=np.int64)
+    first[starts] = starts
+    np.maximum.accumulate(first, out=first)
+    return np.arange(n, dtype=np.int64) - first
+
+
+def _lag_return(x: np.ndarray, avail: np.ndarray, n: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if len(x) > n:
+        ok = avail[n:] > n
+        out[n:][ok] = (x[n:][ok] / x[:-n][ok]) - 1.0
+    return out
+
+
+def _rolling_mean(x: np.ndarray, avail: np.ndarray, w: int) -> np.ndarray:
+    """
+    Trailing w-row mean (NaNs skipped, like Series.mean) where at least w rows exist.
+    """
+    out = np.full(len(x), np.nan)
+    if len(x) < w:
+        return out
+    nan = np.isnan(x)
+    filled = np.where(nan, 0.0, x)
+    sums = sliding_window_view(filled, w).sum(axis=1)
+    counts = w - sliding_window_view(nan, w).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    ok = avail[w - 1:] >= w
+    out[w - 1:][ok] = means[ok]
+    return out
+
+
+def compute_panel(bars: pd.DataFrame, avail: np.ndarray | None = None) -> pd.DataFrame:
+    """
+    bars: any order, columns symbol, date, close, volume, dollar_volume.
+    avail: optional per-row count of bars usable for that row (defaults to the
+    row's position in its symbol's history + 1), in (symbol, date) sorted order.
+
+    Returns one row per input bar, sorted by (symbol, date), with n_bars, close
+    and every feature column.
+    """
+    df = bars.sort_values(["symbol", "date"], kind="stable").reset_index(drop=True)
+    codes = pd.factorize(df["symbol"])[0]
+    if avail is None:
+        avail = _positions(codes) + 1
+
+    cols = {c: df[c].astype(float).to_numpy() for c in ("close", "volume", "dollar_volume")}
+    return pd.DataFrame({
+        "symbol": df["symbol"].to_numpy(), "date": df["date"].to_numpy(), "n_bars": avail,
+        **_feature_columns(cols, avail),
+    })
+
+
+def _feature_columns(cols: dict[str, np.ndarray], avail: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    close plus every feature, one value per row. cols: float arrays (close and
+    the ROLLING_MEANS sources) in (symbol, date) order.
+    """
+    close = np.asarray(cols["close"], dtype=float)
+    out = {"close": close}
+    for n in RETURN_WINDOWS:
+        out[f"ret_{n}d"] = _lag_return(close, avail, n)
+
+    r5, r10, r20 = (out[f"ret_{n}d"] for n in RETURN_WINDOWS)
+    finite = np.isfinite(r5) & np.isfinite(r10) & np.isfinite(r20)
+    out["accel"] = np.where(finite, ((r5 > r10) & (r10 > r20)).astype(float), np.nan)
+
+    for name, (col, w) in ROLLING_MEANS.items():
+        out[name] = _rolling_mean(np.asarray(cols[col], dtype=float), avail, w)
+
+    for name, (num, den) in RATIOS.items():
+        d = out[den]
+        ok = np.isfinite(d) & (d > 0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[name] = np.where(ok, out[num] / np.where(ok, d, 1.0), np.nan)
+    return out
+
+
+def latest_features(bars: Union[pd.DataFrame, BarColumns]) -> pd.DataFrame:
+    """
+    Features as of each symbol's last bar, indexed by symbol. BarColumns are
+    read in place (no frame of every bar is built).
+    """
+    if not isinstance(bars, BarColumns):
+        panel = compute_panel(bars)
+        return panel.groupby("symbol", sort=False).tail(1).set_index("symbol")
+
+    cols = bars.by_symbol()
+    code = np.asarray(cols.code)
+    avail = _positions(code) + 1
+    feats = _feature_columns(cols.values, avail)
+    last = cols.last_rows()
+    return pd.DataFrame(
+        {"date": cols.take(last).dates(), "n_bars": avail[last], **{k: v[last] for k, v in feats.items()}},
+        index=pd.Index(cols.symbols[code[last]].astype(object), name="symbol"),
+    )
@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+import sqlite3
 from dataclasses import dataclass
 from datetime import date, timedelta
 from typing import Optional
 
+from scanner.storage.columnar import BarStore, load_bars
+from scanner.storage.queries import last_n_bars
+
+from .sync import SyncResult, sync_bars
 from .tiingo import TiingoClient
 
+# Calendar days of bars behind a snapshot; covers ~20 trading days.
+SNAPSHOT_DAYS = 45
+# Sessions averaged for avg_daily_volume.
+SNAPSHOT_BARS = 20
+
 
 @dataclass
 class MarketSnapshot:
@@ -45,7 +55,7 @@ def get_market_snapshot(ticker: str) -> MarketSnapshot:
     market_cap = None
     # Best-effort metadata fetch: /tiingo/daily/{sym}
     try:
-        url = f"https://api.tiingo.com/tiingo/daily/{sym}"
+        url = f"{c.base}/daily/{sym}"
         r = c.session.get(url, timeout=30)
         r.raise_for_status()
         meta = r.json()
@@ -59,3 +69,39 @@ def get_market_snapshot(ticker: str) -> MarketSnapshot:
         market_cap=float(market_cap) if market_cap is not None else None,
         avg_daily_volume=float(avg_vol) if avg_vol is not None else None,
     )
+
+
+def market_snapshots(
+    con: sqlite3.Connection,
+    symbols: list[str],
+    asof: date,
+    client: Optional[TiingoClient] = None,
+    store: Optional[BarStore] = None,
+) -> tuple[dict[str, MarketSnapshot], Optional[SyncResult]]:
+    """
+    Snapshots for many symbols from daily_bars. With a client, missing ranges
+    are synced first (one shared client, only what's absent); without one,
+    stored bars are used as they are. market_cap is left for the caller
+    (price x EDGAR shares outstanding), so no per-symbol metadata call is made.
+    """
+    start = asof - timedelta(days=SNAPSHOT_DAYS)
+    sync = sync_bars(con, client, symbols, start=start, end=asof, store=store) if client is not None else None
+    if store is None:
+        bars = last_n_bars(con, symbols, SNAPSHOT_BARS, asof.isoformat())
+        bars = bars[bars["date"] >= start.isoformat()]
+    else:
+        bars = load_bars(con, symbols, start.isoformat(), asof.isoformat(), store)
+        bars = bars.sort_values(["symbol", "date"]).groupby("symbol", sort=False).tail(SNAPSHOT_BARS)
+    out = {sym: MarketSnapshot() for sym in symbols}
+    if bars.empty:
+        return out, sync
+
+    g = bars.groupby("symbol", sort=False)
+    last = g["close"].last()
+    avg_vol = g["volume"].mean()
+    for sym in last.index:
+        out[sym] = MarketSnapshot(
+            price=float(last[sym]),
+            avg_daily_volume=float(avg_vol[sym]) if avg_vol[sym] == avg_vol[sym] else None,
+        )
+    return out, sync
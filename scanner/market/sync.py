@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Optional
+
+from scanner.market.tiingo import TiingoClient
+from scanner.storage.columnar import BarStore, write_bars
+from scanner.storage.db import WriteStats, bulk_write, in_chunks, last_bar_dates
+
+
+@dataclass
+class SyncResult:
+    requested: int = 0          # symbols we hit Tiingo for
+    up_to_date: int = 0         # symbols skipped because daily_bars already covers `end`
+    rows_written: int = 0
+    gaps: dict[str, list[str]] = field(default_factory=dict)
+    failures: dict[str, str] = field(default_factory=dict)
+    no_data: list[str] = field(default_factory=list)  # 404 or no rows from Tiingo
+    write: Optional[WriteStats] = None
+
+
+def find_gaps(con: sqlite3.Connection, symbols: list[str], start: date, end: date) -> dict[str, list[str]]:
+    """
+    Missing session dates per symbol inside [start, end].
+
+    The trading calendar is inferred from daily_bars itself: any date on which at
+    least one stored symbol has a bar counts as a session. A symbol has a gap when
+    a session falls between its first and last stored bar in the range but its own
+    row is missing (missed nightly run, partial Tiingo failure, halted upload).
+    """
+    if not symbols:
+        return {}
+    cal = [
+        d for (d,) in con.execute(
+            "SELECT DISTINCT date FROM daily_bars WHERE date >= ? AND date <= ? ORDER BY date",
+            (start.isoformat(), end.isoformat()),
+        )
+    ]
+    if not cal:
+        return {}
+
+    have: dict[str, set[str]] = {}
+    for part in in_chunks(symbols):
+        for sym, d in con.execute(
+            f"SELECT symbol, date FROM daily_bars WHERE symbol IN ({','.join('?' * len(part))}) AND date >= ? AND date <= ?",
+            [*part, start.isoformat(), end.isoformat()],
+        ):
+            have.setdefault(sym, set()).add(d)
+
+    gaps: dict[str, list[str]] = {}
+    for sym, dates in have.items():
+        first, last = min(dates), max(dates)
+        missing = [d for d in cal if first <= d <= last and d not in dates]
+        if missing:
+            gaps[sym] = missing
+    return gaps
+
+
+def plan_sync(
+    symbols: list[str],
+    last_dates: dict[str, str],
+    start: date,
+    end: date,
+    overlap_days: int = 3,
+    gaps: dict[str, list[str]] | None = None,
+) -> list[tuple[str, date, date]]:
+    """
+    Build (symbol, fetch_start, end) jobs covering only what daily_bars is missing.
+
+    - no stored bars      -> full window from `start`
+    - last stored < end   -> from (last - overlap_days); the overlap re-pulls the
+                             most recent sessions so late Tiingo corrections land
+    - last stored >= end  -> skipped
+    - known gaps          -> from the earliest missing date
+    """
+    gaps = gaps or {}
+    jobs = []
+    for sym in symbols:
+        last = last_dates.get(sym)
+        fetch_start = None
+        if last is None:
+            fetch_start = start
+        elif last < end.isoformat():
+            fetch_start = max(start, date.fromisoformat(last) - timedelta(days=overlap_days))
+        if sym in gaps:
+            gap_start = date.fromisoformat(gaps[sym][0])
+            fetch_start = gap_start if fetch_start is None else min(fetch_start, gap_start)
+        if fetch_start is not None:
+            jobs.append((sym, fetch_start, end))
+    return jobs
+
+
+def sync_jobs(
+    con: sqlite3.Connection,
+    symbols: list[str],
+    start: date,
+    end: date,
+    overlap_days: int = 3,
+    repair_gaps: bool = False,
+    full: bool = False,
+) -> tuple[list[tuple[str, date, date]], dict[str, list[str]]]:
+    """
+    (fetch jobs, gaps found) for sync_bars' options; see plan_sync.
+    """
+    if full:
+        return [(sym, start, end) for sym in symbols], {}
+    gaps = find_gaps(con, symbols, start, end) if repair_gaps else {}
+    return plan_sync(symbols, last_bar_dates(con, symbols), start, end, overlap_days, gaps), gaps
+
+
+def record_no_data(con: sqlite3.Connection, no_data: list[str], fetched: list[str], day: date) -> None:
+    """
+    Remember symbols Tiingo had nothing for as of `day` (build_universe skips
+    them for a while) and forget the ones that returned bars again.
+    """
+    bulk_write(con, "bars_no_data", ((sym, day.isoformat()) for sym in no_data))
+    with con:
+        for part in in_chunks(fetched):
+            con.execute(f"DELETE FROM bars_no_data WHERE symbol IN ({','.join('?' * len(part))})", part)
+
+
+def sync_bars(
+    con: sqlite3.Connection,
+    client: TiingoClient,
+    symbols: list[str],
+    start: date,
+    end: date,
+    overlap_days: int = 3,
+    repair_gaps: bool = False,
+    full: bool = False,
+    store: Optional[BarStore] = None,
+) -> SyncResult:
+    """
+    Bring daily_bars up to `end` for `symbols`, fetching only missing ranges.
+    full=True ignores stored bars and re-downloads [start, end] for everyone.
+    Fetched bars also go to `store` as a new segment when one is given.
+    """
+    res = SyncResult()
+    jobs, res.gaps = sync_jobs(con, symbols, start, end, overlap_days, repair_gaps, full)
+    res.requested = len(jobs)
+    res.up_to_date = len(symbols) - len(jobs)
+    if jobs:
+        bars = client.eod_prices_ranges(jobs)
+        res.failures = dict(client.failures)
+        res.no_data = sorted(client.no_data)
+        fetched = [sym for sym, _, _ in jobs if sym not in client.no_data and sym not in client.failures]
+        record_no_data(con, res.no_data, fetched, end)
+        res.write = write_bars(con, bars)
+        res.rows_written = res.write.rows
+        if store is not None:
+            store.append(bars)
+    return res
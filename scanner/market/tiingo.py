@@ -1,46 +1,136 @@
 from __future__ import annotations
 import os
 import requests
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from typing import Optional
+from requests.adapters import HTTPAdapter
+
+from scanner.storage.columnar import BarColumns, concat_bars
+from scanner.utils.ratelimit import TokenBucket
+from scanner.utils.retry import send_with_retry
 
 TIINGO_BASE = "https://api.tiingo.com/tiingo"
+# Point at a stand-in server (scanner.bench.mock_servers) instead of the real API.
+TIINGO_BASE_ENV = "TIINGO_BASE_URL"
+
+
+# Price fields in Tiingo's daily JSON; dollar_volume is derived.
+PRICE_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def decode_prices(sym: str, data: list[dict]) -> BarColumns:
+    """
+    One symbol's /daily/<sym>/prices JSON as BarColumns (adds dollar_volume).
+    Missing or null fields become NaN.
+    """
+    n = len(data)
+    if not n:
+        return BarColumns.empty()
+    day = np.array([d["date"][:10] for d in data], dtype="datetime64[D]").astype(np.int32)
+    values = {}
+    for c in PRICE_FIELDS:
+        values[c] = np.fromiter((np.nan if d.get(c) is None else d[c] for d in data), dtype=np.float64, count=n)
+    values["dollar_volume"] = values["close"] * values["volume"]
+    return BarColumns(np.array([sym]), np.zeros(n, dtype=np.int32), day, values)
+
 
 class TiingoClient:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_workers: int = 1,
+        max_rps: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_retries: int = 3,
+        backoff_s: float = 1.0,
+    ):
         self.api_key = api_key or os.getenv("TIINGO_API_KEY")
+        self.base = os.getenv(TIINGO_BASE_ENV, TIINGO_BASE).rstrip("/")
         if not self.api_key:
             raise RuntimeError("Missing TIINGO_API_KEY")
+        self.max_workers = max(int(max_workers), 1)
+        self.max_retries = max(int(max_retries), 0)
+        self.backoff_s = backoff_s
+        self.limiter = TokenBucket(max_rps, burst) if max_rps else None
+        # symbol -> error message for the most recent eod_prices call
+        self.failures: dict[str, str] = {}
+        # symbols the most recent call got a 404 or no rows for
+        self.no_data: set[str] = set()
+
         self.session = requests.Session()
+        # One keep-alive connection per worker thread.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self.max_workers, 10))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.headers.update({"Authorization": f"Token {self.api_key}"})
 
+    @classmethod
+    def from_config(cls, cfg: dict, api_key: Optional[str] = None) -> "TiingoClient":
+        t = cfg.get("tiingo", {}) or {}
+        return cls(
+            api_key=api_key,
+            max_workers=t.get("max_workers", 1),
+            max_rps=t.get("max_rps"),
+            burst=t.get("burst"),
+            max_retries=t.get("max_retries", 3),
+            backoff_s=t.get("backoff_s", 1.0),
+        )
+
+    def _get(self, url: str, params: dict) -> requests.Response:
+        return send_with_retry(
+            lambda: self.session.get(url, params=params, timeout=30),
+            "tiingo", self.max_retries, self.backoff_s, limiter=self.limiter,
+        )
+
+    def fetch_symbol(self, sym: str, start: date, end: date) -> BarColumns:
+        url = f"{self.base}/daily/{sym}/prices"
+        params = {
+            "startDate": start.isoformat(),
+            "endDate": end.isoformat(),
+            "format": "json",
+            "resampleFreq": "daily",
+        }
+        return decode_prices(sym, self._get(url, params).json())
+
+    def eod_prices_ranges(self, jobs: list[tuple[str, date, date]]) -> BarColumns:
+        """
+        Fetch (symbol, start, end) jobs with up to max_workers in flight.
+        Failed symbols land in self.failures, ones Tiingo has nothing for (404 or
+        no rows) in self.no_data; the rest are returned in job order.
+        """
+        self.failures = {}
+        self.no_data = set()
+        results: dict[str, BarColumns] = {}
+
+        def work(job: tuple[str, date, date]) -> None:
+            sym, start, end = job
+            try:
+                cols = self.fetch_symbol(sym, start, end)
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code == 404:
+                    self.no_data.add(sym)
+                else:
+                    self.failures[sym] = f"{type(e).__name__}: {e}"
+            except Exception as e:
+                self.failures[sym] = f"{type(e).__name__}: {e}"
+            else:
+                if len(cols):
+                    results[sym] = cols
+                else:
+                    self.no_data.add(sym)
+
+        if self.max_workers == 1 or len(jobs) <= 1:
+            for job in jobs:
+                work(job)
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                list(pool.map(work, jobs))
+
+        return concat_bars([results[sym] for sym, _, _ in jobs if sym in results])
+
     def eod_prices(self, symbols: list[str], start: date, end: date) -> pd.DataFrame:
-        # Tiingo supports per-symbol endpoints. For MVP, loop.
-        rows = []
-        for sym in symbols:
-            url = f"{TIINGO_BASE}/daily/{sym}/prices"
-            params = {
-                "startDate": start.isoformat(),
-                "endDate": end.isoformat(),
-                "format": "json",
-                "resampleFreq": "daily",
-            }
-            r = self.session.get(url, params=params, timeout=30)
-            r.raise_for_status()
-            data = r.json()
-            for d in data:
-                rows.append({
-                    "symbol": sym,
-                    "date": d["date"][:10],
-                    "open": d.get("open"),
-                    "high": d.get("high"),
-                    "low": d.get("low"),
-                    "close": d.get("close"),
-                    "volume": d.get("volume"),
-                })
-        df = pd.DataFrame(rows)
-        if df.empty:
-            return df
-        df["dollar_volume"] = df["close"] * df["volume"]
-        return df
+        # Tiingo only has per-symbol endpoints, so fan out across a thread pool.
+        return self.eod_prices_ranges([(sym, start, end) for sym in symbols]).to_frame()
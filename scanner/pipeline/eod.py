@@ -0,0 +1,432 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Optional
+
+import pandas as pd
+
+from scanner.dd_brain.dd_batch import dd_notes_batch
+from scanner.edgar.client import EdgarClient
+from scanner.edgar.filings import load_filing_gates, symbol_ciks, sync_filings
+from scanner.edgar.snapshot import load_ticker_cik_map
+from scanner.features.panel import SCORE_FEATURES, latest_features
+from scanner.market.sync import sync_bars
+from scanner.market.tiingo import TiingoClient
+from scanner.scoring.scorecard import COMPONENTS, ScoreWeights, score_batch, score_upper_bound
+from scanner.signals.rules import generate_signal
+from scanner.storage.columnar import BarColumns, BarStore, load_bar_columns
+from scanner.storage.db import bulk_write_frame
+from scanner.universe.builder import UniverseFilter, build_universe, qualifying, refresh_tickers
+from scanner.utils.config import cfg_get
+from scanner.utils.metrics import metrics
+
+from .runner import RunContext, Stage, StopRun
+
+# Nightly EOD run as explicit stages. Each stage takes the RunContext plus the
+# outputs of earlier stages (by name) and returns its own output, which the
+# runner checkpoints.
+
+DEFAULT_SEC_USER_AGENT = "penny-dd-scanner/0.1 (contact: you@example.com)"
+
+# Calendar days of bars behind the run date; covers 20+ trading days.
+LOOKBACK_DAYS = 75
+
+# Bars a symbol needs inside the lookback window to be scored.
+MIN_BARS = 25
+
+
+def _tiingo(ctx: RunContext) -> TiingoClient:
+    if "tiingo" not in ctx.cache:
+        ctx.cache["tiingo"] = TiingoClient.from_config(ctx.cfg)
+    return ctx.cache["tiingo"]
+
+
+def _edgar(ctx: RunContext) -> EdgarClient:
+    if "edgar" not in ctx.cache:
+        ua = os.getenv("SEC_USER_AGENT", DEFAULT_SEC_USER_AGENT)
+        ctx.cache["edgar"] = EdgarClient.from_config(ctx.cfg, user_agent=ua)
+    return ctx.cache["edgar"]
+
+
+def build_gates(
+    feats: pd.DataFrame,
+    cfg: dict,
+    con: Optional[sqlite3.Connection] = None,
+    only_rows_symbols: bool = False,
+) -> pd.DataFrame:
+    """
+    Boolean gate columns for score_batch, aligned to feats' index.
+    feats carries date plus symbol (as a column, or as the index for
+    latest_features output). Filing gates are read from `con`; without one
+    they default to current / no dilution.
+    """
+    min_adv = float(cfg_get(cfg, "universe.min_avg_dollar_volume_20d", 5_000_000))
+    if con is not None:
+        symbols = feats["symbol"].to_numpy() if "symbol" in feats.columns else feats.index.to_numpy()
+        sec_current, dilution = load_filing_gates(
+            con, symbols, feats["date"].to_numpy(),
+            fresh_days=int(cfg_get(cfg, "scan.sec_current_max_days", 150)),
+            dilution_days=int(cfg_get(cfg, "scan.dilution_lookback_days", 90)),
+            only_rows_symbols=only_rows_symbols,
+        )
+    else:
+        sec_current, dilution = True, False
+    return pd.DataFrame({
+        "liquidity_ok": feats["adv_20d"].to_numpy() >= min_adv,
+        "sec_current": sec_current,
+        "recent_dilution_risk": dilution,
+        "earnings_anticipation_window": False,  # wire to earnings calendar provider
+        "post_earnings_window": False,          # wire to earnings date delta
+    }, index=feats.index)
+
+
+def _bar_store(ctx: RunContext) -> BarStore | None:
+    if "bar_store" not in ctx.cache:
+        ctx.cache["bar_store"] = BarStore.from_config(ctx.cfg)
+    return ctx.cache["bar_store"]
+
+
+def stage_universe(ctx: RunContext, out: dict) -> list[str]:
+    """
+    Symbols to fetch tonight: listed on the configured exchanges and passing the
+    price / dollar-volume filters on stored bars (plus ones not seen yet).
+    universe.symbols in config overrides the whole thing.
+    """
+    explicit = cfg_get(ctx.cfg, "universe.symbols")
+    if explicit:
+        return sorted({str(s).upper() for s in explicit})
+
+    try:
+        st = refresh_tickers(ctx.con, _edgar(ctx), float(cfg_get(ctx.cfg, "universe.ticker_refresh_hours", 24)))
+        if st is not None:
+            print(f"Tickers refreshed: {st}")
+    except Exception as e:
+        print(f"Ticker refresh failed ({type(e).__name__}: {e}); using stored tickers")
+
+    res = build_universe(ctx.con, UniverseFilter.from_config(ctx.cfg), ctx.run_date, LOOKBACK_DAYS, _bar_store(ctx),
+                         recheck_days=int(cfg_get(ctx.cfg, "universe.recheck_rejected_days", 5)))
+    print(f"Universe: {res.listed} listed, {len(res.qualified)} qualify, {res.rejected} filtered out "
+          f"({len(res.rechecked)} due a recheck), {len(res.unseen)} without recent bars "
+          f"({len(res.no_data)} more skipped: no Tiingo data)")
+    if not res.symbols:
+        raise StopRun("Empty universe: no tickers on the configured exchanges (is the tickers table loaded?)")
+    return res.symbols
+
+
+def stage_fetch_bars(ctx: RunContext, out: dict) -> BarColumns:
+    universe = out["universe"]
+    start = ctx.run_date - timedelta(days=LOOKBACK_DAYS)
+    end = ctx.run_date
+
+    sync = sync_bars(
+        ctx.con, _tiingo(ctx), universe, start=start, end=end,
+        repair_gaps=ctx.args.repair_gaps, full=(ctx.args.sync == "full"), store=_bar_store(ctx),
+    )
+    print(f"Bars: fetched {sync.requested} symbols ({sync.up_to_date} already current), wrote {sync.rows_written} rows")
+    if sync.write is not None:
+        print(f"  {sync.write}")
+    if sync.gaps:
+        print(f"Repaired gaps for {len(sync.gaps)} symbols")
+    if sync.no_data:
+        print(f"No Tiingo data for {len(sync.no_data)} symbols")
+    if sync.failures:
+        print(f"Tiingo fetch failed for {len(sync.failures)}/{len(universe)} symbols:")
+        for sym, err in sorted(sync.failures.items()):
+            print(f"  {sym}: {err}")
+
+    # Feature window comes from storage: stored history plus tonight's new rows.
+    bars = load_bar_columns(ctx.con, universe, start.isoformat(), end.isoformat(), _bar_store(ctx))
+    if not len(bars):
+        raise StopRun("No bars returned. Check symbols and Tiingo key.")
+    return bars
+
+
+def universe_ciks(ctx: RunContext, universe: list[str]) -> dict[str, str]:
+    """
+    symbol -> cik10 from `tickers`, falling back to SEC's ticker map for
+    symbols it doesn't know. Unmappable symbols are left out.
+    """
+    ciks = symbol_ciks(ctx.con, universe)
+    missing = [s for s in universe if s not in ciks]
+    if missing:
+        try:
+            mapping = load_ticker_cik_map(_edgar(ctx))
+        except Exception as e:
+            print(f"EDGAR ticker map unavailable ({type(e).__name__}); skipping unmapped symbols")
+            mapping = {}
+        ciks.update({s: mapping[s] for s in missing if s in mapping})
+    return ciks
+
+
+def stage_fetch_filings(ctx: RunContext, out: dict) -> pd.DataFrame:
+    """
+    New EDGAR filings for the universe, inserted into `filings`. CIKs synced
+    within edgar.filings_refresh_hours are skipped, as are (with
+    pipeline.tiered) symbols that can't reach signals.min_score whatever their
+    filings say. Lookup failures are reported and skipped, not fatal. Returns
+    the newly stored filings.
+    """
+    universe = out["universe"]
+    if tiered(ctx.cfg):
+        reachable = reachable_symbols(out["features"], universe, ctx.cfg)
+        print(f"Tiered: EDGAR for {len(reachable)}/{len(universe)} symbols, "
+              f"the rest can't reach {min_score(ctx.cfg):g}")
+        metrics().incr("prune.edgar_symbols", len(universe) - len(reachable))
+        universe = [s for s in universe if s in reachable]
+    ciks = universe_ciks(ctx, universe)
+    res = sync_filings(
+        ctx.con, _edgar(ctx), ciks.values(),
+        max_age_hours=float(cfg_get(ctx.cfg, "edgar.filings_refresh_hours", 12)),
+        max_workers=int(cfg_get(ctx.cfg, "edgar.max_workers", 4)),
+    )
+    print(f"Filings: {res.fetched} companies pulled ({res.fresh} already current), {len(res.new)} new filings")
+    if res.failures:
+        print(f"EDGAR submissions failed for {len(res.failures)}/{res.requested - res.fresh} companies")
+    return res.new
+
+
+def stage_features(ctx: RunContext, out: dict) -> pd.DataFrame:
+    # One pass over the whole panel; rows are each symbol's latest bar.
+    return latest_features(out["fetch_bars"])
+
+
+def eligible_features(feats: pd.DataFrame, universe: list[str], cfg: dict) -> pd.DataFrame:
+    """
+    latest_features rows for `universe` symbols that pass the price / volume
+    filters and have MIN_BARS bars, in universe order.
+    """
+    eligible = feats.loc[[s for s in universe if s in feats.index]]
+    eligible = eligible.loc[qualifying(eligible, UniverseFilter.from_config(cfg))]
+    return eligible[eligible["n_bars"] >= MIN_BARS]
+
+
+def tiered(cfg: dict) -> bool:
+    return bool(cfg_get(cfg, "pipeline.tiered", False))
+
+
+def min_score(cfg: dict) -> float:
+    return float(cfg_get(cfg, "signals.min_score", 70))
+
+
+def upper_bounds(eligible: pd.DataFrame, cfg: dict) -> pd.Series:
+    """
+    Best score each eligible symbol could get from bars alone, over every
+    outcome of the filing gates. symbol -> bound.
+    """
+    if eligible.empty:
+        return pd.Series(dtype=float)
+    ub = score_upper_bound(eligible[SCORE_FEATURES], build_gates(eligible, cfg), ScoreWeights.from_config(cfg))
+    return pd.Series(ub, index=eligible.index)
+
+
+def reachable_symbols(feats: pd.DataFrame, universe: list[str], cfg: dict) -> set[str]:
+    """
+    Universe symbols whose upper bound reaches signals.min_score: the only ones
+    worth EDGAR and DD calls in tiered mode.
+    """
+    ub = upper_bounds(eligible_features(feats, universe, cfg), cfg)
+    return set(ub.index[ub >= min_score(cfg)])
+
+
+@dataclass
+class TierStats:
+    universe: int = 0
+    eligible: int = 0     # enough bars, inside the price / volume band
+    reachable: int = 0    # upper bound >= min_score: filings fetched
+    passing: int = 0      # final score >= min_score: DD candidates
+    dd: Optional[int] = None  # DD notes (top N of passing); None without --dd
+    min_score: float = 70.0
+
+    def rows(self) -> list[tuple[str, int, int]]:
+        """
+        (tier, symbols kept, symbols pruned there).
+        """
+        names = ["universe", "bars", f"upper bound >= {self.min_score:g}", f"score >= {self.min_score:g}"]
+        kept = [self.universe, self.eligible, self.reachable, self.passing]
+        if self.dd is not None:
+            names.append("dd top N")
+            kept.append(self.dd)
+        return [(n, k, (kept[i - 1] - k) if i else 0) for i, (n, k) in enumerate(zip(names, kept))]
+
+    def __str__(self) -> str:
+        return " -> ".join(f"{n} {k}" + (f" (-{p})" if p else "") for n, k, p in self.rows())
+
+
+def tier_stats(ctx: RunContext, out: dict) -> TierStats:
+    """
+    How far each universe symbol got: recomputed from stage outputs, so it
+    holds for resumed runs too.
+    """
+    cfg = ctx.cfg
+    eligible = eligible_features(out["features"], out["universe"], cfg)
+    ub = upper_bounds(eligible, cfg)
+    floor = min_score(cfg)
+    return TierStats(
+        universe=len(out["universe"]),
+        eligible=len(eligible),
+        reachable=int((ub >= floor).sum()),
+        passing=int((out["score"]["score_total"] >= floor).sum()),
+        dd=None if out.get("dd") is None else len(out["dd"]),
+        min_score=floor,
+    )
+
+
+def score_records(eligible: pd.DataFrame, cfg: dict, con: sqlite3.Connection, run_date: str,
+                  only_rows_symbols: bool = False) -> list[dict]:
+    """
+    One scores row (symbol, date, score_total, setup_class, components,
+    features, gates) per eligible symbol.
+    """
+    gates_df = build_gates(eligible, cfg, con, only_rows_symbols)
+    scores = score_batch(eligible[SCORE_FEATURES], gates_df, ScoreWeights.from_config(cfg))
+    results = []
+    for sym in eligible.index:
+        sc = scores.loc[sym]
+        results.append({
+            "symbol": sym,
+            "date": run_date,
+            "score_total": float(sc["total"]),
+            "setup_class": sc["setup_class"],
+            "components": {c: float(sc[c]) for c in COMPONENTS},
+            "features": {k: float(eligible.at[sym, k]) for k in SCORE_FEATURES},
+            "gates": {g: bool(gates_df.at[sym, g]) for g in gates_df.columns},
+        })
+    return results
+
+
+def dd_context(row: dict, run_date: str) -> dict:
+    """
+    What the DD note for one scores row is generated from (and cached by).
+    """
+    return {
+        "symbol": row["symbol"],
+        "date": run_date,
+        "score_total": row["score_total"],
+        "setup_class": row["setup_class"],
+        "components": row["components"],
+        "features": row["features"],
+        "gates": row["gates"],
+    }
+
+
+def stage_score(ctx: RunContext, out: dict) -> pd.DataFrame:
+    eligible = eligible_features(out["features"], out["universe"], ctx.cfg)
+    if eligible.empty:
+        raise StopRun("No candidates after basic data availability checks.")
+
+    results = score_records(eligible, ctx.cfg, ctx.con, ctx.run_date.isoformat())
+    # Ties broken by symbol so the top N (and its DD notes) is reproducible.
+    df = pd.DataFrame(results).sort_values(["score_total", "symbol"], ascending=[False, True], ignore_index=True)
+    bulk_write_frame(ctx.con, "scores_daily", df.assign(
+        components_json=[json.dumps(c, sort_keys=True) for c in df["components"]],
+    ))
+    return df
+
+
+def signal_rows(scores: pd.DataFrame, cfg: dict) -> pd.DataFrame:
+    """
+    scores: symbol, date, score_total, setup_class. One row per emitted signal,
+    shaped like the signals table.
+    """
+    floor = min_score(cfg)
+    sig_rows = []
+    for r in scores[["symbol", "date", "score_total", "setup_class"]].to_dict(orient="records"):
+        risk = {"stop_loss_pct": 0.10, "take_profit_pct": 0.10}
+        sigs = generate_signal(r["symbol"], r["date"], r["score_total"], r["setup_class"], risk, min_score=floor)
+        for s in sigs:
+            sig_rows.append({
+                "symbol": s.symbol,
+                "date": s.date,
+                "signal": s.signal,
+                "rationale_json": json.dumps(s.rationale, sort_keys=True),
+            })
+    return pd.DataFrame(sig_rows, columns=["symbol", "date", "signal", "rationale_json"])
+
+
+def stage_signals(ctx: RunContext, out: dict) -> pd.DataFrame:
+    df = signal_rows(out["score"], ctx.cfg)
+    bulk_write_frame(ctx.con, "signals", df)
+    return df
+
+
+def stage_dd(ctx: RunContext, out: dict) -> dict[str, str]:
+    """
+    DD notes for the top N candidates (with pipeline.tiered, only those scoring
+    at least signals.min_score). symbol -> note markdown.
+    Notes for unchanged contexts come from dd_notes; the rest run concurrently.
+    """
+    top_n = int(cfg_get(ctx.cfg, "dd_brain.top_n", 10))
+    model = os.getenv("OPENAI_MODEL", "gpt-5.2")
+    scores = out["score"]
+    if tiered(ctx.cfg):
+        passing = scores[scores["score_total"] >= min_score(ctx.cfg)]
+        metrics().incr("prune.dd", min(top_n, len(scores)) - min(top_n, len(passing)))
+        scores = passing
+    contexts = [dd_context(r, ctx.run_date.isoformat()) for r in scores.head(top_n).to_dict(orient="records")]
+    res = dd_notes_batch(
+        ctx.con, contexts, model,
+        max_workers=int(cfg_get(ctx.cfg, "dd_brain.max_workers", 4)),
+        max_retries=int(cfg_get(ctx.cfg, "dd_brain.max_retries", 3)),
+        backoff_s=float(cfg_get(ctx.cfg, "dd_brain.backoff_s", 2.0)),
+    )
+    print(f"DD notes: {res.cached} cached, {res.generated} generated, {len(res.failures)} failed")
+    if res.failures:
+        # Finished notes are already stored; a rerun only retries these.
+        raise RuntimeError(f"DD generation failed for {sorted(res.failures)}: {res.failures}")
+    return res.notes
+
+
+def stage_report(ctx: RunContext, out: dict) -> list[str]:
+    run_date = ctx.run_date.isoformat()
+    df_out = out["score"]
+    outdir = ctx.outdir
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    tiers = None
+    if tiered(ctx.cfg):
+        tiers = tier_stats(ctx, out)
+        print(f"Tiers: {tiers}")
+        for name in ("universe", "eligible", "reachable", "passing", "dd"):
+            if getattr(tiers, name) is not None:
+                metrics().incr(f"tier.{name}", getattr(tiers, name))
+
+    watchlist_path = outdir / f"watchlist_{run_date}.csv"
+    df_out[["symbol","score_total","setup_class"]].to_csv(watchlist_path, index=False)
+
+    signals_path = outdir / f"signals_{run_date}.csv"
+    out["signals"].to_csv(signals_path, index=False)
+
+    report_path = outdir / f"report_{run_date}.md"
+    with report_path.open("w", encoding="utf-8") as f:
+        f.write(f"# EOD Scan Report {run_date}\n\n")
+        f.write("## Top candidates\n\n")
+        f.write(df_out[["symbol","score_total","setup_class"]].head(20).to_markdown(index=False))
+        f.write("\n\n")
+        if tiers is not None:
+            f.write("## Tiers\n\n")
+            f.write(pd.DataFrame(tiers.rows(), columns=["tier", "kept", "pruned"]).to_markdown(index=False))
+            f.write("\n\n")
+        f.write("## Files\n")
+        f.write(f"- {watchlist_path}\n")
+        f.write(f"- {signals_path}\n")
+        f.write(f"- {report_path}\n")
+
+    for p in (watchlist_path, signals_path, report_path):
+        print(f"Wrote {p}")
+    return [str(watchlist_path), str(signals_path), str(report_path)]
+
+
+STAGES = [
+    Stage("universe", stage_universe),
+    Stage("fetch_bars", stage_fetch_bars),
+    Stage("features", stage_features),
+    Stage("fetch_filings", stage_fetch_filings),
+    Stage("score", stage_score),
+    Stage("signals", stage_signals),
+    Stage("dd", stage_dd, enabled=lambda ctx: bool(ctx.args.dd)),
+    Stage("report", stage_report, checkpoint=False),
+]
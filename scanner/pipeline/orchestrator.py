@@ -0,0 +1,479 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from scanner.dd_brain.dd_batch import cached_note, store_note
+from scanner.dd_brain.openai_dd import dd_note_from_context
+from scanner.edgar.filings import FilingsSync, due_ciks, fetch_filing_rows, store_filing_rows
+from scanner.features.panel import SCORE_FEATURES, latest_features
+from scanner.market.sync import SyncResult, sync_jobs
+from scanner.scoring.scorecard import ScoreWeights, score_upper_bound
+from scanner.storage.columnar import BarColumns, concat_bars, load_bar_columns, write_bars
+from scanner.storage.db import WRITE_SPECS, WriteStats
+from scanner.utils.config import cfg_get
+from scanner.utils.hash import sha256_json
+from scanner.utils.metrics import metrics
+
+from .eod import (
+    LOOKBACK_DAYS, STAGES, _bar_store, _edgar, _tiingo, build_gates, dd_context, eligible_features,
+    min_score, score_records, tiered, universe_ciks,
+)
+from .runner import RunContext, Stage, StopRun
+
+# Overlapped fetch for the EOD run (pipeline.mode: async).
+#
+# One asyncio loop drives a lane per provider: Tiingo bars, EDGAR submissions
+# and OpenAI DD notes each run on their own worker threads behind their own
+# client-side rate limiter, so a provider waiting on its budget never holds the
+# others up. The loop thread owns SQLite and does the bookkeeping:
+#
+#   - Bars are written and turned into features in batches as they arrive
+#     (latest_features on a CPU lane), not after the last symbol is in.
+#   - EDGAR works through due CIKs best-first: once a symbol's features are
+#     known, its CIK is ranked by the highest score it could still reach.
+#   - With pipeline.tiered, EDGAR waits for a company's bounds and skips it
+#     when none of its symbols can reach signals.min_score.
+#   - With --dd, a symbol whose score is final (bars and filings in) and that
+#     can no longer drop out of the top dd_brain.top_n gets its note generated
+#     right away. The dd stage later finds it in dd_notes by context hash.
+#
+# Wall time tends to the slowest provider's budget rather than the sum.
+
+# Flush buffered bars / filings into SQLite and features at this many symbols or
+# CIKs, or once the oldest buffered result is this old.
+BAR_BATCH = 250
+FILINGS_BATCH = 100
+FLUSH_S = 2.0
+
+
+class Lane:
+    """
+    Worker threads for one provider. Blocking client calls run here; the
+    client's own token bucket still sets the request rate.
+    """
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = max(int(workers), 1)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"lane-{name}")
+        self.calls = 0
+        self.busy_s = 0.0
+
+    async def call(self, fn: Callable, *args) -> Any:
+        t0 = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+        finally:
+            dt = time.perf_counter() - t0
+            self.calls += 1
+            self.busy_s += dt
+            metrics().observe(f"lane.{self.name}", dt)
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+@dataclass
+class FetchOutput:
+    features: pd.DataFrame                  # latest_features for every universe symbol with bars
+    bars: SyncResult = field(default_factory=SyncResult)
+    filings: FilingsSync = field(default_factory=FilingsSync)
+    dd_notes: dict[str, str] = field(default_factory=dict)     # symbol -> note generated during fetch
+    dd_failures: dict[str, str] = field(default_factory=dict)
+    edgar_skipped: int = 0                  # due CIKs pruned by upper bound (pipeline.tiered)
+    lanes: dict[str, tuple[int, float]] = field(default_factory=dict)  # name -> (calls, busy seconds)
+
+    def __len__(self) -> int:
+        return len(self.features)
+
+
+def _add_write(total: Optional[WriteStats], w: Optional[WriteStats]) -> Optional[WriteStats]:
+    if w is None:
+        return total
+    if total is None:
+        return WriteStats(w.table, w.rows, w.changed, w.wall_s)
+    total.rows += w.rows
+    total.changed += w.changed
+    total.wall_s += w.wall_s
+    return total
+
+
+class FetchOrchestrator:
+    def __init__(self, ctx: RunContext, universe: list[str]):
+        self.ctx = ctx
+        self.con = ctx.con
+        self.cfg = ctx.cfg
+        self.universe = universe
+        self.run_date = ctx.run_date.isoformat()
+        self.start = ctx.run_date - timedelta(days=LOOKBACK_DAYS)
+        self.weights = ScoreWeights.from_config(ctx.cfg)
+        self.out = FetchOutput(features=pd.DataFrame())
+
+        # Per-symbol state, by universe position. value is the symbol's final
+        # score once resolved, otherwise the best it could still reach (inf
+        # before its features are known, -inf when it can't be scored).
+        self.pos = {s: i for i, s in enumerate(universe)}
+        self.sym_order = np.argsort(np.argsort(np.asarray(universe, dtype=str), kind="stable"))
+        self.value = np.full(len(universe), np.inf)
+        self.has_features = np.zeros(len(universe), dtype=bool)
+        self.resolved = np.zeros(len(universe), dtype=bool)
+        self.feature_parts: list[pd.DataFrame] = []
+        self.records: dict[str, dict] = {}
+
+        # EDGAR: due CIKs in a lazy priority heap (re-pushed when their rank changes).
+        self.ciks: dict[str, str] = {}
+        self.new_filings: list[pd.DataFrame] = []
+        self.cik_symbols: dict[str, list[str]] = {}
+        self.cik_rank: dict[str, float] = {}
+        self.heap: list[tuple[float, int, str]] = []
+        self.seq = itertools.count()
+        self.cik_started: set[str] = set()
+        self.cik_waiting: set[str] = set()     # due CIKs whose result isn't stored yet
+        self.ciks_left = 0                     # due CIKs not yet fetched, failed or pruned
+
+        # Tiered: due CIKs stay out of the heap until every symbol has a bound.
+        self.tiered = tiered(ctx.cfg)
+        self.min_score = min_score(ctx.cfg)
+        self.cik_unranked: set[str] = set()
+        self.cik_ranked = asyncio.Event()
+
+        # DD speculation
+        self.dd = bool(getattr(ctx.args, "dd", False))
+        self.top_n = int(cfg_get(ctx.cfg, "dd_brain.top_n", 10))
+        self.model = os.getenv("OPENAI_MODEL", "gpt-5.2")
+        self.dd_submitted: set[str] = set()
+        self.dd_tasks: list[asyncio.Task] = []
+
+    # -- EDGAR ranking ---------------------------------------------------------
+
+    def _rank(self, cik10: str, rank: float) -> None:
+        if cik10 in self.cik_started or self.cik_rank.get(cik10) == rank:
+            return
+        self.cik_rank[cik10] = rank
+        heapq.heappush(self.heap, (rank, next(self.seq), cik10))
+
+    def _decide(self, cik10: str) -> None:
+        """
+        Tiered: queue an unranked CIK by its best bound once all its symbols have
+        one, or drop it when that bound is below min_score.
+        """
+        idx = [self.pos[s] for s in self.cik_symbols[cik10]]
+        if not all(self.has_features[i] or self.resolved[i] for i in idx):
+            return
+        self.cik_unranked.discard(cik10)
+        best = float(self.value[idx].max())
+        if best >= self.min_score:
+            self._rank(cik10, -best)
+        else:
+            self.cik_waiting.discard(cik10)
+            self.ciks_left -= 1
+            self.out.edgar_skipped += 1
+        self.cik_ranked.set()
+
+    def _next_cik(self) -> Optional[str]:
+        while self.heap:
+            rank, _, cik10 = heapq.heappop(self.heap)
+            if cik10 in self.cik_started or rank != self.cik_rank.get(cik10):
+                continue
+            self.cik_started.add(cik10)
+            return cik10
+        return None
+
+    # -- batches ------------------------------------------------------------------
+
+    async def _features(self, symbols: list[str], cpu: Lane) -> None:
+        """
+        Features for `symbols` from stored bars; updates their upper bounds and
+        the rank of their CIKs.
+        """
+        bars = load_bar_columns(self.con, symbols, self.start.isoformat(), self.run_date)
+        if len(bars):
+            self._bounds(symbols, await cpu.call(latest_features, bars))
+        else:
+            for s in symbols:
+                self.value[self.pos[s]] = -np.inf
+                self.resolved[self.pos[s]] = True
+        for cik10 in {self.ciks[s] for s in symbols if self.ciks.get(s) in self.cik_unranked}:
+            self._decide(cik10)
+
+    def _bounds(self, symbols: list[str], feats: pd.DataFrame) -> None:
+        self.feature_parts.append(feats)
+        idx = np.array([self.pos[s] for s in feats.index], dtype=np.int64)
+        self.has_features[idx] = True
+
+        for s in symbols:
+            if s not in feats.index:
+                self.value[self.pos[s]] = -np.inf
+                self.resolved[self.pos[s]] = True
+        self.value[idx] = -np.inf
+        eligible = eligible_features(feats, list(feats.index), self.cfg)
+        if not eligible.empty:
+            ub = score_upper_bound(eligible[SCORE_FEATURES], build_gates(eligible, self.cfg), self.weights)
+            self.value[[self.pos[s] for s in eligible.index]] = ub
+            for s, u in zip(eligible.index, ub):
+                cik10 = self.ciks.get(s)
+                if cik10 is not None and cik10 in self.cik_waiting and cik10 not in self.cik_unranked:
+                    self._rank(cik10, -float(u))
+        # Not eligible: nothing more to learn for them.
+        self.resolved[[self.pos[s] for s in feats.index if s not in eligible.index]] = True
+
+    def _store_filings(self, synced: list[str], rows: list[tuple]) -> None:
+        new, write = store_filing_rows(self.con, synced, rows)
+        if len(new):
+            self.new_filings.append(new)
+        self.out.filings.write = _add_write(self.out.filings.write, write)
+
+    def _resolve(self, openai: Lane) -> None:
+        """
+        Score symbols whose bars and filings are both in, then start DD notes for
+        those certain to make the top N. Only needed for DD; stage_score scores
+        everything afterwards either way.
+        """
+        if not self.dd:
+            return
+        pending_cik = {s for c in self.cik_waiting for s in self.cik_symbols.get(c, [])}
+        ready = [s for s, i in self.pos.items()
+                 if self.has_features[i] and not self.resolved[i] and s not in pending_cik]
+        if ready:
+            feats = pd.concat([f.loc[f.index.intersection(ready)] for f in self.feature_parts])
+            eligible = eligible_features(feats, ready, self.cfg)
+            for rec in score_records(eligible, self.cfg, self.con, self.run_date, only_rows_symbols=True):
+                self.records[rec["symbol"]] = rec
+                self.value[self.pos[rec["symbol"]]] = rec["score_total"]
+            self.resolved[[self.pos[s] for s in ready]] = True
+
+        # stage_score ranks by (score desc, symbol asc). A symbol is in the top
+        # N for sure once fewer than N others can still rank ahead of it.
+        ordered = np.sort(self.value)
+        for sym, rec in self.records.items():
+            if sym in self.dd_submitted or (self.tiered and rec["score_total"] < self.min_score):
+                continue
+            v = rec["score_total"]
+            if len(ordered) - np.searchsorted(ordered, v, side="right") >= self.top_n:
+                continue
+            ahead = np.count_nonzero((self.value > v) | ((self.value == v) & (self.sym_order < self.sym_order[self.pos[sym]])))
+            if ahead < self.top_n:
+                self.dd_submitted.add(sym)
+                self.dd_tasks.append(asyncio.ensure_future(self._dd_note(rec, openai)))
+
+    async def _dd_note(self, rec: dict, openai: Lane) -> None:
+        ctx = dd_context(rec, self.run_date)
+        h = sha256_json(ctx)
+        if cached_note(self.con, h, self.model) is not None:
+            return
+        retries = int(cfg_get(self.cfg, "dd_brain.max_retries", 3))
+        try:
+            note = await openai.call(dd_note_from_context, ctx, self.model, retries)
+        except Exception as e:
+            self.out.dd_failures[rec["symbol"]] = f"{type(e).__name__}: {e}"
+            return
+        store_note(self.con, ctx, self.model, note, h)
+        self.con.commit()
+        self.out.dd_notes[rec["symbol"]] = note
+
+    # -- main loop ------------------------------------------------------------------
+
+    async def run(self) -> FetchOutput:
+        ctx, cfg = self.ctx, self.cfg
+        tiingo_client, edgar_client = _tiingo(ctx), _edgar(ctx)
+
+        jobs, gaps = sync_jobs(
+            self.con, self.universe, self.start, ctx.run_date,
+            repair_gaps=ctx.args.repair_gaps, full=(ctx.args.sync == "full"),
+        )
+        self.out.bars = SyncResult(requested=len(jobs), up_to_date=len(self.universe) - len(jobs), gaps=gaps)
+
+        self.ciks = universe_ciks(ctx, self.universe)
+        for s, c in self.ciks.items():
+            self.cik_symbols.setdefault(c, []).append(s)
+        due = due_ciks(self.con, self.ciks.values(),
+                       float(cfg_get(cfg, "edgar.filings_refresh_hours", 12)))
+        self.out.filings = FilingsSync(requested=len(self.cik_symbols), fresh=len(self.cik_symbols) - len(due))
+        self.cik_waiting = set(due)
+        self.ciks_left = len(due)
+        if self.tiered:
+            self.cik_unranked = set(due)
+        else:
+            for c in due:
+                self._rank(c, 0.0)
+
+        tiingo = Lane("tiingo", tiingo_client.max_workers)
+        edgar = Lane("edgar", int(cfg_get(cfg, "edgar.max_workers", 4)))
+        openai = Lane("openai", int(cfg_get(cfg, "dd_brain.max_workers", 4)))
+        cpu = Lane("cpu", 1)
+        results: asyncio.Queue = asyncio.Queue()
+        queue = deque(jobs)
+
+        async def tiingo_worker() -> None:
+            while queue:
+                sym, a, b = queue.popleft()
+                try:
+                    cols = await tiingo.call(tiingo_client.fetch_symbol, sym, a, b)
+                except Exception as e:
+                    results.put_nowait(("bars_failed", sym, f"{type(e).__name__}: {e}"))
+                else:
+                    results.put_nowait(("bars", sym, cols))
+
+        async def edgar_worker() -> None:
+            while True:
+                cik10 = self._next_cik()
+                if cik10 is None:
+                    if not self.cik_unranked:
+                        return
+                    self.cik_ranked.clear()
+                    await self.cik_ranked.wait()
+                    continue
+                try:
+                    rows = await edgar.call(fetch_filing_rows, edgar_client, cik10)
+                except Exception as e:
+                    results.put_nowait(("filings_failed", cik10, f"{type(e).__name__}: {e}"))
+                else:
+                    results.put_nowait(("filings", cik10, rows))
+
+        workers = [asyncio.ensure_future(tiingo_worker()) for _ in range(min(tiingo.workers, len(jobs)))]
+        workers += [asyncio.ensure_future(edgar_worker()) for _ in range(min(edgar.workers, len(due)))]
+        try:
+            # Symbols whose stored bars are already current are ready now.
+            fetching = {s for s, _, _ in jobs}
+            ready = [s for s in self.universe if s not in fetching]
+            for i in range(0, len(ready), BAR_BATCH):
+                await self._features(ready[i:i + BAR_BATCH], cpu)
+
+            bars_left = len(jobs)
+            bar_parts: list[BarColumns] = []
+            bar_syms: list[str] = []
+            fetched_parts: list[BarColumns] = []
+            synced: list[str] = []
+            filing_rows: list[tuple] = []
+            bars_since = filings_since = time.monotonic()
+            while bars_left or self.ciks_left:
+                got = [await results.get()]
+                while not results.empty():
+                    got.append(results.get_nowait())
+                for kind, key, val in got:
+                    if kind in ("bars", "bars_failed"):
+                        bars_left -= 1
+                        if not bar_syms:
+                            bars_since = time.monotonic()
+                        bar_syms.append(key)
+                        if kind == "bars":
+                            bar_parts.append(val)
+                        else:
+                            self.out.bars.failures[key] = val
+                    else:
+                        self.ciks_left -= 1
+                        if not synced and not filing_rows:
+                            filings_since = time.monotonic()
+                        if kind == "filings":
+                            synced.append(key)
+                            filing_rows.extend(val)
+                        else:
+                            self.out.filings.failures[key] = val
+                            self.cik_waiting.discard(key)
+
+                now = time.monotonic()
+                flushed = False
+                if bar_syms and (len(bar_syms) >= BAR_BATCH or not bars_left or now - bars_since >= FLUSH_S):
+                    batch = concat_bars(bar_parts)
+                    if len(batch):
+                        self.out.bars.write = _add_write(self.out.bars.write, write_bars(self.con, batch))
+                        fetched_parts.append(batch)
+                    syms, bar_syms, bar_parts = bar_syms, [], []
+                    await self._features(syms, cpu)
+                    flushed = True
+                if synced and (len(synced) >= FILINGS_BATCH or not self.ciks_left or now - filings_since >= FLUSH_S):
+                    self._store_filings(synced, filing_rows)
+                    self.out.filings.fetched += len(synced)
+                    self.cik_waiting.difference_update(synced)
+                    synced, filing_rows = [], []
+                    flushed = True
+                if flushed or not (bars_left or self.ciks_left):
+                    self._resolve(openai)
+
+            if self.dd_tasks:
+                await asyncio.gather(*self.dd_tasks)
+            store = _bar_store(ctx)
+            if store is not None and fetched_parts:
+                store.append(concat_bars(fetched_parts))
+        finally:
+            for w in workers:
+                w.cancel()
+            for lane in (tiingo, edgar, openai, cpu):
+                lane.close()
+                self.out.lanes[lane.name] = (lane.calls, lane.busy_s)
+
+        self.out.bars.rows_written = self.out.bars.write.rows if self.out.bars.write else 0
+        self.out.filings.new = (pd.concat(self.new_filings, ignore_index=True) if self.new_filings
+                                else pd.DataFrame(columns=list(WRITE_SPECS["filings"].columns)))
+        self.out.features = pd.concat(self.feature_parts) if self.feature_parts else pd.DataFrame()
+        return self.out
+
+
+def stage_fetch(ctx: RunContext, out: dict) -> FetchOutput:
+    """
+    Bars, filings and features for the universe in one overlapped pass (see
+    module comment). Same storage effects as fetch_bars + fetch_filings.
+    """
+    universe = out["universe"]
+    res = asyncio.run(FetchOrchestrator(ctx, universe).run())
+
+    b, f = res.bars, res.filings
+    print(f"Bars: fetched {b.requested} symbols ({b.up_to_date} already current), wrote {b.rows_written} rows")
+    if b.write is not None:
+        print(f"  {b.write}")
+    if b.gaps:
+        print(f"Repaired gaps for {len(b.gaps)} symbols")
+    if b.failures:
+        print(f"Tiingo fetch failed for {len(b.failures)}/{len(universe)} symbols:")
+        for sym, err in sorted(b.failures.items()):
+            print(f"  {sym}: {err}")
+    print(f"Filings: {f.fetched} companies pulled ({f.fresh} already current), {len(f.new)} new filings")
+    if res.edgar_skipped:
+        print(f"Tiered: EDGAR skipped for {res.edgar_skipped} companies that can't reach {min_score(ctx.cfg):g}")
+        metrics().incr("prune.edgar_companies", res.edgar_skipped)
+    if f.failures:
+        print(f"EDGAR submissions failed for {len(f.failures)}/{f.requested - f.fresh} companies")
+    if res.dd_notes or res.dd_failures:
+        print(f"DD notes started early: {len(res.dd_notes)} generated, {len(res.dd_failures)} failed")
+    print("Lanes: " + ", ".join(f"{name} {calls} calls / {busy:.1f}s" for name, (calls, busy) in res.lanes.items()))
+
+    if res.features.empty:
+        raise StopRun("No bars returned. Check symbols and Tiingo key.")
+    return res
+
+
+def stage_fetched_features(ctx: RunContext, out: dict) -> pd.DataFrame:
+    return out["fetch"].features
+
+
+_BY_NAME = {s.name: s for s in STAGES}
+
+ASYNC_STAGES = [
+    _BY_NAME["universe"],
+    Stage("fetch", stage_fetch),
+    Stage("features", stage_fetched_features),
+    *(_BY_NAME[n] for n in ("score", "signals", "dd", "report")),
+]
+
+
+def stages_for(cfg: dict) -> list[Stage]:
+    """
+    pipeline.mode: async (default) overlaps fetching in one stage; staged runs
+    fetch_bars, features and fetch_filings one after another.
+    """
+    mode = str(cfg_get(cfg, "pipeline.mode", "async"))
+    if mode not in ("async", "staged"):
+        raise RuntimeError(f"Unknown pipeline.mode {mode!r}; expected 'async' or 'staged'")
+    return ASYNC_STAGES if mode == "async" else STAGES
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from scanner.features.panel import SCORE_FEATURES, compute_panel
+from scanner.scoring.scorecard import COMPONENTS, ScoreWeights, score_batch
+from scanner.storage.columnar import BarStore, load_bars
+from scanner.storage.db import WriteStats, bulk_pragmas, bulk_write_frame, in_chunks
+from scanner.universe.builder import UniverseFilter
+
+from .eod import LOOKBACK_DAYS, MIN_BARS, build_gates, signal_rows
+
+# Multi-date replay over stored bars. daily_bars is read once for
+# [start - LOOKBACK_DAYS, end]; features for every (symbol, date) come from one
+# compute_panel pass with each row masked to the bars inside its own trailing
+# LOOKBACK_DAYS window, so a replayed date scores exactly like a single-date run
+# on that date. Nothing is fetched.
+
+
+@dataclass
+class ReplayResult:
+    dates: int
+    scored: int
+    signals: int
+    wall_s: float
+    writes: list[WriteStats] = field(default_factory=list)
+
+
+def window_avail(symbols: np.ndarray, dates: np.ndarray, days: int = LOOKBACK_DAYS) -> np.ndarray:
+    """
+    Per-row count of the symbol's bars with date in [date - days, date].
+    symbols/dates must be sorted by (symbol, date); dates are ISO strings.
+    """
+    codes = pd.factorize(symbols)[0].astype(np.int64)
+    ordinals = pd.to_datetime(dates).to_numpy().astype("datetime64[D]").astype(np.int64)
+    # One sorted key per row, so the window start is a single searchsorted.
+    span = int(ordinals.max() - ordinals.min()) + days + 1 if len(ordinals) else 1
+    keys = codes * span + (ordinals - (ordinals.min() if len(ordinals) else 0))
+    first = np.searchsorted(keys, keys - days, side="left")
+    return np.arange(len(keys), dtype=np.int64) - first + 1
+
+
+def replay_panel(bars: pd.DataFrame, start: date, end: date, flt: Optional[UniverseFilter] = None) -> pd.DataFrame:
+    """
+    Features for every (symbol, date) in [start, end] with at least MIN_BARS bars
+    in its lookback window; bars must reach back LOOKBACK_DAYS before start.
+    flt drops rows outside the universe price / dollar-volume filter, as the
+    nightly score stage does (exchange membership isn't re-checked).
+    """
+    df = bars.sort_values(["symbol", "date"], kind="stable").reset_index(drop=True)
+    avail = window_avail(df["symbol"].to_numpy(), df["date"].to_numpy())
+    panel = compute_panel(df, avail)
+
+    d = panel["date"]
+    keep = (d >= start.isoformat()) & (d <= end.isoformat()) & (panel["n_bars"] >= MIN_BARS)
+    if flt is not None:
+        keep &= flt.passes(panel["close"].to_numpy(), panel["adv_20d"].to_numpy())
+    return panel[keep].reset_index(drop=True)
+
+
+def replay_scores(
+    bars: pd.DataFrame,
+    cfg: dict,
+    start: date,
+    end: date,
+    con: Optional[sqlite3.Connection] = None,
+) -> pd.DataFrame:
+    """
+    Score rows for every stored (symbol, date) in [start, end] with enough history.
+    Filing gates come from `con` as of each row's date (see build_gates).
+    Columns: symbol, date, score_total, setup_class, components_json.
+    """
+    panel = replay_panel(bars, start, end, UniverseFilter.from_config(cfg))
+    if panel.empty:
+        return pd.DataFrame(columns=["symbol", "date", "score_total", "setup_class", "components_json"])
+
+    weights = ScoreWeights.from_config(cfg)
+    scores = score_batch(panel[SCORE_FEATURES], build_gates(panel, cfg, con), weights)
+
+    comps = scores[COMPONENTS].astype(float).to_dict(orient="records")
+    return pd.DataFrame({
+        "symbol": panel["symbol"].to_numpy(),
+        "date": panel["date"].to_numpy(),
+        "score_total": scores["total"].astype(float).to_numpy(),
+        "setup_class": scores["setup_class"].to_numpy(),
+        "components_json": [json.dumps(c, sort_keys=True) for c in comps],
+    })
+
+
+def _scoped_delete(con: sqlite3.Connection, table: str, symbols: Optional[list[str]], start: str, end: str) -> None:
+    sql = f"DELETE FROM {table} WHERE date >= ? AND date <= ?"
+    if symbols is None:
+        con.execute(sql, (start, end))
+        return
+    for part in in_chunks(symbols):
+        con.execute(sql + f" AND symbol IN ({','.join('?' * len(part))})", (start, end, *part))
+
+
+def replay(
+    con: sqlite3.Connection,
+    cfg: dict,
+    start: date,
+    end: date,
+    symbols: Optional[list[str]] = None,
+    store: Optional[BarStore] = None,
+) -> ReplayResult:
+    """
+    Rebuild scores_daily and signals for [start, end] from daily_bars.
+    symbols=None replays every stored symbol. Bars come from `store` when given.
+    Existing rows in the range are deleted first, so rows that no longer
+    qualify are dropped, then the new ones are bulk-written, all in one transaction.
+
+    A symbol is scored on the dates it has a bar; days it didn't trade are not
+    carried forward from its previous bar.
+    """
+    if end < start:
+        raise RuntimeError(f"--end {end} is before --start {start}")
+    t0 = time.perf_counter()
+    bars = load_bars(con, symbols, (start - timedelta(days=LOOKBACK_DAYS)).isoformat(), end.isoformat(), store)
+    if bars.empty:
+        raise RuntimeError(f"No stored bars between {start} and {end}; sync daily_bars first.")
+
+    scores = replay_scores(bars, cfg, start, end, con)
+    sigs = signal_rows(scores, cfg)
+
+    # Delete and rewrite in one transaction: a failed replay leaves the old rows.
+    con.commit()
+    bulk_pragmas(con)
+    with con:
+        _scoped_delete(con, "scores_daily", symbols, start.isoformat(), end.isoformat())
+        _scoped_delete(con, "signals", symbols, start.isoformat(), end.isoformat())
+        writes = [bulk_write_frame(con, "scores_daily", scores, commit=False),
+                  bulk_write_frame(con, "signals", sigs, commit=False)]
+    return ReplayResult(
+        dates=int(scores["date"].nunique()),
+        scored=len(scores),
+        signals=len(sigs),
+        wall_s=time.perf_counter() - t0,
+        writes=writes,
+    )
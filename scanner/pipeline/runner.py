@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import pickle
+import sqlite3
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from scanner.utils.metrics import flush_stage, metrics
+from scanner.utils.profiling import profiled
+
+# Generic staged-run machinery. A run is keyed by (run date, config hash); every
+# stage's output is pickled under data/runs/<run_id>/ and recorded in run_stages,
+# so a rerun of the same run_id picks up where the last one stopped. Metrics
+# recorded while a stage runs (HTTP, throttling, cache, storage) go to run_metrics.
+
+RUNS_DIR = Path("data/runs")
+
+
+class StopRun(Exception):
+    """
+    Raised by a stage to end the run early (e.g. no bars, no candidates).
+    The stage is recorded as stopped, not done, so a rerun retries it.
+    """
+
+
+@dataclass
+class RunContext:
+    run_id: str
+    run_date: date
+    cfg: dict
+    cfg_hash: str
+    con: sqlite3.Connection
+    args: Any
+    workdir: Path
+    outdir: Path
+    # Lazily-built shared objects (API clients etc.) stages can stash here.
+    cache: dict = field(default_factory=dict)
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable[[RunContext, dict], Any]
+    # Disabled stages don't run and aren't checkpointed (e.g. dd without --dd).
+    enabled: Callable[[RunContext], bool] = lambda ctx: True
+    # checkpoint=False always reruns (cheap stages that write files).
+    checkpoint: bool = True
+
+
+@dataclass
+class StageReport:
+    name: str
+    status: str  # done | resumed | skipped | stopped | failed
+    wall_s: float = 0.0
+    rows: Optional[int] = None
+
+
+def make_run_id(run_date: date, cfg_hash: str) -> str:
+    return f"{run_date.isoformat()}_{cfg_hash[:12]}"
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5)
+    except Exception:
+        return None
+    return out.stdout.strip() or None
+
+
+def start_run(con: sqlite3.Connection, run_id: str, cfg_hash: str) -> None:
+    con.execute(
+        "INSERT OR IGNORE INTO runs (run_id, started_at, git_commit, config_hash) VALUES (?,?,?,?)",
+        (run_id, datetime.now().isoformat(timespec="seconds"), _git_commit(), cfg_hash),
+    )
+    con.commit()
+
+
+def _count_rows(out: Any) -> Optional[int]:
+    try:
+        return len(out)
+    except TypeError:
+        return None
+
+
+class StageRunner:
+    def __init__(
+        self,
+        ctx: RunContext,
+        stages: list[Stage],
+        force: bool = False,
+        from_stage: Optional[str] = None,
+        profile_dir: Optional[Path] = None,
+    ):
+        names = [s.name for s in stages]
+        if from_stage is not None and from_stage not in names:
+            raise RuntimeError(f"Unknown stage {from_stage!r}; expected one of {names}")
+        self.ctx = ctx
+        self.stages = stages
+        self.force = force
+        self.from_stage = from_stage
+        # When set, each executed stage runs under cProfile + tracemalloc (utils/profiling.py).
+        self.profile_dir = profile_dir
+        self.reports: list[StageReport] = []
+
+    def _completed(self, stage: Stage) -> Optional[Path]:
+        row = self.ctx.con.execute(
+            "SELECT artifact FROM run_stages WHERE run_id = ? AND stage = ? AND status = 'done'",
+            (self.ctx.run_id, stage.name),
+        ).fetchone()
+        if row and row[0] and Path(row[0]).exists():
+            return Path(row[0])
+        return None
+
+    def _record(self, stage: Stage, status: str, started: str, wall_s: float,
+                rows: Optional[int], artifact: Optional[Path], error: Optional[str] = None) -> None:
+        self.ctx.con.execute(
+            """
+            INSERT OR REPLACE INTO run_stages (run_id, stage, status, started_at, wall_s, rows_out, artifact, error)
+            VALUES (?,?,?,?,?,?,?,?)
+            """,
+            (self.ctx.run_id, stage.name, status, started, wall_s, rows,
+             str(artifact) if artifact else None, error),
+        )
+        self.ctx.con.commit()
+
+    def _call(self, stage: Stage, outputs: dict[str, Any]) -> Any:
+        m = metrics()
+        m.stage = stage.name
+        try:
+            if self.profile_dir is None:
+                return stage.fn(self.ctx, outputs)
+            with profiled(stage.name, self.profile_dir):
+                return stage.fn(self.ctx, outputs)
+        finally:
+            m.stage = ""
+            flush_stage(self.ctx.con, self.ctx.run_id, stage.name)
+
+    def run(self) -> dict[str, Any]:
+        outputs: dict[str, Any] = {}
+        self.ctx.workdir.mkdir(parents=True, exist_ok=True)
+        forcing = self.force
+        for stage in self.stages:
+            if stage.name == self.from_stage:
+                forcing = True
+
+            if not stage.enabled(self.ctx):
+                outputs[stage.name] = None
+                self.reports.append(StageReport(stage.name, "skipped"))
+                continue
+
+            done = None if (forcing or not stage.checkpoint) else self._completed(stage)
+            if done is not None:
+                with done.open("rb") as f:
+                    outputs[stage.name] = pickle.load(f)
+                self.reports.append(StageReport(stage.name, "resumed", rows=_count_rows(outputs[stage.name])))
+                continue
+
+            started = datetime.now().isoformat(timespec="seconds")
+            t0 = time.perf_counter()
+            try:
+                out = self._call(stage, outputs)
+            except Exception as e:
+                wall = time.perf_counter() - t0
+                status = "stopped" if isinstance(e, StopRun) else "failed"
+                self._record(stage, status, started, wall, None, None, f"{type(e).__name__}: {e}")
+                self.reports.append(StageReport(stage.name, status, wall))
+                raise
+            wall = time.perf_counter() - t0
+
+            artifact = None
+            if stage.checkpoint:
+                artifact = self.ctx.workdir / f"{stage.name}.pkl"
+                with artifact.open("wb") as f:
+                    pickle.dump(out, f, protocol=pickle.HIGHEST_PROTOCOL)
+            rows = _count_rows(out)
+            self._record(stage, "done", started, wall, rows, artifact)
+            self.reports.append(StageReport(stage.name, "done", wall, rows))
+            outputs[stage.name] = out
+            # Fresh output upstream invalidates anything checkpointed downstream.
+            forcing = forcing or stage.checkpoint
+        return outputs
+
+    def summary(self) -> str:
+        lines = [f"Run {self.ctx.run_id}"]
+        for r in self.reports:
+            rows = "" if r.rows is None else f" rows={r.rows}"
+            lines.append(f"  {r.name:<14} {r.status:<8} {r.wall_s:7.2f}s{rows}")
+        return "\n".join(lines)
@@ -1,17 +1,51 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from typing import Dict, Tuple
 
+import numpy as np
+import pandas as pd
+
 @dataclass
 class ScoreResult:
     total: float
     setup_class: str
     components: dict
 
-def score_candidate(features: dict, gates: dict) -> ScoreResult:
+@dataclass(frozen=True)
+class ScoreWeights:
+    liquidity: float = 25.0
+    momentum_accel: float = 25.0
+    momentum_positive: float = 15.0
+    volume_strong: float = 20.0
+    volume_strong_ratio: float = 2.0
+    volume_moderate: float = 12.0
+    volume_moderate_ratio: float = 1.5
+    dilution_penalty: float = -20.0
+    sec_current: float = 10.0
+    sec_stale: float = -50.0
+    setup_bonus: float = 10.0
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> "ScoreWeights":
+        """
+        Overrides from the `scoring:` section of config.yaml; unknown keys are rejected.
+        """
+        section = cfg.get("scoring", {}) or {}
+        known = {f.name for f in fields(cls)}
+        unknown = set(section) - known
+        if unknown:
+            raise RuntimeError(f"Unknown scoring keys in config: {sorted(unknown)}")
+        return cls(**{k: float(v) for k, v in section.items()})
+
+DEFAULT_WEIGHTS = ScoreWeights()
+
+COMPONENTS = ["liquidity", "momentum", "volume", "dilution_penalty", "sec_filer", "setup_bonus"]
+
+def score_candidate(features: dict, gates: dict, weights: ScoreWeights = DEFAULT_WEIGHTS) -> ScoreResult:
     # Deterministic, auditable scoring.
     # features: momentum, volume, liquidity, edgar flags, earnings window flags
     # gates: pass/fail gates and reasons
+    w = weights
 
     comps: Dict[str, float] = {}
     total = 0.0
@@ -19,7 +53,7 @@ def score_candidate(features: dict, gates: dict) -> ScoreResult:
     # Liquidity weight
     liq = 0.0
     if gates.get("liquidity_ok"):
-        liq = 25.0
+        liq = w.liquidity
     comps["liquidity"] = liq
     total += liq
 
@@ -30,49 +64,136 @@ def score_candidate(features: dict, gates: dict) -> ScoreResult:
     r20 = features.get("ret_20d")
     accel = features.get("accel")
     if isinstance(accel, bool) and accel and r5 and r10 and r20:
-        mom = 25.0
+        mom = w.momentum_accel
     elif r5 is not None and r5 > 0:
-        mom = 15.0
+        mom = w.momentum_positive
     comps["momentum"] = mom
     total += mom
 
     # Volume confirmation
     vol = 0.0
     vr = features.get("dvol_ratio_5_30")
-    if vr is not None and vr == vr and vr >= 2.0:
-        vol = 20.0
-    elif vr is not None and vr == vr and vr >= 1.5:
-        vol = 12.0
+    if vr is not None and vr == vr and vr >= w.volume_strong_ratio:
+        vol = w.volume_strong
+    elif vr is not None and vr == vr and vr >= w.volume_moderate_ratio:
+        vol = w.volume_moderate
     comps["volume"] = vol
     total += vol
 
     # Dilution penalty
     dil = 0.0
     if gates.get("recent_dilution_risk"):
-        dil = -20.0
+        dil = w.dilution_penalty
     comps["dilution_penalty"] = dil
     total += dil
 
     # Filings freshness
     sec = 0.0
     if gates.get("sec_current"):
-        sec = 10.0
+        sec = w.sec_current
     else:
-        sec = -50.0
+        sec = w.sec_stale
     comps["sec_filer"] = sec
     total += sec
 
     # Setup classification
     if gates.get("earnings_anticipation_window"):
         setup = "earnings_anticipation"
-        total += 10.0
-        comps["setup_bonus"] = 10.0
+        total += w.setup_bonus
+        comps["setup_bonus"] = w.setup_bonus
     elif gates.get("post_earnings_window"):
         setup = "post_earnings_continuation"
-        total += 10.0
-        comps["setup_bonus"] = 10.0
+        total += w.setup_bonus
+        comps["setup_bonus"] = w.setup_bonus
     else:
         setup = "none"
         comps["setup_bonus"] = 0.0
 
     return ScoreResult(total=total, setup_class=setup, components=comps)
+
+def _gate(gates: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in gates.columns:
+        return np.zeros(len(gates), dtype=bool)
+    col = gates[name]
+    if col.dtype == object:
+        return np.fromiter((bool(x) for x in col), dtype=bool, count=len(col))
+    return col.fillna(False).astype(bool).to_numpy()
+
+def _feature(features: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in features.columns:
+        return np.full(len(features), np.nan)
+    return pd.to_numeric(features[name], errors="coerce").astype(float).to_numpy()
+
+def score_batch(features: pd.DataFrame, gates: pd.DataFrame, weights: ScoreWeights = DEFAULT_WEIGHTS) -> pd.DataFrame:
+    """
+    Columnar score_candidate. Row i of the result equals
+    score_candidate(features.iloc[i].to_dict(), gates.iloc[i].to_dict(), weights)
+    (same components, same addition order, so totals are bit-identical).
+
+    Returns a frame on features.index with one column per component plus
+    total and setup_class.
+    """
+    w = weights
+    n = len(features)
+
+    liq = np.where(_gate(gates, "liquidity_ok"), w.liquidity, 0.0)
+
+    r5 = _feature(features, "ret_5d")
+    r10 = _feature(features, "ret_10d")
+    r20 = _feature(features, "ret_20d")
+    # Only a real Python bool accel earns the bonus (see score_candidate);
+    # NaN is truthy there, so "r and ..." is just r != 0.
+    if "accel" in features.columns and features["accel"].dtype == object:
+        accel = np.fromiter((isinstance(a, bool) and a for a in features["accel"]), dtype=bool, count=n)
+    elif "accel" in features.columns and features["accel"].dtype == bool:
+        accel = features["accel"].to_numpy()
+    else:
+        accel = np.zeros(n, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        accel_ok = accel & (r5 != 0) & (r10 != 0) & (r20 != 0)
+        mom = np.where(accel_ok, w.momentum_accel, np.where(r5 > 0, w.momentum_positive, 0.0))
+
+        vr = _feature(features, "dvol_ratio_5_30")
+        vol = np.where(vr >= w.volume_strong_ratio, w.volume_strong,
+                       np.where(vr >= w.volume_moderate_ratio, w.volume_moderate, 0.0))
+
+    dil = np.where(_gate(gates, "recent_dilution_risk"), w.dilution_penalty, 0.0)
+    sec = np.where(_gate(gates, "sec_current"), w.sec_current, w.sec_stale)
+
+    ea = _gate(gates, "earnings_anticipation_window")
+    pe = _gate(gates, "post_earnings_window")
+    bonus = np.where(ea | pe, w.setup_bonus, 0.0)
+    setup = np.where(ea, "earnings_anticipation", np.where(pe, "post_earnings_continuation", "none"))
+
+    total = np.zeros(n)
+    for part in (liq, mom, vol, dil, sec):
+        total = total + part
+    total = np.where(ea | pe, total + w.setup_bonus, total)
+
+    return pd.DataFrame({
+        "liquidity": liq,
+        "momentum": mom,
+        "volume": vol,
+        "dilution_penalty": dil,
+        "sec_filer": sec,
+        "setup_bonus": bonus,
+        "total": total,
+        "setup_class": setup.astype(object),
+    }, index=features.index)
+
+# Gates that come from EDGAR filings; unknown until the company's submissions are in.
+FILING_GATES = ("sec_current", "recent_dilution_risk")
+
+def score_upper_bound(features: pd.DataFrame, gates: pd.DataFrame, weights: ScoreWeights = DEFAULT_WEIGHTS,
+                      unknown: tuple[str, ...] = FILING_GATES) -> np.ndarray:
+    """
+    Highest total score_batch can give each row over every value of the
+    `unknown` gates (the other gates as given). Exact for any weight signs.
+    """
+    best = np.full(len(features), -np.inf)
+    for combo in range(2 ** len(unknown)):
+        g = gates.copy()
+        for bit, name in enumerate(unknown):
+            g[name] = bool(combo >> bit & 1)
+        best = np.maximum(best, score_batch(features, g, weights)["total"].to_numpy())
+    return best
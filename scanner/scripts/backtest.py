@@ -0,0 +1,46 @@
+from __future__ import annotations
+import argparse
+import time
+from dataclasses import replace
+from pathlib import Path
+
+import pandas as pd
+
+from scanner.backtest.engine import BacktestParams, backtest, summarize
+from scanner.storage.columnar import BarStore
+from scanner.storage.db import connect, init_db
+from scanner.utils.config import load_config
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Backtest stored WATCH_ENTER signals against stored daily bars")
+    p.add_argument("--start", type=str, required=True, help="YYYY-MM-DD, first signal date")
+    p.add_argument("--end", type=str, required=True, help="YYYY-MM-DD, last signal date")
+    p.add_argument("--config", type=str, default="config/config.yaml")
+    p.add_argument("--db", type=str, default="data/scanner.sqlite")
+    p.add_argument("--earnings", type=str, default=None,
+                   help="CSV with symbol,date of earnings reports (for avoid_holding_through_earnings)")
+    p.add_argument("--max-hold", type=int, default=None, help="Override backtest.max_hold_days")
+    p.add_argument("--out", type=str, default=None, help="Write per-trade rows to this CSV")
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    con = connect(Path(args.db))
+    init_db(con)
+    cfg = load_config(args.config)
+    params = BacktestParams.from_config(cfg)
+    if args.max_hold is not None:
+        params = replace(params, max_hold_days=args.max_hold)
+    earnings = pd.read_csv(args.earnings, dtype=str) if args.earnings else None
+
+    t0 = time.time()
+    trades = backtest(con, args.start, args.end, params, earnings, store=BarStore.from_config(cfg))
+    print(f"Backtest {args.start}..{args.end} ({time.time() - t0:.2f}s) {params}")
+    for k, v in summarize(trades).items():
+        print(f"  {k:<16} {v:.4f}" if isinstance(v, float) else f"  {k:<16} {v}")
+    if args.out:
+        trades.to_csv(args.out, index=False)
+        print(f"Wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+from __future__ import annotations
+import argparse
+from pathlib import Path
+
+from scanner.storage.columnar import DEFAULT_BAR_DIR, BarStore, check_consistency
+from scanner.storage.db import connect, init_db
+from scanner.utils.config import cfg_get, load_config
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Maintain the columnar (memory-mapped) copy of daily_bars")
+    p.add_argument("command", choices=["rebuild", "compact", "check"],
+                   help="rebuild: copy daily_bars into the store. compact: fold pending segments into base. "
+                        "check: compare the store with daily_bars.")
+    p.add_argument("--config", type=str, default="config/config.yaml")
+    p.add_argument("--db", type=str, default="data/scanner.sqlite")
+    p.add_argument("--dir", type=str, default=None, help="Store directory (default: storage.columnar_dir)")
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    cfg = load_config(args.config)
+    store = BarStore(Path(args.dir or cfg_get(cfg, "storage.columnar_dir", DEFAULT_BAR_DIR)))
+    con = connect(Path(args.db))
+    init_db(con)
+
+    if args.command == "rebuild":
+        st = store.rebuild_from_sqlite(con)
+        print(f"Rebuilt {store.root}: {st.rows} rows, {st.symbols} symbols in {st.wall_s:.1f}s")
+    elif args.command == "compact":
+        st = store.compact()
+        print(f"Compacted {st.segments} segments into {store.root}: {st.rows} rows, {st.symbols} symbols in {st.wall_s:.1f}s")
+    else:
+        rep = check_consistency(store, con)
+        print(f"sqlite rows={rep.rows_sqlite} store rows={rep.rows_store} "
+              f"missing_in_store={rep.missing_in_store} missing_in_sqlite={rep.missing_in_sqlite} "
+              f"mismatched={rep.mismatched}")
+        for sym, d in rep.examples:
+            print(f"  mismatch {sym} {d}")
+        if not rep.ok:
+            raise SystemExit(1)
+        print("OK")
+
+if __name__ == "__main__":
+    main()
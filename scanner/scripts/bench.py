@@ -0,0 +1,74 @@
+from __future__ import annotations
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from scanner.bench.harness import (
+    CASES, RESULT_PREFIX, compare, format_results, results_json, run_child, run_size, save_baseline,
+)
+from scanner.utils.config import load_config
+
+def parse_args():
+    p = argparse.ArgumentParser(description="End-to-end throughput benchmarks against local mock Tiingo/EDGAR/OpenAI servers")
+    p.add_argument("--sizes", type=str, default="100,1000,5000", help="Comma-separated universe sizes")
+    p.add_argument("--cases", type=str, default=",".join(CASES), help=f"Subset of: {', '.join(CASES)}")
+    p.add_argument("--config", type=str, default="config/config.yaml", help="Base config; limits and paths are overridden")
+    p.add_argument("--workdir", type=str, default=None, help="Where databases/caches go (default: a temp dir)")
+    p.add_argument("--latency-ms", type=float, default=20.0, help="Simulated per-request server latency")
+    p.add_argument("--server-rps", type=float, default=None,
+                   help="Per-server request cap; excess requests get 429 + Retry-After")
+    p.add_argument("--dd", action="store_true", help="Include the DD stage (mock OpenAI) in run_eod cases")
+    p.add_argument("--baseline", type=str, default="data/bench/baseline.json")
+    p.add_argument("--save-baseline", action="store_true", help="Write this run's metrics as the new baseline")
+    p.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown vs baseline (0.2 = 20%%)")
+    p.add_argument("--json", type=str, default=None, help="Also write full results to this file")
+    p.add_argument("--verbose", action="store_true", help="Show child process output")
+    p.add_argument("--child", type=str, default=None, help=argparse.SUPPRESS)
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    if args.child:
+        got = run_child(args.child, sizes[0], Path(args.workdir), args.dd)
+        print(RESULT_PREFIX + json.dumps(got), flush=True)
+        return
+
+    cases = tuple(c.strip() for c in args.cases.split(",") if c.strip())
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        raise RuntimeError(f"Unknown bench cases {sorted(unknown)}; expected from {CASES}")
+
+    base_cfg = load_config(args.config)
+    root = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="scanner_bench_"))
+    results = []
+    for n in sizes:
+        print(f"== universe {n} ({root / f'n{n}'})", flush=True)
+        got = run_size(n, root, base_cfg, cases, args.latency_ms, args.server_rps, args.dd, args.verbose)
+        print(format_results(got), flush=True)
+        results.extend(got)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results_json(results), indent=2) + "\n", encoding="utf-8")
+
+    failed = [r.key for r in results if not r.ok]
+    baseline = Path(args.baseline)
+    if args.save_baseline:
+        save_baseline(results, baseline)
+        print(f"Baseline written to {baseline}")
+    elif baseline.exists():
+        regressions = compare(results, json.loads(baseline.read_text(encoding="utf-8")), args.tolerance)
+        print(f"{len(regressions)} regression(s) vs {baseline} (tolerance {args.tolerance:.0%})")
+        for line in regressions:
+            print(f"  {line}")
+        if regressions:
+            sys.exit(1)
+    if failed:
+        print(f"Failed cases: {', '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
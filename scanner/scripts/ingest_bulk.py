@@ -0,0 +1,36 @@
+from __future__ import annotations
+import argparse
+import time
+from pathlib import Path
+
+from scanner.storage.db import connect, init_db
+from scanner.edgar.bulk import ingest_companyfacts_zip, ingest_submissions_zip
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Load SEC bulk companyfacts.zip / submissions.zip into SQLite")
+    p.add_argument("--companyfacts", type=str, default=None, help="Path to a downloaded companyfacts.zip")
+    p.add_argument("--submissions", type=str, default=None, help="Path to a downloaded submissions.zip")
+    p.add_argument("--db", type=str, default="data/scanner.sqlite")
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    if not args.companyfacts and not args.submissions:
+        raise SystemExit("Nothing to do: pass --companyfacts and/or --submissions")
+
+    con = connect(Path(args.db))
+    init_db(con)
+
+    if args.submissions:
+        t0 = time.time()
+        st = ingest_submissions_zip(con, Path(args.submissions))
+        print(f"submissions: {st.companies} companies, {st.rows} new filings in {time.time() - t0:.1f}s")
+
+    if args.companyfacts:
+        t0 = time.time()
+        st = ingest_companyfacts_zip(con, Path(args.companyfacts))
+        print(f"companyfacts: {st.companies} companies ({st.skipped} without tracked tags), "
+              f"{st.rows} facts in {time.time() - t0:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from scanner.edgar.filings import FILING_EVENTS_SQL
+from scanner.storage.db import connect, init_db, schema_version
+from scanner.storage.queries import QUERIES
+
+# Storage read APIs plus the filings query behind the score-stage gates.
+PLANNED = {**QUERIES, "filing_events": FILING_EVENTS_SQL}
+
+def parse_args():
+    p = argparse.ArgumentParser(description="EXPLAIN QUERY PLAN and timings for the storage read APIs")
+    p.add_argument("--db", type=str, default="data/scanner.sqlite")
+    p.add_argument("--repeat", type=int, default=20, help="Timed executions per query")
+    return p.parse_args()
+
+def sample_params(con) -> dict[str, tuple]:
+    """
+    Parameters drawn from the data so timings reflect real selectivity.
+    """
+    def one(sql: str, default: str) -> str:
+        return (con.execute(sql).fetchone() or (None,))[0] or default
+
+    day = one("SELECT MAX(date) FROM daily_bars", "2025-12-31")
+    sym = one("SELECT symbol FROM daily_bars WHERE date = (SELECT MAX(date) FROM daily_bars) LIMIT 1", "AAPL")
+    cik = one("SELECT cik FROM filings LIMIT 1", "0000320193")
+    score_day = one("SELECT MAX(date) FROM scores_daily", day)
+    return {
+        "last_n_bars": (sym, day, 30),
+        "universe_on_date": (day, 0.5, 5.0),
+        "latest_filings": ("10-Q", "2025-01-01"),
+        "latest_filings_cik": (cik, "10-Q", "2000-01-01"),
+        "latest_score_date": (),
+        "top_scores": (score_day, 20),
+        "filing_events": ("2025-01-01", day),
+    }
+
+def main():
+    args = parse_args()
+    con = connect(Path(args.db))
+    init_db(con)
+    con.execute("ANALYZE")
+    print(f"{args.db} schema v{schema_version(con)}")
+
+    params = sample_params(con)
+    full_scans = []
+    for name, sql in PLANNED.items():
+        plan = [r[3] for r in con.execute(f"EXPLAIN QUERY PLAN {sql}", params[name])]
+        times = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            rows = con.execute(sql, params[name]).fetchall()
+            times.append(time.perf_counter() - t0)
+        print(f"\n{name}  rows={len(rows)}  median={statistics.median(times) * 1e3:.3f}ms")
+        for step in plan:
+            print(f"  {step}")
+        if any(step.startswith("SCAN") and "INDEX" not in step for step in plan):
+            full_scans.append(name)
+
+    if full_scans:
+        raise SystemExit(f"\nFull table scans in: {', '.join(full_scans)}")
+    print("\nAll queries use an index.")
+
+if __name__ == "__main__":
+    main()
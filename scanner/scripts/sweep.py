@@ -0,0 +1,57 @@
+from __future__ import annotations
+import argparse
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from scanner.backtest.sweep import grid, rank, sample, sweep
+from scanner.storage.db import connect, init_db
+from scanner.utils.config import load_config
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Sweep scoring weights / thresholds / exits against stored history")
+    p.add_argument("--start", type=str, required=True, help="YYYY-MM-DD")
+    p.add_argument("--end", type=str, required=True, help="YYYY-MM-DD")
+    p.add_argument("--space", type=str, default="config/sweep.yaml", help="YAML mapping of key -> list of values")
+    p.add_argument("--samples", type=int, default=None, help="Random sample of N grid points instead of the full grid")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    p.add_argument("--rank-by", type=str, default="avg_return")
+    p.add_argument("--min-trades", type=int, default=20)
+    p.add_argument("--any-setup", action="store_true",
+                   help="Enter on score alone; by default only earnings setups signal, as in generate_signal")
+    p.add_argument("--earnings", type=str, default=None, help="CSV with symbol,date of earnings reports")
+    p.add_argument("--config", type=str, default="config/config.yaml")
+    p.add_argument("--db", type=str, default="data/scanner.sqlite")
+    p.add_argument("--out", type=str, default=None, help="CSV path. Defaults to outputs/sweep_<start>_<end>.csv")
+    return p.parse_args()
+
+def main():
+    args = parse_args()
+    start = datetime.strptime(args.start, "%Y-%m-%d").date()
+    end = datetime.strptime(args.end, "%Y-%m-%d").date()
+    space = load_config(args.space)
+    if not space:
+        raise SystemExit(f"Empty or missing sweep space: {args.space}")
+    configs = sample(space, args.samples, args.seed) if args.samples else grid(space)
+
+    con = connect(Path(args.db))
+    init_db(con)
+    earnings = pd.read_csv(args.earnings, dtype=str) if args.earnings else None
+
+    t0 = time.time()
+    results = sweep(con, load_config(args.config), start, end, configs,
+                    max_workers=args.workers, require_setup=not args.any_setup, earnings=earnings)
+    ranked = rank(results, by=args.rank_by, min_trades=args.min_trades)
+    print(f"Evaluated {len(configs)} configurations in {time.time() - t0:.1f}s")
+    print(ranked.head(20).to_markdown())
+
+    out = Path(args.out or f"outputs/sweep_{args.start}_{args.end}.csv")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    ranked.to_csv(out)
+    print(f"Wrote {out}")
+
+if __name__ == "__main__":
+    main()
@@ -8,11 +8,11 @@ class Signal:
     signal: str
     rationale: dict
 
-def generate_signal(symbol: str, date: str, score_total: float, setup_class: str, risk: dict) -> list[Signal]:
+def generate_signal(symbol: str, date: str, score_total: float, setup_class: str, risk: dict, min_score: float = 70.0) -> list[Signal]:
     # EOD signal generation. Human approves.
     # This is intentionally conservative for v1.
     signals: list[Signal] = []
-    if setup_class in ("earnings_anticipation", "post_earnings_continuation") and score_total >= 70:
+    if setup_class in ("earnings_anticipation", "post_earnings_continuation") and score_total >= min_score:
         signals.append(Signal(symbol, date, "WATCH_ENTER", {
             "score": score_total,
             "setup": setup_class,
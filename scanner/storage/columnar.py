@@ -0,0 +1,429 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from scanner.utils.config import cfg_get
+from scanner.utils.metrics import metrics
+
+from scanner.storage.db import BULK_CHUNK_ROWS, WriteStats, bulk_write, read_bars
+
+# Optional columnar copy of daily_bars as memory-mapped .npy files.
+#
+#   <root>/base/            compacted: rows sorted by (symbol, date), one .npy per
+#                           column, symbols.json, offsets.npy (row range per symbol)
+#   <root>/segments/<ns>/   append-only batches written during ingestion
+#
+# Reads against a compacted store are slices of the memory maps (no copy for a
+# single contiguous range). Pending segments are merged on read, later writes
+# winning, until `compact` folds them into base. SQLite stays the source of
+# truth; `check_consistency` compares the two.
+
+DEFAULT_BAR_DIR = Path("data/bars")
+
+VALUE_COLUMNS = ("open", "high", "low", "close", "volume", "dollar_volume")
+
+# read_bars bounds covering every stored date
+ALL_DATES = ("0001-01-01", "9999-12-31")
+
+
+def _days(dates) -> np.ndarray:
+    """
+    ISO dates -> int32 days since 1970-01-01.
+    """
+    return pd.to_datetime(pd.Series(dates, dtype=object)).to_numpy().astype("datetime64[D]").astype(np.int32)
+
+
+def _iso(days: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(days.astype("datetime64[D]"), unit="D").astype(object)
+
+
+@dataclass
+class BarColumns:
+    """
+    Bars as parallel arrays. code indexes `symbols` (sorted); day is days since
+    epoch. offsets, when set, means rows are sorted by (code, day) and symbol i
+    owns rows offsets[i]:offsets[i + 1].
+    """
+    symbols: np.ndarray
+    code: np.ndarray
+    day: np.ndarray
+    values: dict[str, np.ndarray] = field(default_factory=dict)
+    offsets: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.code)
+
+    @classmethod
+    def empty(cls) -> "BarColumns":
+        return cls(np.array([], dtype=str), np.array([], dtype=np.int32), np.array([], dtype=np.int32),
+                   {c: np.array([], dtype=np.float64) for c in VALUE_COLUMNS})
+
+    @classmethod
+    def from_frame(cls, bars: pd.DataFrame) -> "BarColumns":
+        """
+        bars: symbol, date (YYYY-MM-DD) plus VALUE_COLUMNS, any order.
+        """
+        if bars is None or bars.empty:
+            return cls.empty()
+        symbols, code = np.unique(bars["symbol"].to_numpy(dtype=str), return_inverse=True)
+        return cls(
+            symbols, code.astype(np.int32), _days(bars["date"]),
+            {c: pd.to_numeric(bars[c], errors="coerce").astype(np.float64).to_numpy() for c in VALUE_COLUMNS},
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Same columns and dtypes as read_bars.
+        """
+        return pd.DataFrame({
+            "symbol": self.symbols[self.code].astype(object) if len(self) else np.array([], dtype=object),
+            "date": _iso(self.day),
+            **{c: np.asarray(self.values[c]) for c in VALUE_COLUMNS},
+        })
+
+    def take(self, idx) -> "BarColumns":
+        return BarColumns(self.symbols, self.code[idx], self.day[idx], {c: v[idx] for c, v in self.values.items()})
+
+    def dates(self) -> np.ndarray:
+        return _iso(np.asarray(self.day))
+
+    def by_symbol(self) -> "BarColumns":
+        """
+        Rows sorted by (symbol, date) with offsets set. Input that is already in
+        that order comes back as views.
+        """
+        if self.offsets is not None:
+            return self
+        code, day = np.asarray(self.code), np.asarray(self.day)
+        step = code[1:] != code[:-1]
+        if np.all(code[1:] >= code[:-1]) and np.all(step | (day[1:] >= day[:-1])):
+            out = BarColumns(self.symbols, self.code, self.day, self.values)
+        else:
+            out = self.take(np.lexsort((day, code)))
+        out.offsets = _offsets(np.asarray(out.code), len(out.symbols))
+        return out
+
+    def symbol_rows(self, i: int) -> "BarColumns":
+        """
+        Views of symbols[i]'s rows; needs offsets (see by_symbol).
+        """
+        return self.take(slice(int(self.offsets[i]), int(self.offsets[i + 1])))
+
+    def last_rows(self) -> np.ndarray:
+        """
+        Row index of each symbol's latest bar, for symbols with rows; needs offsets.
+        """
+        off = np.asarray(self.offsets)
+        return off[1:][off[1:] > off[:-1]] - 1
+
+
+def concat_bars(parts: list[BarColumns]) -> BarColumns:
+    """
+    Rows of every part in order, with codes remapped onto the union of their symbols.
+    """
+    parts = [p for p in parts if len(p)]
+    if not parts:
+        return BarColumns.empty()
+    if len(parts) == 1:
+        p = parts[0]
+        return BarColumns(p.symbols, p.code, p.day, p.values)
+    symbols = np.unique(np.concatenate([p.symbols for p in parts]))
+    return BarColumns(
+        symbols,
+        np.concatenate([np.searchsorted(symbols, p.symbols)[p.code].astype(np.int32) for p in parts]),
+        np.concatenate([p.day for p in parts]),
+        {c: np.concatenate([p.values[c] for p in parts]) for c in VALUE_COLUMNS},
+    )
+
+
+def _merge(parts: list[BarColumns]) -> BarColumns:
+    """
+    Concatenate, sort by (symbol, date) and keep the last-written row per key.
+    """
+    allrows = concat_bars(parts)
+    if not len(allrows):
+        return allrows
+    code, day = np.asarray(allrows.code), np.asarray(allrows.day)
+    # lexsort is stable, so among equal keys the latest part sorts last.
+    order = np.lexsort((day, code))
+    code, day = code[order], day[order]
+    last = np.r_[(code[1:] != code[:-1]) | (day[1:] != day[:-1]), True]
+    order = order[last]
+    return BarColumns(
+        allrows.symbols, code[last], day[last],
+        {c: np.asarray(v)[order] for c, v in allrows.values.items()},
+    )
+
+
+def _offsets(code: np.ndarray, n_symbols: int) -> np.ndarray:
+    return np.searchsorted(code, np.arange(n_symbols + 1), side="left").astype(np.int64)
+
+
+@dataclass
+class CompactStats:
+    segments: int
+    rows: int
+    symbols: int
+    wall_s: float
+
+
+@dataclass
+class ConsistencyReport:
+    rows_sqlite: int
+    rows_store: int
+    missing_in_store: int
+    missing_in_sqlite: int
+    mismatched: int
+    examples: list[tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.missing_in_store == 0 and self.missing_in_sqlite == 0 and self.mismatched == 0
+
+
+class BarStore:
+    def __init__(self, root: Path = DEFAULT_BAR_DIR):
+        self.root = Path(root)
+        self.base_dir = self.root / "base"
+        self.seg_dir = self.root / "segments"
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> Optional["BarStore"]:
+        """
+        The store configured under `storage:`, or None when it's disabled.
+        """
+        if not cfg_get(cfg, "storage.columnar", False):
+            return None
+        return cls(Path(cfg_get(cfg, "storage.columnar_dir", DEFAULT_BAR_DIR)))
+
+    # -- files -----------------------------------------------------------
+
+    @staticmethod
+    def _write_dir(path: Path, cols: BarColumns, offsets: bool) -> None:
+        # Write next to the target and rename, so readers never see half a directory.
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        (tmp / "symbols.json").write_text(json.dumps(cols.symbols.tolist()), encoding="utf-8")
+        np.save(tmp / "code.npy", np.ascontiguousarray(cols.code, dtype=np.int32))
+        np.save(tmp / "day.npy", np.ascontiguousarray(cols.day, dtype=np.int32))
+        for c in VALUE_COLUMNS:
+            np.save(tmp / f"{c}.npy", np.ascontiguousarray(cols.values[c], dtype=np.float64))
+        if offsets:
+            np.save(tmp / "offsets.npy", _offsets(cols.code, len(cols.symbols)))
+        old = path.with_name(path.name + ".old")
+        if path.exists():
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+
+    @staticmethod
+    def _load_dir(path: Path) -> BarColumns:
+        symbols = np.array(json.loads((path / "symbols.json").read_text(encoding="utf-8")), dtype=str)
+
+        def load(name: str) -> np.ndarray:
+            return np.load(path / f"{name}.npy", mmap_mode="r")
+
+        return BarColumns(symbols, load("code"), load("day"), {c: load(c) for c in VALUE_COLUMNS})
+
+    def segments(self) -> list[Path]:
+        if not self.seg_dir.exists():
+            return []
+        return sorted((p for p in self.seg_dir.iterdir() if p.is_dir() and p.name.isdigit()), key=lambda p: int(p.name))
+
+    def _base(self) -> Optional[BarColumns]:
+        return self._load_dir(self.base_dir) if (self.base_dir / "code.npy").exists() else None
+
+    # -- write -----------------------------------------------------------
+
+    def append(self, bars: Union[pd.DataFrame, BarColumns]) -> Optional[Path]:
+        """
+        Write bars (BarColumns or a read_bars frame) as a new segment. Returns its path.
+        """
+        cols = bars if isinstance(bars, BarColumns) else BarColumns.from_frame(bars)
+        if not len(cols):
+            return None
+        path = self.seg_dir / str(time.time_ns())
+        self._write_dir(path, cols, offsets=False)
+        return path
+
+    def compact(self) -> CompactStats:
+        """
+        Fold every pending segment into base and delete them.
+        """
+        t0 = time.perf_counter()
+        segs = self.segments()
+        base = self._base()
+        merged = _merge(([base] if base is not None else []) + [self._load_dir(p) for p in segs])
+        self._write_dir(self.base_dir, merged, offsets=True)
+        for p in segs:
+            shutil.rmtree(p, ignore_errors=True)
+        return CompactStats(len(segs), len(merged), len(merged.symbols), time.perf_counter() - t0)
+
+    def rebuild_from_sqlite(self, con: sqlite3.Connection) -> CompactStats:
+        """
+        Replace the store with a copy of daily_bars.
+        """
+        t0 = time.perf_counter()
+        cols = BarColumns.from_frame(read_bars(con, None, *ALL_DATES))
+        cols = _merge([cols])
+        self._write_dir(self.base_dir, cols, offsets=True)
+        for p in self.segments():
+            shutil.rmtree(p, ignore_errors=True)
+        return CompactStats(0, len(cols), len(cols.symbols), time.perf_counter() - t0)
+
+    # -- read ------------------------------------------------------------
+
+    def _snapshot(self) -> tuple[BarColumns, Optional[np.ndarray]]:
+        """
+        All rows sorted by (symbol, date), plus per-symbol offsets. Memory maps
+        when there are no pending segments.
+        """
+        base = self._base()
+        segs = self.segments()
+        if base is not None and not segs:
+            return base, np.load(self.base_dir / "offsets.npy", mmap_mode="r")
+        merged = _merge(([base] if base is not None else []) + [self._load_dir(p) for p in segs])
+        return merged, _offsets(merged.code, len(merged.symbols))
+
+    def read(self, symbols: Optional[list[str]] = None, start: Optional[str] = None,
+             end: Optional[str] = None) -> BarColumns:
+        """
+        Rows for `symbols` (None = all) with start <= date <= end, sorted by
+        (symbol, date). A single contiguous range comes back as views.
+        """
+        cols, offsets = self._snapshot()
+        if not len(cols):
+            return BarColumns.empty()
+        lo_day = _days([start])[0] if start else np.iinfo(np.int32).min
+        hi_day = _days([end])[0] if end else np.iinfo(np.int32).max
+
+        if symbols is None:
+            codes = np.arange(len(cols.symbols))
+        else:
+            want = np.unique(np.asarray(symbols, dtype=str))
+            pos = np.searchsorted(cols.symbols, want)
+            hit = pos < len(cols.symbols)
+            hit[hit] = cols.symbols[pos[hit]] == want[hit]
+            codes = pos[hit]
+
+        ranges = []
+        for c in codes:
+            a, b = int(offsets[c]), int(offsets[c + 1])
+            d = cols.day[a:b]
+            a2, b2 = a + int(np.searchsorted(d, lo_day, "left")), a + int(np.searchsorted(d, hi_day, "right"))
+            if b2 > a2:
+                if ranges and ranges[-1][1] == a2:
+                    ranges[-1] = (ranges[-1][0], b2)
+                else:
+                    ranges.append((a2, b2))
+        if not ranges:
+            return BarColumns(cols.symbols, cols.code[:0], cols.day[:0], {c: v[:0] for c, v in cols.values.items()})
+        if len(ranges) == 1:
+            return cols.take(slice(*ranges[0]))
+        return cols.take(np.concatenate([np.arange(a, b) for a, b in ranges]))
+
+    def read_frame(self, symbols: Optional[list[str]] = None, start: Optional[str] = None,
+                   end: Optional[str] = None) -> pd.DataFrame:
+        return self.read(symbols, start, end).to_frame()
+
+
+def load_bars(
+    con: sqlite3.Connection,
+    symbols: Optional[list[str]],
+    start: str,
+    end: str,
+    store: Optional[BarStore] = None,
+) -> pd.DataFrame:
+    """
+    read_bars, served from the columnar store when one is configured.
+    """
+    if store is None:
+        return read_bars(con, symbols, start, end)
+    if symbols is not None and not symbols:
+        return pd.DataFrame()
+    with metrics().span("bars.read_columnar"):
+        return store.read_frame(symbols, start, end)
+
+
+def load_bar_columns(
+    con: sqlite3.Connection,
+    symbols: Optional[list[str]],
+    start: str,
+    end: str,
+    store: Optional[BarStore] = None,
+) -> BarColumns:
+    """
+    load_bars as BarColumns sorted by (symbol, date) with offsets. From the
+    columnar store these are views of its memory maps.
+    """
+    if symbols is not None and not symbols:
+        return BarColumns.empty().by_symbol()
+    if store is None:
+        return BarColumns.from_frame(read_bars(con, symbols, start, end)).by_symbol()
+    with metrics().span("bars.read_columnar"):
+        return store.read(symbols, start, end).by_symbol()
+
+
+def bar_rows(cols: BarColumns, chunk_size: int = BULK_CHUNK_ROWS) -> Iterator[tuple]:
+    """
+    daily_bars tuples (NaN -> NULL), converted a chunk at a time.
+    """
+    for i in range(0, len(cols), chunk_size):
+        part = cols.take(slice(i, i + chunk_size))
+        values = [[None if v != v else v for v in np.asarray(part.values[c]).tolist()] for c in VALUE_COLUMNS]
+        yield from zip(part.symbols[np.asarray(part.code)].tolist(), part.dates().tolist(), *values)
+
+
+def write_bars(con: sqlite3.Connection, cols: BarColumns, chunk_size: int = BULK_CHUNK_ROWS) -> WriteStats:
+    """
+    Upsert BarColumns into daily_bars (bulk_write_frame without the frame).
+    """
+    if not len(cols):
+        return WriteStats("daily_bars")
+    return bulk_write(con, "daily_bars", bar_rows(cols, chunk_size), chunk_size)
+
+
+def check_consistency(store: BarStore, con: sqlite3.Connection, max_examples: int = 10) -> ConsistencyReport:
+    """
+    Row-for-row comparison of the store against daily_bars (NaN == NULL).
+    """
+    sql = _merge([BarColumns.from_frame(read_bars(con, None, *ALL_DATES))])
+    col = store.read()
+    symbols = np.unique(np.concatenate([sql.symbols, col.symbols]))
+    # (symbol, day) -> one int64; day is shifted to be non-negative.
+    span, shift = np.int64(1) << 32, np.int64(1) << 31
+
+    def keys(b: BarColumns) -> np.ndarray:
+        code = np.searchsorted(symbols, b.symbols)[np.asarray(b.code)].astype(np.int64)
+        return code * span + (np.asarray(b.day, dtype=np.int64) + shift)
+
+    ks, kc = keys(sql), keys(col)
+    common, i_s, i_c = np.intersect1d(ks, kc, assume_unique=True, return_indices=True)
+    bad = np.zeros(len(common), dtype=bool)
+    for c in VALUE_COLUMNS:
+        a, b = sql.values[c][i_s], np.asarray(col.values[c])[i_c]
+        bad |= ~((a == b) | (np.isnan(a) & np.isnan(b)))
+
+    examples = [
+        (str(symbols[k // span]), str(_iso(np.array([k % span - shift]))[0]))
+        for k in common[bad][:max_examples]
+    ]
+    return ConsistencyReport(
+        rows_sqlite=len(sql),
+        rows_store=len(col),
+        missing_in_store=len(ks) - len(common),
+        missing_in_sqlite=len(kc) - len(common),
+        mismatched=int(bad.sum()),
+        examples=examples,
+    )
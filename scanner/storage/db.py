@@ -1,6 +1,14 @@
 from __future__ import annotations
 import sqlite3
+import time
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence
+
+import pandas as pd
+
+from scanner.utils.metrics import metrics
 
 SCHEMA_SQL = """
 PRAGMA journal_mode=WAL;
@@ -12,12 +20,60 @@ CREATE TABLE IF NOT EXISTS runs (
   config_hash TEXT
 );
 
+-- One row per pipeline stage per run; lets a rerun skip completed stages.
+CREATE TABLE IF NOT EXISTS run_stages (
+  run_id TEXT NOT NULL,
+  stage TEXT NOT NULL,
+  status TEXT NOT NULL,
+  started_at TEXT NOT NULL,
+  wall_s REAL,
+  rows_out INTEGER,
+  artifact TEXT,
+  error TEXT,
+  PRIMARY KEY (run_id, stage)
+);
+
+-- Per-stage counters and latency histograms (scanner.utils.metrics).
+-- counter: count = increments, total = their sum. timer: seconds, buckets per BUCKETS_MS.
+CREATE TABLE IF NOT EXISTS run_metrics (
+  run_id TEXT NOT NULL REFERENCES runs(run_id),
+  stage TEXT NOT NULL,
+  name TEXT NOT NULL,
+  kind TEXT NOT NULL,
+  count INTEGER NOT NULL,
+  total REAL NOT NULL,
+  max REAL,
+  p50 REAL,
+  p95 REAL,
+  buckets_json TEXT,
+  PRIMARY KEY (run_id, stage, name)
+);
+
 CREATE TABLE IF NOT EXISTS tickers (
   symbol TEXT PRIMARY KEY,
   exchange TEXT,
   cik TEXT
 );
 
+-- When a reference dataset (e.g. tickers) was last reloaded from its source.
+CREATE TABLE IF NOT EXISTS reference_refresh (
+  name TEXT PRIMARY KEY,
+  refreshed_at TEXT NOT NULL,
+  rows INTEGER
+);
+
+-- When each CIK's submissions were last pulled into filings.
+CREATE TABLE IF NOT EXISTS filings_sync (
+  cik TEXT PRIMARY KEY,
+  synced_at TEXT NOT NULL
+);
+
+-- Symbols Tiingo had no bars for (404 or empty), and the run date that asked.
+CREATE TABLE IF NOT EXISTS bars_no_data (
+  symbol TEXT PRIMARY KEY,
+  checked_at TEXT NOT NULL
+);
+
 CREATE TABLE IF NOT EXISTS daily_bars (
   symbol TEXT NOT NULL,
   date TEXT NOT NULL,
@@ -37,9 +93,22 @@ CREATE TABLE IF NOT EXISTS filings (
   filed_at TEXT NOT NULL,
   primary_doc TEXT,
   url TEXT,
+  items TEXT,
   PRIMARY KEY (cik, accession)
 );
 
+-- Going-concern text scan of one filing's primary document (scanner.edgar.going_concern).
+CREATE TABLE IF NOT EXISTS going_concern_scans (
+  accession TEXT PRIMARY KEY,
+  cik TEXT NOT NULL,
+  flag INTEGER NOT NULL,
+  hits INTEGER NOT NULL,
+  negated INTEGER NOT NULL,
+  excerpt TEXT,
+  bytes INTEGER,
+  scanned_at TEXT NOT NULL
+);
+
 CREATE TABLE IF NOT EXISTS scores_daily (
   symbol TEXT NOT NULL,
   date TEXT NOT NULL,
@@ -57,11 +126,30 @@ CREATE TABLE IF NOT EXISTS signals (
   PRIMARY KEY (symbol, date, signal)
 );
 
+-- XBRL facts loaded from SEC bulk companyfacts.zip (only the tags we score on).
+-- seq preserves the order of entries within (cik, tag, unit) as published,
+-- which breaks ties between facts sharing an end date.
+CREATE TABLE IF NOT EXISTS xbrl_facts (
+  cik TEXT NOT NULL,
+  tag TEXT NOT NULL,
+  unit TEXT NOT NULL,
+  seq INTEGER NOT NULL,
+  end TEXT NOT NULL,
+  val REAL NOT NULL,
+  form TEXT,
+  fp TEXT,
+  fy INTEGER,
+  filed TEXT,
+  accn TEXT,
+  PRIMARY KEY (cik, tag, unit, seq)
+);
+
 CREATE TABLE IF NOT EXISTS dd_notes (
   symbol TEXT NOT NULL,
   date TEXT NOT NULL,
   model TEXT NOT NULL,
   note_md TEXT NOT NULL,
+  context_hash TEXT,
   PRIMARY KEY (symbol, date)
 );
 """
@@ -72,36 +160,266 @@ def connect(db_path: Path) -> sqlite3.Connection:
     con.execute("PRAGMA foreign_keys=ON;")
     return con
 
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    # (table, column, declaration) added when missing. CREATE TABLE IF NOT EXISTS
+    # leaves existing tables alone, so older databases get new columns this way.
+    columns: tuple[tuple[str, str, str], ...] = ()
+    sql: tuple[str, ...] = ()
+
+
+# Applied in order to any database whose PRAGMA user_version is lower. Append
+# new steps; never edit one that has shipped.
+MIGRATIONS: list[Migration] = [
+    Migration(
+        1, "dd_notes context hash",
+        columns=(("dd_notes", "context_hash", "TEXT"),),
+        sql=("CREATE INDEX IF NOT EXISTS idx_dd_notes_context ON dd_notes(context_hash, model)",),
+    ),
+    Migration(
+        2, "read-path indexes",
+        sql=(
+            # universe_on_date (and find_gaps' session calendar), without touching the table
+            "CREATE INDEX IF NOT EXISTS idx_daily_bars_date ON daily_bars(date, symbol, close, dollar_volume)",
+            # latest_filings: by form across companies (filing_events too), and per company
+            "CREATE INDEX IF NOT EXISTS idx_filings_form_filed ON filings(form, filed_at)",
+            "CREATE INDEX IF NOT EXISTS idx_filings_cik_form_filed ON filings(cik, form, filed_at)",
+            # top_scores: ranked scores for one date
+            "CREATE INDEX IF NOT EXISTS idx_scores_daily_date_score ON scores_daily(date, score_total DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_signals_date ON signals(date)",
+            "CREATE INDEX IF NOT EXISTS idx_tickers_cik ON tickers(cik)",
+        ),
+    ),
+    Migration(
+        3, "filings 8-K items",
+        columns=(("filings", "items", "TEXT"),),
+    ),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(con: sqlite3.Connection) -> int:
+    return int(con.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate(con: sqlite3.Connection) -> list[Migration]:
+    """
+    Bring the schema up to SCHEMA_VERSION. Each step runs in its own
+    transaction together with its user_version bump. Returns the steps applied.
+    """
+    current = schema_version(con)
+    if current > SCHEMA_VERSION:
+        raise RuntimeError(f"Database schema v{current} is newer than this code (v{SCHEMA_VERSION})")
+    applied = []
+    con.commit()
+    for m in MIGRATIONS:
+        if m.version <= current:
+            continue
+        con.execute("BEGIN")
+        try:
+            for table, col, decl in m.columns:
+                cols = {r[1] for r in con.execute(f"PRAGMA table_info({table})")}
+                if col not in cols:
+                    con.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
+            for stmt in m.sql:
+                con.execute(stmt)
+            con.execute(f"PRAGMA user_version = {m.version}")
+        except Exception:
+            con.rollback()
+            raise
+        con.commit()
+        applied.append(m)
+    return applied
+
+
 def init_db(con: sqlite3.Connection) -> None:
     con.executescript(SCHEMA_SQL)
-    con.commit()
+    migrate(con)
+
+# Bulk writes: rows are streamed in chunks, one transaction per chunk, with
+# pragmas that trade fsyncs for throughput (safe under WAL: a crash can lose the
+# last commits, not corrupt the file).
+BULK_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-262144",  # KiB, i.e. 256 MB
+    "PRAGMA temp_store=MEMORY",
+)
+BULK_CHUNK_ROWS = 50_000
+
+# SQLite's default host-parameter limit is 999 on older builds.
+IN_CHUNK = 500
 
-def sqlite_upsert_daily_bars(table, conn, keys, data_iter):
+
+def in_chunks(values: Sequence, n: int = IN_CHUNK) -> Iterator[list]:
+    """
+    `values` in slices of at most n, for IN (...) lists under the parameter limit.
     """
-    Pandas to_sql UPSERT helper for SQLite.
+    values = list(values)
+    for i in range(0, len(values), n):
+        yield values[i:i + n]
+
+
+@dataclass(frozen=True)
+class TableSpec:
+    columns: tuple[str, ...]
+    key: tuple[str, ...]
+    # "update": rewrite non-key columns on conflict. "ignore": keep the stored row.
+    on_conflict: str = "update"
+
+
+WRITE_SPECS: dict[str, TableSpec] = {
+    "daily_bars": TableSpec(
+        ("symbol", "date", "open", "high", "low", "close", "volume", "dollar_volume"), ("symbol", "date"),
+    ),
+    "scores_daily": TableSpec(
+        ("symbol", "date", "score_total", "components_json", "setup_class"), ("symbol", "date"),
+    ),
+    "signals": TableSpec(("symbol", "date", "signal", "rationale_json"), ("symbol", "date", "signal")),
+    "filings": TableSpec(
+        ("cik", "accession", "form", "filed_at", "primary_doc", "url", "items"), ("cik", "accession"), "ignore",
+    ),
+    "tickers": TableSpec(("symbol", "exchange", "cik"), ("symbol",)),
+    "filings_sync": TableSpec(("cik", "synced_at"), ("cik",)),
+    "bars_no_data": TableSpec(("symbol", "checked_at"), ("symbol",)),
+}
+
+
+@dataclass
+class WriteStats:
+    table: str
+    rows: int = 0       # rows sent
+    changed: int = 0    # rows inserted or updated (ignored conflicts excluded)
+    wall_s: float = 0.0
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.wall_s if self.wall_s > 0 else 0.0
+
+    def __str__(self) -> str:
+        return f"{self.table}: {self.rows} rows ({self.changed} changed) in {self.wall_s:.2f}s, {self.rows_per_s:,.0f} rows/s"
+
+
+def _write_sql(table: str, spec: TableSpec) -> str:
+    cols = ", ".join(spec.columns)
+    marks = ", ".join("?" * len(spec.columns))
+    updates = [c for c in spec.columns if c not in spec.key]
+    if spec.on_conflict == "ignore" or not updates:
+        action = "DO NOTHING"
+    else:
+        action = "DO UPDATE SET " + ", ".join(f"{c}=excluded.{c}" for c in updates)
+    return f"INSERT INTO {table} ({cols}) VALUES ({marks}) ON CONFLICT({', '.join(spec.key)}) {action}"
 
-    Assumes UNIQUE(symbol, date) constraint exists.
+
+def bulk_pragmas(con: sqlite3.Connection) -> None:
+    for p in BULK_PRAGMAS:
+        con.execute(p)
+
+
+def bulk_write(
+    con: sqlite3.Connection,
+    table: str,
+    rows: Iterable[Sequence],
+    chunk_size: int = BULK_CHUNK_ROWS,
+    commit: bool = True,
+) -> WriteStats:
     """
-    data = list(data_iter)
-    if not data:
-        return 0
+    Upsert `rows` (tuples in WRITE_SPECS[table].columns order) into `table`.
+    `rows` is consumed lazily, so generators stream without materializing.
 
-    columns = ",".join([f'"{k}"' for k in keys])
-    placeholders = ",".join(["?"] * len(keys))
+    commit=False writes inside the caller's open transaction instead: no
+    commits, no pragmas (set them with bulk_pragmas before it starts).
+    """
+    spec = WRITE_SPECS.get(table)
+    if spec is None:
+        raise RuntimeError(f"No bulk write spec for table {table!r}; expected one of {sorted(WRITE_SPECS)}")
+    sql = _write_sql(table, spec)
+    if commit:
+        con.commit()
+        bulk_pragmas(con)
 
-    conflict_keys = {"symbol", "date"}
-    update_cols = [k for k in keys if k not in conflict_keys]
+    stats = WriteStats(table)
+    t0 = time.perf_counter()
+    before = con.total_changes
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            break
+        if commit:
+            with con:
+                con.executemany(sql, chunk)
+        else:
+            con.executemany(sql, chunk)
+        stats.rows += len(chunk)
+    stats.changed = con.total_changes - before
+    stats.wall_s = time.perf_counter() - t0
+    m = metrics()
+    m.observe(f"db.write.{table}", stats.wall_s)
+    m.incr(f"db.write.{table}.rows", stats.rows)
+    return stats
 
-    set_clause = ", ".join(
-        [f'"{c}"=excluded."{c}"' for c in update_cols]
-    )
 
-    sql = f"""
-    INSERT INTO {table.name} ({columns})
-    VALUES ({placeholders})
-    ON CONFLICT(symbol, date) DO UPDATE SET
-        {set_clause}
+def frame_rows(df: pd.DataFrame, columns: Sequence[str], chunk_size: int = BULK_CHUNK_ROWS) -> Iterator[tuple]:
     """
+    Rows of df[columns] as tuples of Python scalars (NaN -> NULL), converted a
+    chunk at a time.
+    """
+    for i in range(0, len(df), chunk_size):
+        part = df.iloc[i:i + chunk_size]
+        cols = [
+            [None if v != v else v for v in part[c].tolist()] if part[c].dtype.kind == "f" else part[c].tolist()
+            for c in columns
+        ]
+        yield from zip(*cols)
+
+
+def bulk_write_frame(con: sqlite3.Connection, table: str, df: pd.DataFrame,
+                     chunk_size: int = BULK_CHUNK_ROWS, commit: bool = True) -> WriteStats:
+    if df is None or df.empty:
+        return WriteStats(table)
+    return bulk_write(con, table, frame_rows(df, WRITE_SPECS[table].columns, chunk_size), chunk_size, commit)
+
 
-    conn.executemany(sql, data)
-    return len(data)
+def upsert_daily_bars(con: sqlite3.Connection, bars: pd.DataFrame) -> int:
+    return bulk_write_frame(con, "daily_bars", bars).rows
+
+def last_bar_dates(con: sqlite3.Connection, symbols: list[str]) -> dict[str, str]:
+    """
+    symbol -> most recent stored bar date (YYYY-MM-DD). Symbols with no bars are omitted.
+    """
+    out: dict[str, str] = {}
+    for part in in_chunks(sorted(set(symbols))):
+        rows = con.execute(
+            f"SELECT symbol, MAX(date) FROM daily_bars WHERE symbol IN ({','.join('?' * len(part))}) GROUP BY symbol",
+            part,
+        ).fetchall()
+        out.update((sym, d) for sym, d in rows if d)
+    return out
+
+def read_bars(con: sqlite3.Connection, symbols: Optional[list[str]], start: str, end: str) -> pd.DataFrame:
+    """
+    Stored bars for `symbols` (None = every stored symbol) with start <= date <= end,
+    sorted by (symbol, date). Same columns as TiingoClient.eod_prices.
+    """
+    if symbols is not None and not symbols:
+        return pd.DataFrame()
+    sql = """
+    SELECT symbol, date, open, high, low, close, volume, dollar_volume
+    FROM daily_bars
+    WHERE {where}date >= ? AND date <= ?
+    ORDER BY symbol, date
+    """
+    with metrics().span("db.read_bars"):
+        if symbols is None:
+            return pd.read_sql_query(sql.format(where=""), con, params=[start, end])
+        # Sorted chunks keep the concatenation in (symbol, date) order.
+        parts = [
+            pd.read_sql_query(
+                sql.format(where=f"symbol IN ({','.join('?' * len(part))}) AND "), con, params=[*part, start, end],
+            )
+            for part in in_chunks(sorted(set(symbols)))
+        ]
+        return pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
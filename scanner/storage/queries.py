@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import pandas as pd
+
+# Read helpers for the access patterns the scanner uses. Each query is written
+# to be answered from an index (see MIGRATIONS in db.py); scripts/query_plans.py
+# prints EXPLAIN QUERY PLAN for all of them.
+
+BAR_COLUMNS = ["symbol", "date", "open", "high", "low", "close", "volume", "dollar_volume"]
+
+LAST_N_BARS_SQL = """
+SELECT symbol, date, open, high, low, close, volume, dollar_volume
+FROM daily_bars
+WHERE symbol = ? AND date <= ?
+ORDER BY date DESC
+LIMIT ?
+"""
+
+UNIVERSE_ON_DATE_SQL = """
+SELECT symbol, close, dollar_volume
+FROM daily_bars
+WHERE date = ? AND close >= ? AND close <= ?
+ORDER BY symbol
+"""
+
+LATEST_FILINGS_SQL = """
+SELECT cik, accession, form, filed_at, primary_doc, url
+FROM filings
+WHERE form = ? AND filed_at >= ?
+ORDER BY filed_at DESC
+"""
+
+LATEST_FILINGS_CIK_SQL = """
+SELECT cik, accession, form, filed_at, primary_doc, url
+FROM filings
+WHERE cik = ? AND form = ? AND filed_at >= ?
+ORDER BY filed_at DESC
+"""
+
+LATEST_SCORE_DATE_SQL = "SELECT MAX(date) FROM scores_daily"
+
+TOP_SCORES_SQL = """
+SELECT symbol, date, score_total, setup_class, components_json
+FROM scores_daily
+WHERE date = ?
+ORDER BY score_total DESC
+LIMIT ?
+"""
+
+
+@dataclass(frozen=True)
+class FilingRow:
+    cik: str
+    accession: str
+    form: str
+    filed_at: str
+    primary_doc: Optional[str]
+    url: Optional[str]
+
+
+@dataclass(frozen=True)
+class ScoreRow:
+    symbol: str
+    date: str
+    score_total: float
+    setup_class: str
+    components_json: str
+
+
+def last_n_bars(con: sqlite3.Connection, symbols: Iterable[str], n: int, asof: str = "9999-12-31") -> pd.DataFrame:
+    """
+    Each symbol's last `n` bars on or before `asof`, sorted by (symbol, date).
+    One primary-key range scan per symbol.
+    """
+    rows: list[tuple] = []
+    for sym in sorted(set(symbols)):
+        got = con.execute(LAST_N_BARS_SQL, (sym, asof, int(n))).fetchall()
+        rows.extend(reversed(got))
+    return pd.DataFrame(rows, columns=BAR_COLUMNS)
+
+
+def universe_on_date(
+    con: sqlite3.Connection,
+    date: str,
+    min_price: float = 0.0,
+    max_price: float = float("inf"),
+) -> pd.DataFrame:
+    """
+    symbol, close, dollar_volume for every symbol with a bar on `date` and
+    close within [min_price, max_price]. Served from idx_daily_bars_date alone.
+    """
+    cur = con.execute(UNIVERSE_ON_DATE_SQL, (date, float(min_price), float(max_price)))
+    return pd.DataFrame(cur.fetchall(), columns=["symbol", "close", "dollar_volume"])
+
+
+def latest_filings(
+    con: sqlite3.Connection,
+    forms: Iterable[str],
+    since: str = "0001-01-01",
+    cik: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> list[FilingRow]:
+    """
+    Filings of the given forms filed on or after `since`, newest first,
+    optionally for one CIK. One index range scan per form.
+    """
+    out: list[FilingRow] = []
+    for form in dict.fromkeys(forms):
+        if cik is None:
+            cur = con.execute(LATEST_FILINGS_SQL, (form, since))
+        else:
+            cur = con.execute(LATEST_FILINGS_CIK_SQL, (cik, form, since))
+        out.extend(FilingRow(*r) for r in cur)
+    out.sort(key=lambda f: f.filed_at, reverse=True)
+    return out[:limit] if limit is not None else out
+
+
+def latest_score_date(con: sqlite3.Connection) -> Optional[str]:
+    """
+    Most recent date in scores_daily, or None when nothing has been scored.
+    """
+    return (con.execute(LATEST_SCORE_DATE_SQL).fetchone() or (None,))[0]
+
+
+def top_scores(con: sqlite3.Connection, date: str, n: int = 20) -> list[ScoreRow]:
+    """
+    Highest score_total rows for `date`, best first.
+    """
+    return [ScoreRow(*r) for r in con.execute(TOP_SCORES_SQL, (date, int(n)))]
+
+
+# name -> sql, for scripts/query_plans.py
+QUERIES: dict[str, str] = {
+    "last_n_bars": LAST_N_BARS_SQL,
+    "universe_on_date": UNIVERSE_ON_DATE_SQL,
+    "latest_filings": LATEST_FILINGS_SQL,
+    "latest_filings_cik": LATEST_FILINGS_CIK_SQL,
+    "top_scores": TOP_SCORES_SQL,
+    "latest_score_date": LATEST_SCORE_DATE_SQL,
+}
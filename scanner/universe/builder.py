@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from scanner.edgar.client import EdgarClient
+from scanner.edgar.parsers import cik_pad, normalize_exchange
+from scanner.features.panel import latest_features
+from scanner.storage.columnar import BarStore, load_bar_columns
+from scanner.storage.db import WriteStats, bulk_write
+from scanner.utils.config import cfg_get
+
+# Universe = listed tickers on the configured exchanges whose stored bars pass
+# the price band and 20-day dollar-volume floor. Tickers come from SEC's
+# company_tickers_exchange.json (through the EDGAR HTTP cache) into `tickers`,
+# reloaded at most every `universe.ticker_refresh_hours`.
+#
+# Symbols with no bars in the lookback window can't be judged yet, so they are
+# fetched once and filtered on the next pass; ones Tiingo had nothing for
+# (warrants, units, delisted names) wait the same recheck period before being
+# asked again. A symbol that fails is skipped
+# while its verdict is fresh: once its latest stored bar is more than
+# `universe.recheck_rejected_days` old it is fetched again, so a name moving
+# into the price band is caught within that many days.
+
+TICKERS_EXCHANGE_PATH = "/files/company_tickers_exchange.json"
+
+
+def ticker_rows(data: dict) -> list[tuple[str, Optional[str], str]]:
+    """
+    company_tickers_exchange.json ({"fields": [...], "data": [[...], ...]})
+    -> (symbol, exchange, cik10) rows for the tickers table.
+    """
+    fields = data.get("fields") or []
+    try:
+        i_cik, i_sym, i_ex = fields.index("cik"), fields.index("ticker"), fields.index("exchange")
+    except ValueError:
+        raise RuntimeError(f"Unexpected company_tickers_exchange.json fields: {fields}")
+    rows = {}
+    for rec in data.get("data") or []:
+        sym = str(rec[i_sym] or "").upper().strip()
+        if sym and rec[i_cik] is not None:
+            rows[sym] = (sym, normalize_exchange(rec[i_ex]) or None, cik_pad(rec[i_cik]))
+    return list(rows.values())
+
+
+def refresh_tickers(
+    con: sqlite3.Connection,
+    client: EdgarClient,
+    max_age_hours: float = 24.0,
+    force: bool = False,
+) -> Optional[WriteStats]:
+    """
+    Reload `tickers` from SEC unless it was refreshed within max_age_hours.
+    Returns the write stats, or None when the stored table was fresh enough.
+    """
+    row = con.execute("SELECT refreshed_at FROM reference_refresh WHERE name = 'tickers'").fetchone()
+    if row and not force:
+        age = datetime.now() - datetime.fromisoformat(row[0])
+        if age < timedelta(hours=max_age_hours):
+            return None
+
+    rows = ticker_rows(client.get_json(TICKERS_EXCHANGE_PATH, host="www"))
+    if not rows:
+        raise RuntimeError("company_tickers_exchange.json returned no tickers")
+    stats = bulk_write(con, "tickers", rows)
+    con.execute(
+        "INSERT OR REPLACE INTO reference_refresh (name, refreshed_at, rows) VALUES ('tickers', ?, ?)",
+        (datetime.now().isoformat(timespec="seconds"), len(rows)),
+    )
+    con.commit()
+    return stats
+
+
+def exchange_symbols(con: sqlite3.Connection, exchanges: list[str]) -> list[str]:
+    """
+    Stored tickers listed on any of `exchanges`. Both sides go through
+    normalize_exchange, so rows written raw by older ingests still match.
+    """
+    wanted = {normalize_exchange(e) for e in exchanges}
+    rows = con.execute("SELECT symbol, exchange FROM tickers")
+    return sorted(sym for sym, ex in rows if normalize_exchange(ex) in wanted)
+
+
+@dataclass(frozen=True)
+class UniverseFilter:
+    min_price: float = 0.0
+    max_price: float = float("inf")
+    min_adv: float = 0.0
+    exchanges: tuple[str, ...] = ()
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> "UniverseFilter":
+        return cls(
+            min_price=float(cfg_get(cfg, "universe.min_price", 0.0)),
+            max_price=float(cfg_get(cfg, "universe.max_price", float("inf"))),
+            min_adv=float(cfg_get(cfg, "universe.min_avg_dollar_volume_20d", 0.0)),
+            exchanges=tuple(cfg_get(cfg, "universe.exchanges", ()) or ()),
+        )
+
+    def passes(self, close: np.ndarray, adv_20d: np.ndarray) -> np.ndarray:
+        """
+        Price band on the last close plus the 20-day dollar-volume floor. NaN fails.
+        """
+        with np.errstate(invalid="ignore"):
+            return (close >= self.min_price) & (close <= self.max_price) & (adv_20d >= self.min_adv)
+
+
+def qualifying(features: pd.DataFrame, flt: UniverseFilter) -> pd.Index:
+    """
+    Symbols (index of latest_features output) that pass `flt`.
+    """
+    ok = flt.passes(features["close"].to_numpy(dtype=float), features["adv_20d"].to_numpy(dtype=float))
+    return features.index[ok]
+
+
+@dataclass
+class UniverseResult:
+    symbols: list[str]
+    listed: int = 0
+    qualified: list[str] = field(default_factory=list)
+    unseen: list[str] = field(default_factory=list)
+    rejected: int = 0
+    rechecked: list[str] = field(default_factory=list)  # rejected, but their verdict expired
+    no_data: list[str] = field(default_factory=list)    # unseen, but Tiingo had nothing recently
+
+
+def build_universe(
+    con: sqlite3.Connection,
+    flt: UniverseFilter,
+    run_date: date,
+    lookback_days: int,
+    store: Optional[BarStore] = None,
+    recheck_days: int = 5,
+) -> UniverseResult:
+    """
+    Listed symbols, then one latest_features pass over their stored bars.
+    Returns qualified + unseen symbols, plus rejected ones whose latest bar is
+    more than recheck_days old (the set to fetch). Unseen symbols Tiingo had no
+    bars for within recheck_days are left out.
+    """
+    listed = exchange_symbols(con, list(flt.exchanges)) if flt.exchanges else \
+        [r[0] for r in con.execute("SELECT symbol FROM tickers ORDER BY symbol")]
+    if not listed:
+        return UniverseResult([])
+
+    start = (run_date - timedelta(days=lookback_days)).isoformat()
+    bars = load_bar_columns(con, None, start, run_date.isoformat(), store)
+    feats = latest_features(bars) if len(bars) else pd.DataFrame(columns=["close", "adv_20d"])
+    # Features are per symbol, so unlisted ones can be dropped after the pass.
+    feats = feats[feats.index.isin(listed)]
+
+    qualified = sorted(qualifying(feats, flt))
+    seen = set(feats.index)
+    expired = (run_date - timedelta(days=recheck_days)).isoformat()
+    empty = {s for (s,) in con.execute("SELECT symbol FROM bars_no_data WHERE checked_at > ?", (expired,))}
+    unseen = [s for s in listed if s not in seen and s not in empty]
+    no_data = [s for s in listed if s not in seen and s in empty]
+    rejected = feats.loc[~feats.index.isin(qualified)]
+    rechecked = sorted(rejected.index[rejected["date"].to_numpy(dtype=str) <= expired]) if len(rejected) else []
+    return UniverseResult(
+        symbols=sorted(set(qualified) | set(unseen) | set(rechecked)),
+        listed=len(listed),
+        qualified=qualified,
+        unseen=unseen,
+        rejected=len(seen) - len(qualified),
+        rechecked=rechecked,
+        no_data=no_data,
+    )
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+
+def load_config(path: Path | str) -> dict:
+    """
+    Load config/config.yaml into a plain dict. Missing file -> {}.
+    """
+    p = Path(path)
+    if not p.exists():
+        return {}
+    with p.open("r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    if not isinstance(data, dict):
+        raise RuntimeError(f"Config {p} must be a mapping at the top level")
+    return data
+
+
+def cfg_get(cfg: dict, dotted: str, default: Any = None) -> Any:
+    """
+    cfg_get(cfg, "tiingo.max_workers", 8)
+    """
+    node: Any = cfg
+    for part in dotted.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return default
+        node = node[part]
+    return node
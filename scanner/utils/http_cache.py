@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+import requests
+
+from scanner.utils.hash import sha256_bytes
+from scanner.utils.metrics import metrics
+
+DEFAULT_CACHE_DIR = Path("data/http_cache")
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class HttpCache:
+    """
+    On-disk response cache keyed by URL.
+
+    Bodies are stored gzip-compressed next to a small JSON sidecar holding the
+    validators (ETag / Last-Modified). Within `ttl_s` an entry is served without
+    touching the network; after that it is revalidated with a conditional GET and
+    a 304 just refreshes the timestamp. Oldest-used entries are evicted once the
+    directory grows past `max_bytes`. offline=True never hits the network.
+    """
+
+    def __init__(
+        self,
+        root: Path = DEFAULT_CACHE_DIR,
+        ttl_s: float = 12 * 3600,
+        max_bytes: int = 2 * 1024**3,
+        offline: bool = False,
+        name: str = "http",
+    ):
+        self.root = Path(root)
+        self.name = name
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg: dict, section: str = "edgar") -> "HttpCache":
+        c = (cfg.get(section, {}) or {}).get("cache", {}) or {}
+        offline = bool(c.get("offline", False)) or os.getenv("SCANNER_OFFLINE", "") not in ("", "0")
+        return cls(
+            root=Path(c.get("dir", DEFAULT_CACHE_DIR / section)),
+            ttl_s=float(c.get("ttl_hours", 12)) * 3600,
+            max_bytes=int(float(c.get("max_mb", 2048)) * 1024**2),
+            offline=offline,
+            name=section,
+        )
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = sha256_bytes(url.encode("utf-8"))
+        d = self.root / key[:2]
+        return d / f"{key}.gz", d / f"{key}.meta.json"
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        body_p, meta_p = self._paths(url)
+        try:
+            meta = json.loads(meta_p.read_text(encoding="utf-8"))
+            body = gzip.decompress(body_p.read_bytes())
+        except (OSError, ValueError, EOFError):
+            return None
+        # mtime doubles as last-access time for LRU eviction
+        os.utime(body_p, None)
+        return CacheEntry(
+            url=url,
+            body=body,
+            etag=meta.get("etag"),
+            last_modified=meta.get("last_modified"),
+            fetched_at=float(meta.get("fetched_at", 0.0)),
+        )
+
+    def _write_meta(self, meta_p: Path, url: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        tmp = meta_p.with_suffix(f".tmp{threading.get_ident()}")
+        tmp.write_text(
+            json.dumps({"url": url, "etag": etag, "last_modified": last_modified, "fetched_at": time.time()}),
+            encoding="utf-8",
+        )
+        os.replace(tmp, meta_p)
+
+    def store(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str]) -> None:
+        body_p, meta_p = self._paths(url)
+        body_p.parent.mkdir(parents=True, exist_ok=True)
+        old = body_p.stat().st_size if body_p.exists() else 0
+        data = gzip.compress(body, compresslevel=6)
+        tmp = body_p.with_suffix(f".tmp{threading.get_ident()}")
+        tmp.write_bytes(data)
+        os.replace(tmp, body_p)
+        self._write_meta(meta_p, url, etag, last_modified)
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - old
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self.root.glob("*/*.gz"))
+
+    def evict(self) -> int:
+        """
+        Drop least-recently-used entries until under max_bytes. Returns entries removed.
+        """
+        with self._lock:
+            files = sorted(self.root.glob("*/*.gz"), key=lambda p: p.stat().st_mtime)
+            total = sum(p.stat().st_size for p in files)
+            removed = 0
+            for p in files:
+                if total <= self.max_bytes:
+                    break
+                total -= p.stat().st_size
+                p.unlink(missing_ok=True)
+                p.with_name(p.name[:-3] + ".meta.json").unlink(missing_ok=True)
+                removed += 1
+            self._size = total
+            return removed
+
+    def fetch(self, url: str, get: Callable[[dict], requests.Response]) -> bytes:
+        """
+        Return the body for `url`, going to the network via `get(extra_headers)`
+        only when the entry is missing or stale.
+        """
+        m = metrics()
+        entry = self.lookup(url)
+        if self.offline:
+            if entry is None:
+                raise RuntimeError(f"Offline mode: {url} is not in the HTTP cache")
+            self.hits += 1
+            m.incr(f"cache.{self.name}.hit")
+            return entry.body
+        if entry is not None and time.time() - entry.fetched_at < self.ttl_s:
+            self.hits += 1
+            m.incr(f"cache.{self.name}.hit")
+            return entry.body
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        r = get(headers)
+        if r.status_code == 304 and entry is not None:
+            self.revalidated += 1
+            m.incr(f"cache.{self.name}.revalidated")
+            self._write_meta(self._paths(url)[1], url, entry.etag, entry.last_modified)
+            return entry.body
+
+        self.misses += 1
+        m.incr(f"cache.{self.name}.miss")
+        self.store(url, r.content, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        return r.content
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import bisect
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+# Process-wide run metrics. Clients and storage helpers record into the shared
+# registry; the stage runner sets the current stage before each stage and
+# flushes that stage's metrics into run_metrics afterwards. Stages run one at a
+# time, so records from worker threads are attributed to the running stage.
+#
+# Two kinds:
+#   counter  count of increments and their sum (requests, bytes, cache hits,
+#            seconds spent waiting on a rate limiter)
+#   timer    latency histogram over fixed buckets (HTTP calls, spans)
+
+# Upper bounds in milliseconds; the last bucket is open-ended.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+@dataclass
+class Counter:
+    count: int = 0
+    total: float = 0.0
+
+
+@dataclass
+class Timer:
+    count: int = 0
+    total: float = 0.0   # seconds
+    max: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, seconds * 1000.0)] += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Bucket upper bound (seconds) holding the q-quantile; max for the open bucket.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS_MS[i] / 1000.0, self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+
+class Metrics:
+    def __init__(self):
+        self.stage = ""
+        self._counters: dict[tuple[str, str], Counter] = {}
+        self._timers: dict[tuple[str, str], Timer] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: float = 1.0) -> None:
+        with self._lock:
+            c = self._counters.get((self.stage, name))
+            if c is None:
+                c = self._counters[(self.stage, name)] = Counter()
+            c.count += 1
+            c.total += value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            t = self._timers.get((self.stage, name))
+            if t is None:
+                t = self._timers[(self.stage, name)] = Timer()
+            t.add(seconds)
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(f"span.{name}", time.perf_counter() - t0)
+
+    def http(self, provider: str, seconds: float, nbytes: int = 0, status: Optional[int] = None) -> None:
+        """
+        One HTTP exchange: latency histogram, request/byte counters and non-2xx statuses.
+        """
+        self.observe(f"http.{provider}", seconds)
+        self.incr(f"http.{provider}.bytes", nbytes)
+        if status is None:
+            self.incr(f"http.{provider}.errors")
+        elif status >= 300:
+            self.incr(f"http.{provider}.status.{status}")
+
+    def throttled(self, provider: str, waited_s: float) -> None:
+        if waited_s > 0:
+            self.incr(f"throttle.{provider}.wait_s", waited_s)
+
+    def take(self, stage: str) -> tuple[dict[str, Counter], dict[str, Timer]]:
+        """
+        Remove and return everything recorded under `stage`.
+        """
+        with self._lock:
+            counters = {n: self._counters.pop((s, n)) for s, n in list(self._counters) if s == stage}
+            timers = {n: self._timers.pop((s, n)) for s, n in list(self._timers) if s == stage}
+        return counters, timers
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._timers.clear()
+            self.stage = ""
+
+
+_METRICS = Metrics()
+
+
+def metrics() -> Metrics:
+    return _METRICS
+
+
+def flush_stage(con: sqlite3.Connection, run_id: str, stage: str) -> int:
+    """
+    Replace run_metrics rows for (run_id, stage) with what was recorded under
+    `stage`. Returns rows written.
+    """
+    counters, timers = _METRICS.take(stage)
+    rows = [(run_id, stage, name, "counter", c.count, c.total, None, None, None, None)
+            for name, c in counters.items()]
+    rows += [
+        (run_id, stage, name, "timer", t.count, t.total, t.max, t.quantile(0.5), t.quantile(0.95), json.dumps(t.buckets))
+        for name, t in timers.items()
+    ]
+    with con:
+        con.execute("DELETE FROM run_metrics WHERE run_id = ? AND stage = ?", (run_id, stage))
+        con.executemany(
+            """
+            INSERT INTO run_metrics (run_id, stage, name, kind, count, total, max, p50, p95, buckets_json)
+            VALUES (?,?,?,?,?,?,?,?,?,?)
+            """,
+            rows,
+        )
+    return len(rows)
+
+
+def metrics_report(con: sqlite3.Connection, run_id: str) -> str:
+    """
+    Per-stage HTTP, throttle, cache and span lines for a run.
+    """
+    rows = con.execute(
+        """
+        SELECT m.stage, m.name, m.kind, m.count, m.total, m.p50, m.p95, m.max
+        FROM run_metrics m LEFT JOIN run_stages s ON s.run_id = m.run_id AND s.stage = m.stage
+        WHERE m.run_id = ?
+        ORDER BY s.rowid, m.stage, m.kind DESC, m.name
+        """,
+        (run_id,),
+    ).fetchall()
+    lines, current = [], None
+    for stage, name, kind, count, total, p50, p95, mx in rows:
+        if stage != current:
+            lines.append(f"  {stage}")
+            current = stage
+        if kind == "timer":
+            lines.append(f"    {name:<28} n={count:<6} total={total:8.2f}s  p50={p50 * 1000:7.0f}ms"
+                         f"  p95={p95 * 1000:7.0f}ms  max={mx * 1000:7.0f}ms")
+        elif name.endswith("bytes"):
+            lines.append(f"    {name:<28} {total / 1024**2:10.2f} MB")
+        elif name.endswith("_s"):
+            lines.append(f"    {name:<28} {total:10.2f} s over {count} waits")
+        else:
+            lines.append(f"    {name:<28} {total:10.0f}")
+    return "\n".join(lines)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from scanner.utils.metrics import metrics
+
+# Opt-in per-stage profiling (run_eod --profile). For each stage, writes:
+#   <name>.prof      cProfile stats (snakeviz / pstats)
+#   <name>.txt       top functions by cumulative time
+#   <name>.mem.txt   tracemalloc peak and top allocation sites still live at the end
+# cProfile only sees the calling thread; pool workers show up as time spent
+# waiting on futures. HTTP time per provider is in run_metrics regardless.
+
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+
+
+@contextmanager
+def profiled(name: str, outdir: Path) -> Iterator[None]:
+    outdir.mkdir(parents=True, exist_ok=True)
+    started_tm = not tracemalloc.is_tracing()
+    if started_tm:
+        tracemalloc.start(10)
+    tracemalloc.reset_peak()
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        snap = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tm:
+            tracemalloc.stop()
+
+        prof.dump_stats(str(outdir / f"{name}.prof"))
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        (outdir / f"{name}.txt").write_text(buf.getvalue(), encoding="utf-8")
+
+        lines = [f"peak traced: {peak / 1024**2:.1f} MB", ""]
+        for st in snap.statistics("lineno")[:TOP_ALLOCATIONS]:
+            lines.append(str(st))
+        (outdir / f"{name}.mem.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        metrics().incr("profile.peak_traced_bytes", peak)
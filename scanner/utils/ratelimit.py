@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    rate: tokens added per second (steady-state requests per second)
+    burst: bucket capacity (max requests allowed back-to-back)
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = max(float(rate), 0.01)
+        self.capacity = max(float(burst if burst is not None else rate), 1.0)
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._stamp
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._stamp = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block until `tokens` are available. Returns seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = max(self._stamp - now, 0.0) + (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """
+        Take `tokens` if available right now; never blocks.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def tighten(self, rate: Optional[float] = None, capacity: Optional[float] = None) -> None:
+        """
+        Lower the rate and/or capacity; values above the current ones are
+        ignored. Tokens earned at the old rate are credited first.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if rate is not None:
+                self.rate = min(self.rate, max(float(rate), 0.01))
+            if capacity is not None:
+                self.capacity = min(self.capacity, max(float(capacity), 1.0))
+                self._tokens = min(self._tokens, self.capacity)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Drain the bucket and push the next refill `seconds` into the future.
+        Used when the server tells us to back off (429 / Retry-After).
+        """
+        with self._lock:
+            self._tokens = 0.0
+            self._stamp = max(self._stamp, time.monotonic() + max(seconds, 0.0))
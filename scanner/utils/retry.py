@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Collection, Optional
+
+import requests
+
+from scanner.utils.metrics import metrics
+from scanner.utils.ratelimit import TokenBucket
+
+# Retry/backoff shared by the Tiingo, EDGAR and OpenAI clients.
+
+# Rate limits and transient server errors are retried; anything else fails fast
+# (404 unknown ticker, 401 bad key).
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """
+    Retry-After is either delta-seconds or an HTTP-date. None when absent or unparseable.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def send_with_retry(
+    send: Callable[[], requests.Response],
+    provider: str,
+    max_retries: int,
+    backoff_s: float,
+    limiter: Optional[TokenBucket] = None,
+    pause_status: Collection[int] = (429,),
+    count_bytes: bool = True,
+    retry_timeouts: bool = True,
+) -> requests.Response:
+    """
+    Call `send` until it returns a non-retryable response or retries run out,
+    then raise_for_status and return it. Connection errors, timeouts and
+    RETRY_STATUS back off backoff_s * 2**attempt, stretched to Retry-After.
+
+    limiter: each attempt takes a token, and a pause_status response pauses the
+    bucket for the delay so other threads sharing it back off too.
+    count_bytes=False for streamed bodies (the reader counts those).
+    retry_timeouts=False for non-idempotent requests: a read timeout may come
+    after the server acted, so only connection failures are retried.
+    HTTP, throttle and backoff metrics are recorded under `provider`.
+    """
+    m = metrics()
+    attempt = 0
+    while True:
+        if limiter is not None:
+            m.throttled(provider, limiter.acquire())
+        delay = backoff_s * (2 ** attempt)
+        t0 = time.perf_counter()
+        try:
+            r = send()
+        except (requests.ConnectionError, requests.Timeout) as e:
+            m.http(provider, time.perf_counter() - t0)
+            # ConnectTimeout is a ConnectionError too: the request never went out.
+            if attempt >= max_retries or not (retry_timeouts or isinstance(e, requests.ConnectionError)):
+                raise
+        else:
+            m.http(provider, time.perf_counter() - t0, len(r.content) if count_bytes else 0, r.status_code)
+            if r.status_code not in RETRY_STATUS or attempt >= max_retries:
+                r.raise_for_status()
+                return r
+            retry_after = retry_after_seconds(r.headers.get("Retry-After"))
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            if limiter is not None and r.status_code in pause_status:
+                limiter.pause(delay)
+        m.incr(f"backoff.{provider}.wait_s", delay)
+        time.sleep(delay)
+        attempt += 1
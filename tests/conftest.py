@@ -0,0 +1,25 @@
+import pytest
+
+from scanner.bench.mock_servers import MockStack, MockUniverse
+from scanner.storage.db import connect, init_db
+
+
+@pytest.fixture
+def con(tmp_path):
+    con = connect(tmp_path / "scanner.sqlite")
+    init_db(con)
+    yield con
+    con.close()
+
+
+@pytest.fixture
+def mock_stack(monkeypatch):
+    """
+    Local Tiingo / EDGAR / OpenAI stand-ins for a 5-symbol universe, with the
+    clients pointed at them.
+    """
+    stack = MockStack.start(MockUniverse(5))
+    for k, v in stack.env().items():
+        monkeypatch.setenv(k, v)
+    yield stack
+    stack.stop()
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from scanner.backtest.engine import BacktestParams, build_paths, simulate
+
+SIGNAL_DATE = "2026-02-27"
+SESSIONS = [d.date().isoformat() for d in pd.bdate_range("2026-03-02", periods=12)]
+FLAT = (100.0, 101.0, 99.0, 100.0)
+
+
+def run(path: dict, setup="momentum", earnings=None, **kw) -> pd.DataFrame:
+    """
+    path: {session index: (open, high, low, close)}; other sessions are flat at 100.
+    """
+    bars = pd.DataFrame(
+        [("AAA", d, *path.get(i, FLAT)) for i, d in enumerate(SESSIONS)],
+        columns=["symbol", "date", "open", "high", "low", "close"],
+    )
+    signals = pd.DataFrame({"symbol": ["AAA"], "date": [SIGNAL_DATE], "setup": [setup]})
+    if earnings is not None:
+        earnings = pd.DataFrame({"symbol": ["AAA"], "date": [SESSIONS[earnings]]})
+    params = BacktestParams(**kw)
+    return simulate(build_paths(bars, signals, params.max_hold_days, earnings), params)
+
+
+def test_stop_wins_same_bar():
+    t = run({0: (100.0, 125.0, 85.0, 110.0)}).iloc[0]
+    assert (t["exit_1"], t["exit_2"]) == (90.0, 90.0)
+    assert t["exit_reason"] == "stop" and not t["tp1_hit"]
+    assert t["days_held"] == 1
+    assert t["return"] == pytest.approx(-0.10)
+
+
+def test_gap_fills_at_the_open():
+    down = run({1: (80.0, 82.0, 78.0, 81.0)}).iloc[0]
+    assert (down["exit_1"], down["exit_2"], down["exit_reason"]) == (80.0, 80.0, "stop")
+    assert down["return"] == pytest.approx(-0.20)
+
+    up = run({1: (125.0, 126.0, 124.0, 125.0)}).iloc[0]
+    assert (up["exit_1"], up["exit_2"], up["exit_reason"]) == (125.0, 125.0, "take_profit")
+    assert up["return"] == pytest.approx(0.25)
+
+    # No gap: each half fills at its level.
+    t = run({1: (100.0, 112.0, 99.0, 111.0), 2: (111.0, 121.0, 110.0, 120.0)}).iloc[0]
+    assert (t["exit_1"], t["exit_2"]) == pytest.approx((110.0, 120.0))
+    assert t["days_held"] == 3
+
+
+def test_earnings_exit_before_report():
+    t = run({}, setup="earnings_anticipation", earnings=3).iloc[0]
+    assert t["exit_reason"] == "earnings"
+    assert t["days_held"] == 3 and t["exit_2"] == FLAT[3]
+
+    # Other setups hold through; so does anticipation with the guard off.
+    assert run({}, earnings=3).iloc[0]["exit_reason"] == "time"
+    off = run({}, setup="earnings_anticipation", earnings=3, avoid_holding_through_earnings=False)
+    assert off.iloc[0]["exit_reason"] == "time"
+
+
+def test_report_on_entry_session_is_not_filled():
+    assert run({}, setup="earnings_anticipation", earnings=0).empty
+    assert len(run({}, setup="earnings_anticipation", earnings=1)) == 1
+    assert len(run({}, setup="earnings_anticipation", earnings=0, avoid_holding_through_earnings=False)) == 1
@@ -0,0 +1,103 @@
+import json
+import zipfile
+
+from scanner.edgar.bulk import ingest_companyfacts_zip, ingest_submissions_zip
+from scanner.edgar.facts import FactIndex
+from scanner.edgar.snapshot import snapshot_from_index
+from scanner.edgar.store import fact_rows
+
+
+def fact(end, val, form="10-Q", fp="Q1"):
+    return {"end": end, "val": val, "form": form, "fp": fp, "fy": 2025, "filed": end, "accn": f"a-{end}"}
+
+
+COMPANY_FACTS = {
+    1: {"cik": 1, "facts": {"us-gaap": {
+        "Revenues": {"units": {"USD": [
+            fact("2025-03-31", 100), fact("2025-06-30", 110), fact("2025-09-30", 120),
+            fact("2025-12-31", 400, "10-K", "FY"),
+            # Unusable entries: both paths drop them, so "latest" is the 10-K.
+            fact("2026-03-31", "n/a"), {"end": "2026-03-31", "val": None}, {"val": 5},
+        ]}},
+        "CommonStockSharesOutstanding": {"units": {"shares": [fact("2025-12-31", 5e7, "10-K", "FY")]}},
+        "UnindexedTag": {"units": {"USD": [fact("2025-12-31", 1)]}},
+    }}},
+    2: {"cik": 2, "facts": {"us-gaap": {
+        "NetIncomeLoss": {"units": {"USD": [fact("2025-12-31", -3e6, "10-K", "FY")]}},
+    }}},
+}
+
+SUBMISSIONS = {
+    1: {"cik": "1", "tickers": ["AAA", "AAAW"], "exchanges": ["Nasdaq", "Nasdaq"], "filings": {"recent": {
+        "accessionNumber": ["0000000001-26-000001", "0000000001-26-000002"],
+        "form": ["10-K", "8-K"], "filingDate": ["2026-02-20", "2026-03-02"],
+        "primaryDocument": ["k.htm", "e.htm"], "items": ["", "3.02,9.01"],
+    }}},
+    2: {"cik": "2", "tickers": ["BBB"], "exchanges": ["NYSE"], "filings": {"recent": {
+        "accessionNumber": ["0000000002-26-000001"], "form": ["10-Q"],
+        "filingDate": ["2026-02-10"], "primaryDocument": ["q.htm"],
+    }}},
+}
+
+
+def write_zip(path, members: dict) -> None:
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, json.dumps(data))
+
+
+def ingest(con, tmp_path):
+    write_zip(tmp_path / "companyfacts.zip", {f"CIK{c:010d}.json": d for c, d in COMPANY_FACTS.items()})
+    write_zip(tmp_path / "submissions.zip", {
+        **{f"CIK{c:010d}.json": d for c, d in SUBMISSIONS.items()},
+        # A supplemental page: older filings as top-level arrays.
+        "CIK0000000002-submissions-001.json": {
+            "accessionNumber": ["0000000002-20-000001"], "form": ["10-K"],
+            "filingDate": ["2020-03-01"], "primaryDocument": ["old.htm"],
+        },
+    })
+    return ingest_companyfacts_zip(con, tmp_path / "companyfacts.zip"), \
+        ingest_submissions_zip(con, tmp_path / "submissions.zip")
+
+
+def table(con, sql):
+    return con.execute(sql).fetchall()
+
+
+def test_ingest_rows(con, tmp_path):
+    facts, subs = ingest(con, tmp_path)
+    assert (facts.companies, facts.rows) == (2, 6)
+    assert table(con, "SELECT cik, tag, seq, end, val, form FROM xbrl_facts WHERE tag = 'Revenues' ORDER BY seq") == [
+        ("0000000001", "Revenues", 0, "2025-03-31", 100.0, "10-Q"),
+        ("0000000001", "Revenues", 1, "2025-06-30", 110.0, "10-Q"),
+        ("0000000001", "Revenues", 2, "2025-09-30", 120.0, "10-Q"),
+        ("0000000001", "Revenues", 3, "2025-12-31", 400.0, "10-K"),
+    ]
+    assert table(con, "SELECT cik, accession, form, filed_at, items FROM filings ORDER BY cik, filed_at") == [
+        ("0000000001", "0000000001-26-000001", "10-K", "2026-02-20", None),
+        ("0000000001", "0000000001-26-000002", "8-K", "2026-03-02", "3.02,9.01"),
+        ("0000000002", "0000000002-20-000001", "10-K", "2020-03-01", None),
+        ("0000000002", "0000000002-26-000001", "10-Q", "2026-02-10", None),
+    ]
+    assert table(con, "SELECT symbol, exchange, cik FROM tickers ORDER BY symbol") == [
+        ("AAA", "NASDAQ", "0000000001"), ("AAAW", "NASDAQ", "0000000001"), ("BBB", "NYSE", "0000000002"),
+    ]
+    assert subs.rows == 4
+
+
+def test_reingest_is_idempotent(con, tmp_path):
+    ingest(con, tmp_path)
+    before = [table(con, f"SELECT * FROM {t} ORDER BY 1, 2, 3") for t in ("xbrl_facts", "filings", "tickers")]
+    _, subs = ingest(con, tmp_path)
+    after = [table(con, f"SELECT * FROM {t} ORDER BY 1, 2, 3") for t in ("xbrl_facts", "filings", "tickers")]
+    assert after == before
+    assert subs.rows == 0  # every accession already stored
+
+
+def test_stored_facts_match_api_facts(con, tmp_path):
+    ingest(con, tmp_path)
+    for cik, data in COMPANY_FACTS.items():
+        stored = snapshot_from_index(FactIndex.from_rows(fact_rows(con, f"{cik:010d}")))
+        fetched = snapshot_from_index(FactIndex.from_company_facts(data))
+        assert stored == fetched
+    assert FactIndex.from_company_facts(COMPANY_FACTS[1]).concept("revenue").latest() == 400.0
@@ -0,0 +1,54 @@
+import math
+
+import pandas as pd
+import pytest
+
+from scanner.storage.db import bulk_write, bulk_write_frame
+
+
+def bar(symbol, day, close):
+    return (symbol, day, close, close, close, close, 100.0, close * 100.0)
+
+
+def test_upsert_updates_existing_keys(con):
+    first = bulk_write(con, "daily_bars", (bar("AAA", f"2026-03-0{d}", 1.0) for d in (2, 3, 4)), chunk_size=2)
+    assert (first.rows, first.changed) == (3, 3)
+
+    # Across chunks and within one stream, the last row for a key wins.
+    again = bulk_write(con, "daily_bars", iter([
+        bar("AAA", "2026-03-03", 2.0), bar("BBB", "2026-03-03", 5.0), bar("AAA", "2026-03-03", 3.0),
+    ]), chunk_size=2)
+    assert (again.rows, again.changed) == (3, 3)
+    assert con.execute("SELECT symbol, date, close FROM daily_bars ORDER BY symbol, date").fetchall() == [
+        ("AAA", "2026-03-02", 1.0), ("AAA", "2026-03-03", 3.0), ("AAA", "2026-03-04", 1.0),
+        ("BBB", "2026-03-03", 5.0),
+    ]
+
+
+def test_ignore_spec_keeps_first_row(con):
+    row = ("0000000001", "0000000001-26-000001", "10-K", "2026-02-20", "k.htm", None, None)
+    assert bulk_write(con, "filings", [row]).changed == 1
+    stats = bulk_write(con, "filings", [(*row[:2], "10-K/A", *row[3:])])
+    assert (stats.rows, stats.changed) == (1, 0)
+    assert con.execute("SELECT form FROM filings").fetchall() == [("10-K",)]
+
+
+def test_frame_nan_becomes_null(con):
+    df = pd.DataFrame({"symbol": ["AAA"], "date": ["2026-03-02"], "open": [1.0], "high": [math.nan],
+                       "low": [1.0], "close": [1.0], "volume": [math.nan], "dollar_volume": [math.nan]})
+    bulk_write_frame(con, "daily_bars", df)
+    assert con.execute("SELECT high, volume, dollar_volume FROM daily_bars").fetchone() == (None, None, None)
+
+
+def test_commit_false_joins_the_callers_transaction(con):
+    con.execute("BEGIN")
+    bulk_write(con, "tickers", [("AAA", "NASDAQ", "0000000001")], commit=False)
+    bulk_write(con, "tickers", [("AAA", "NYSE", "0000000001")], commit=False)
+    assert con.execute("SELECT exchange FROM tickers").fetchall() == [("NYSE",)]
+    con.rollback()
+    assert con.execute("SELECT COUNT(*) FROM tickers").fetchone() == (0,)
+
+
+def test_unknown_table(con):
+    with pytest.raises(RuntimeError, match="No bulk write spec"):
+        bulk_write(con, "nope", [])
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from scanner.market.tiingo import decode_prices
+from scanner.storage.columnar import BarColumns, BarStore, check_consistency, concat_bars, write_bars
+from scanner.storage.db import read_bars
+
+
+def frame(rows) -> pd.DataFrame:
+    """
+    rows: (symbol, date, close); the other price columns follow close.
+    """
+    df = pd.DataFrame(rows, columns=["symbol", "date", "close"])
+    for c in ("open", "high", "low"):
+        df[c] = df["close"]
+    df["volume"] = 1000.0
+    df["dollar_volume"] = df["close"] * 1000.0
+    return df
+
+
+def closes(store: BarStore, **kw) -> list[tuple]:
+    df = store.read_frame(**kw)
+    return list(zip(df["symbol"], df["date"], df["close"]))
+
+
+def test_later_segments_win_before_and_after_compact(tmp_path):
+    store = BarStore(tmp_path)
+    store.append(frame([("BBB", "2026-03-03", 1.0), ("AAA", "2026-03-02", 1.0), ("AAA", "2026-03-03", 1.0)]))
+    store.append(frame([("AAA", "2026-03-03", 2.0), ("AAA", "2026-03-04", 2.0)]))
+    want = [("AAA", "2026-03-02", 1.0), ("AAA", "2026-03-03", 2.0), ("AAA", "2026-03-04", 2.0),
+            ("BBB", "2026-03-03", 1.0)]
+    assert closes(store) == want
+
+    stats = store.compact()
+    assert (stats.segments, stats.rows, stats.symbols) == (2, 4, 2)
+    assert store.segments() == []
+    assert closes(store) == want
+
+    # A segment written after compaction overrides base until the next compact.
+    store.append(frame([("BBB", "2026-03-03", 3.0), ("CCC", "2026-03-02", 3.0)]))
+    want = [*want[:3], ("BBB", "2026-03-03", 3.0), ("CCC", "2026-03-02", 3.0)]
+    assert closes(store) == want
+    store.compact()
+    assert closes(store) == want
+    assert closes(store, symbols=["CCC", "BBB", "ZZZ"], start="2026-03-03") == [("BBB", "2026-03-03", 3.0)]
+
+
+def test_duplicate_keys_within_one_batch_keep_the_last(tmp_path):
+    store = BarStore(tmp_path)
+    store.append(frame([("AAA", "2026-03-02", 1.0), ("AAA", "2026-03-02", 5.0)]))
+    assert closes(store) == [("AAA", "2026-03-02", 5.0)]
+    store.compact()
+    assert closes(store) == [("AAA", "2026-03-02", 5.0)]
+
+
+def test_store_matches_sqlite_after_upserts(tmp_path, con):
+    store = BarStore(tmp_path / "bars")
+    for batch in (
+        frame([("AAA", "2026-03-02", 1.0), ("AAA", "2026-03-03", 1.0)]),
+        frame([("AAA", "2026-03-03", 2.0), ("BBB", "2026-03-02", np.nan)]),
+    ):
+        cols = BarColumns.from_frame(batch)
+        write_bars(con, cols)
+        store.append(cols)
+    assert check_consistency(store, con).ok
+    store.compact()
+    report = check_consistency(store, con)
+    assert report.ok and report.rows_store == report.rows_sqlite == 3
+
+    con.execute("UPDATE daily_bars SET close = 9 WHERE symbol = 'AAA' AND date = '2026-03-02'")
+    report = check_consistency(store, con)
+    assert report.mismatched == 1 and report.examples == [("AAA", "2026-03-02")]
+
+
+def test_frame_round_trip_matches_read_bars(con):
+    df = frame([("BBB", "2026-03-03", 2.0), ("AAA", "2026-03-03", 1.5), ("AAA", "2026-03-02", np.nan)])
+    cols = BarColumns.from_frame(df)
+    assert cols.symbols.tolist() == ["AAA", "BBB"]
+    back = cols.to_frame()
+    pd.testing.assert_frame_equal(back, df[back.columns.tolist()], check_dtype=False)
+
+    # Written and read back through SQLite: same rows, same columns and dtypes.
+    write_bars(con, cols)
+    stored = read_bars(con, None, "2026-03-01", "2026-03-31")
+    ours = cols.by_symbol().to_frame()
+    assert list(ours.columns) == list(stored.columns)
+    pd.testing.assert_frame_equal(ours, stored)
+
+
+def test_decode_prices_to_frame():
+    data = [
+        {"date": "2026-03-02T00:00:00.000Z", "open": 1.0, "high": 1.2, "low": 0.9, "close": 1.1, "volume": 1000},
+        {"date": "2026-03-03T00:00:00.000Z", "open": 1.1, "high": None, "low": 1.0, "close": 1.2, "volume": 500},
+    ]
+    df = concat_bars([decode_prices("BBB", data), decode_prices("AAA", data[:1])]).to_frame()
+    assert list(zip(df["symbol"], df["date"])) == [("BBB", "2026-03-02"), ("BBB", "2026-03-03"), ("AAA", "2026-03-02")]
+    assert np.isnan(df["high"][1])
+    assert df["dollar_volume"].tolist() == [1100.0, 600.0, 1100.0]
+
+
+def test_by_symbol_offsets_and_views():
+    cols = BarColumns.from_frame(frame([
+        ("BBB", "2026-03-03", 4.0), ("AAA", "2026-03-03", 2.0), ("BBB", "2026-03-02", 3.0), ("AAA", "2026-03-02", 1.0),
+    ]))
+    s = cols.by_symbol()
+    assert s.offsets.tolist() == [0, 2, 4]
+    assert s.values["close"].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert s.symbol_rows(1).dates().tolist() == ["2026-03-02", "2026-03-03"]
+    assert s.last_rows().tolist() == [1, 3]
+
+    # Already sorted: the arrays are reused, not copied.
+    again = BarColumns(s.symbols, s.code, s.day, s.values).by_symbol()
+    assert again.values["close"] is s.values["close"]
+    assert np.shares_memory(again.symbol_rows(0).values["close"], s.values["close"])
+
+    empty = BarColumns.empty().by_symbol()
+    assert len(empty) == 0 and empty.to_frame().empty
@@ -0,0 +1,59 @@
+import sqlite3
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from scanner.market.sync import find_gaps
+from scanner.pipeline.replay import _scoped_delete
+from scanner.storage.db import connect, init_db, last_bar_dates, read_bars, upsert_daily_bars
+
+N_SYMBOLS = 1200
+DATES = ["2026-03-02", "2026-03-03", "2026-03-04"]
+
+
+@pytest.fixture
+def con(tmp_path):
+    con = connect(tmp_path / "scanner.sqlite")
+    init_db(con)
+    # Older SQLite builds cap host parameters at 999; every IN list must stay under it.
+    con.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+    symbols = [f"S{i:04d}" for i in range(N_SYMBOLS)]
+    rows = [
+        {"symbol": s, "date": d, "open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0,
+         "volume": 100.0, "dollar_volume": 100.0}
+        for i, s in enumerate(symbols) for d in DATES
+        if not (i % 7 == 0 and d == DATES[1])  # a gap on the middle session
+    ]
+    upsert_daily_bars(con, pd.DataFrame(rows))
+    yield con
+    con.close()
+
+
+def symbols() -> list[str]:
+    # Reversed, so callers that assume sorted input would misorder.
+    return [f"S{i:04d}" for i in reversed(range(N_SYMBOLS))]
+
+
+def test_last_bar_dates(con):
+    got = last_bar_dates(con, symbols())
+    assert len(got) == N_SYMBOLS
+    assert set(got.values()) == {DATES[-1]}
+
+
+def test_read_bars(con):
+    df = read_bars(con, symbols(), DATES[0], DATES[-1])
+    assert len(df) == N_SYMBOLS * len(DATES) - len(range(0, N_SYMBOLS, 7))
+    assert df[["symbol", "date"]].equals(df.sort_values(["symbol", "date"])[["symbol", "date"]].reset_index(drop=True))
+
+
+def test_find_gaps(con):
+    gaps = find_gaps(con, symbols(), date(2026, 3, 2), date(2026, 3, 4))
+    assert gaps == {f"S{i:04d}": [DATES[1]] for i in range(0, N_SYMBOLS, 7)}
+
+
+def test_scoped_delete(con):
+    keep = symbols()[:10]
+    _scoped_delete(con, "daily_bars", symbols()[10:], DATES[0], DATES[-1])
+    left = {s for (s,) in con.execute("SELECT DISTINCT symbol FROM daily_bars")}
+    assert left == set(keep)
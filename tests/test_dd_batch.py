@@ -0,0 +1,59 @@
+import time
+
+import pytest
+
+from scanner.bench.mock_servers import MockServer, MockUniverse, openai_route
+from scanner.dd_brain.dd_batch import dd_notes_batch
+from scanner.utils import retry
+from scanner.utils.hash import sha256_json
+
+MODEL = "gpt-test"
+
+
+def contexts(n: int) -> list[dict]:
+    return [{"symbol": f"S{i}", "date": "2026-03-06", "score_total": 80.0 + i} for i in range(n)]
+
+
+@pytest.fixture
+def openai(monkeypatch):
+    def start(max_rps=None):
+        server = MockServer("openai", openai_route(MockUniverse(1)), max_rps=max_rps).start()
+        monkeypatch.setenv("OPENAI_RESPONSES_URL", f"{server.url}/v1/responses")
+        monkeypatch.setenv("OPENAI_API_KEY", "mock")
+        started.append(server)
+        return server
+    started = []
+    yield start
+    for server in started:
+        server.stop()
+
+
+def test_cache_hit_makes_no_request(con, openai):
+    server = openai()
+    ctxs = contexts(3)
+    first = dd_notes_batch(con, ctxs, MODEL, max_workers=2)
+    assert (first.generated, first.cached, first.failures) == (3, 0, {})
+    assert server.stats.snapshot()["requests"] == 3
+
+    server.stats.reset()
+    again = dd_notes_batch(con, ctxs, MODEL, max_workers=2)
+    assert (again.generated, again.cached) == (0, 3)
+    assert again.notes == first.notes
+    assert server.stats.snapshot()["requests"] == 0
+    stored = con.execute("SELECT COUNT(*) FROM dd_notes WHERE context_hash = ?", (sha256_json(ctxs[0]),)).fetchone()
+    assert stored == (1,)
+
+
+def test_429_retried_after_retry_after(con, openai, monkeypatch):
+    # One request per second: the second POST gets 429 + Retry-After: 1.
+    server = openai(max_rps=1)
+    waits = []
+    real_sleep = time.sleep
+    monkeypatch.setattr(retry.time, "sleep", lambda s: (waits.append(s), real_sleep(s)))
+
+    res = dd_notes_batch(con, contexts(2), MODEL, max_workers=1, backoff_s=0.01)
+    assert (res.generated, res.failures) == (2, {})
+    stats = server.stats.snapshot()
+    assert stats["throttled"] >= 1
+    assert stats["requests"] == 2 + stats["throttled"]
+    assert waits and min(waits) >= 1.0
@@ -0,0 +1,38 @@
+from scanner.edgar.facts import FactIndex, FactSeries
+
+
+def fact(end, val, form="10-Q", fp="Q1"):
+    return {"end": end, "val": val, "form": form, "fp": fp}
+
+
+ITEMS = [
+    fact("2025-06-30", 110, fp="Q2"), fact("2025-03-31", 100, fp="Q1"),
+    fact("2025-12-31", 400, "10-K", "FY"), fact("2025-09-30", 120, fp="Q3"),
+    fact("2025-12-31", 401, "10-K/A", "fy"),  # same end: published order breaks the tie
+    fact("2026-03-31", "n/a"),
+]
+
+
+def test_columns_sorted_by_end():
+    s = FactSeries.from_items(ITEMS)
+    assert list(s.end) == ["2025-03-31", "2025-06-30", "2025-09-30", "2025-12-31", "2025-12-31"]
+    assert list(s.val) == [100.0, 110.0, 120.0, 400.0, 401.0]
+    assert s.form == ["10-Q", "10-Q", "10-Q", "10-K", "10-K/A"]
+    assert s.fp == ["Q1", "Q2", "Q3", "FY", "FY"]
+
+
+def test_latest_asof():
+    s = FactSeries.from_items(ITEMS)
+    assert s.latest_asof("2025-03-30") is None
+    assert s.latest_asof("2025-03-31") == 100.0
+    assert s.latest_asof("2025-11-15") == 120.0
+    assert s.latest_asof("2025-12-31") == 401.0
+    assert s.latest_asof("2026-12-31") == s.latest() == 401.0
+    assert FactSeries([]).latest_asof("2026-01-01") is None
+
+
+def test_from_rows_keeps_fp():
+    rows = [("Revenues", "USD", v["end"], v["val"], v["form"], v["fp"]) for v in ITEMS]
+    s = FactIndex.from_rows(rows).concept("revenue")
+    assert s.fp == FactSeries.from_items(ITEMS).fp
+    assert s.latest_asof("2025-09-30") == 120.0
@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scanner.edgar.filings import filing_events, filing_gates, load_filing_gates
+
+FRESH, DILUTION = 120, 30
+BASE = date(2026, 1, 1)
+
+
+def day(n: int) -> str:
+    return (BASE + timedelta(days=int(n))).isoformat()
+
+
+def brute_force(events, symbols, dates):
+    out = []
+    for s, d in zip(symbols, dates):
+        ev = events[events["symbol"] == s]
+        age = (pd.Timestamp(str(d)) - pd.to_datetime(ev["filed_at"])).dt.days
+        out.append((bool((ev["periodic"] & age.between(0, FRESH)).any()),
+                    bool((ev["dilution"] & age.between(0, DILUTION)).any())))
+    return [a for a, _ in out], [b for _, b in out]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    universe = np.array(["AAA", "BBB", "CCC", "DDD", "EEE"])
+    kind = rng.integers(0, 3, 60)
+    events = pd.DataFrame({
+        # "ZZZ" filed but has no rows: must not leak into neighbours.
+        "symbol": rng.choice(np.r_[universe, ["ZZZ"]], 60),
+        "filed_at": [day(n) for n in rng.integers(0, 400, 60)],
+        "periodic": kind != 1,
+        "dilution": kind != 0,
+    })
+    symbols = rng.choice(universe, 300)
+    dates = np.array([day(n) for n in rng.integers(0, 400, 300)])
+    sec, dil = filing_gates(events, symbols, dates, FRESH, DILUTION)
+    want_sec, want_dil = brute_force(events, symbols, dates)
+    assert sec.tolist() == want_sec
+    assert dil.tolist() == want_dil
+
+
+def test_window_edges():
+    events = pd.DataFrame({"symbol": ["AAA", "AAA"], "filed_at": [day(200), day(300)],
+                           "periodic": [True, False], "dilution": [False, True]})
+    rows = [day(199), day(200), day(200 + FRESH), day(201 + FRESH), day(300 + DILUTION), day(301 + DILUTION)]
+    # BBB sorts right after AAA; its rows must not see AAA's filings.
+    sec, dil = filing_gates(events, np.array(["AAA"] * 6 + ["BBB"]), np.array(rows + [day(300)]), FRESH, DILUTION)
+    assert sec.tolist() == [False, True, True, False, False, False, False]
+    assert dil.tolist() == [False, False, True, True, True, False, False]
+
+
+def test_load_filing_gates_reads_the_needed_window(con):
+    con.executemany("INSERT INTO tickers (symbol, exchange, cik) VALUES (?, 'NASDAQ', ?)",
+                    [("AAA", "0000000001"), ("BBB", "0000000002")])
+    con.executemany(
+        "INSERT INTO filings (cik, accession, form, filed_at, items) VALUES (?, ?, ?, ?, ?)",
+        [("0000000001", "a1", "10-Q", day(100), None), ("0000000001", "a2", "8-K", day(110), "2.02,3.02"),
+         ("0000000002", "b1", "8-K", day(110), "2.02"), ("0000000002", "b2", "424B5", day(5), None)],
+    )
+    events = filing_events(con, day(0), day(400))
+    assert sorted(zip(events["symbol"], events["filed_at"])) == [
+        ("AAA", day(100)), ("AAA", day(110)), ("BBB", day(5)),
+    ]
+    symbols, dates = np.array(["AAA", "BBB", "AAA"]), np.array([day(120), day(120), day(250)])
+    for only in (False, True):
+        sec, dil = load_filing_gates(con, symbols, dates, FRESH, DILUTION, only_rows_symbols=only)
+        assert sec.tolist() == [True, False, False]
+        assert dil.tolist() == [True, False, False]
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+
+from scanner.edgar.going_concern import MAX_TAG_CHARS, _strip, scan_chunks, scan_file
+
+FIXTURES = Path(__file__).parent / "fixtures" / "going_concern"
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("name, flag", [
+    ("no_doubt_believe.htm", False),
+    ("doubt_alleviated.htm", False),
+    ("doubt_not_alleviated.htm", True),
+    ("going_concern.txt", True),
+    ("bare_lt.txt", True),
+])
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 65536])
+def test_fixture_flags(name, flag, chunk_size):
+    res = scan_file(FIXTURES / name, chunk_size)
+    assert res.flag is flag
+    assert res.hits == (1 if flag else 0)
+
+
+def test_no_doubt_disclosure_is_counted_as_negated():
+    res = scan_file(FIXTURES / "no_doubt_believe.htm")
+    # The ASC 205-40 "evaluated whether ... raise substantial doubt" lead-in plus the conclusion.
+    assert not res.flag
+    assert res.negated == 2
+
+
+@pytest.mark.parametrize("text", [
+    "There is no longer substantial doubt about the Company's ability to continue as a going concern.",
+    "Substantial doubt about the Company's ability to continue as a going concern no longer exists.",
+    "Substantial doubt about our ability to continue as a going concern has been alleviated.",
+    "Management doesn't believe there is any substantial doubt about its ability to continue as a going concern.",
+    "Our recurring losses do not raise substantial doubt about our ability to continue as a going concern.",
+    "Management assessed whether there is substantial doubt about the Company's ability to continue as a going concern.",
+])
+def test_negated_phrasings(text):
+    res = scan_chunks(chunked(text.encode(), 5))
+    assert not res.flag
+    assert res.negated == 1
+
+
+@pytest.mark.parametrize("text", [
+    "These conditions raise substantial doubt about our ability to continue as a going concern.",
+    "We evaluated whether to restate. Conditions raise substantial doubt about our ability to continue as a going concern.",
+    "Management's plans did not fully alleviate substantial doubt about our ability to continue as a going concern.",
+    "The auditor's report includes a going concern explanatory paragraph.",
+    "We are uncertain whether we can raise additional capital, and these conditions raise substantial doubt "
+    "about our ability to continue as a going concern.",
+    "Management does not know whether it will obtain funding, which raises substantial doubt about "
+    "its ability to continue as a going concern.",
+    "We have not generated revenue; substantial doubt exists about our ability to continue as a going concern.",
+    "Management evaluated whether it could obtain financing, and these conditions raise substantial doubt "
+    "about our ability to continue as a going concern.",
+])
+def test_flagged_phrasings(text):
+    assert scan_chunks(chunked(text.encode(), 5)).flag
+
+
+def test_bare_lt_is_not_carried():
+    # A "<" that never closes is text once it runs past MAX_TAG_CHARS.
+    text, carry = _strip("revenue < $1 million " + "x" * MAX_TAG_CHARS)
+    assert carry == ""
+    assert text.startswith("revenue < $1 million")
+    text, carry = _strip("revenue <span")
+    assert (text, carry) == ("revenue ", "<span")
@@ -0,0 +1,67 @@
+import os
+
+import pytest
+import requests
+
+from scanner.bench.mock_servers import MockServer
+from scanner.utils.http_cache import HttpCache
+
+
+@pytest.fixture
+def server():
+    # Body is whatever `payload` holds; the mock derives the ETag from it.
+    payload = {"body": b'{"v": 1}'}
+    srv = MockServer("edgar", lambda path, headers, body: (200, payload["body"], "application/json")).start()
+    srv.payload = payload
+    yield srv
+    srv.stop()
+
+
+def fetch(cache, url):
+    return cache.fetch(url, lambda headers: requests.get(url, headers=headers, timeout=5))
+
+
+def test_304_refreshes_without_a_body(tmp_path, server):
+    url = f"{server.url}/submissions/CIK0000000001.json"
+    cache = HttpCache(tmp_path, ttl_s=0)
+    assert fetch(cache, url) == b'{"v": 1}'
+    fetched_at = cache.lookup(url).fetched_at
+
+    assert fetch(cache, url) == b'{"v": 1}'
+    assert (cache.misses, cache.revalidated) == (1, 1)
+    assert server.stats.snapshot()["not_modified"] == 1
+    assert cache.lookup(url).fetched_at >= fetched_at
+
+    # Changed upstream: the conditional GET gets a 200 and the new body is stored.
+    server.payload["body"] = b'{"v": 2}'
+    assert fetch(cache, url) == b'{"v": 2}'
+    assert cache.misses == 2 and cache.lookup(url).body == b'{"v": 2}'
+
+
+def test_fresh_entry_skips_the_network(tmp_path, server):
+    url = f"{server.url}/x.json"
+    cache = HttpCache(tmp_path, ttl_s=3600)
+    fetch(cache, url)
+    server.stats.reset()
+    assert fetch(cache, url) == b'{"v": 1}'
+    assert cache.hits == 1 and server.stats.snapshot()["requests"] == 0
+
+    offline = HttpCache(tmp_path, ttl_s=0, offline=True)
+    assert fetch(offline, url) == b'{"v": 1}'
+    with pytest.raises(RuntimeError, match="Offline"):
+        fetch(offline, f"{server.url}/missing.json")
+
+
+def test_evicts_least_recently_used(tmp_path):
+    # Incompressible 1000-byte bodies, room for three.
+    cache = HttpCache(tmp_path, max_bytes=3500)
+    for i, name in enumerate("abc"):
+        cache.store(name, os.urandom(1000), None, None)
+        body_p, _ = cache._paths(name)
+        os.utime(body_p, (1000 + i, 1000 + i))
+    assert cache.lookup("a") is not None  # a is now the most recently used
+
+    cache.store("d", os.urandom(1000), None, None)
+    assert [cache.lookup(k) is not None for k in "abcd"] == [True, False, True, True]
+    assert not any(p.exists() for p in cache._paths("b"))
+    assert cache._size == cache._scan_size() <= 3500
@@ -0,0 +1,74 @@
+import asyncio
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from scanner.bench.harness import bench_config
+from scanner.bench.mock_servers import cik10, symbol
+from scanner.pipeline.orchestrator import FetchOrchestrator
+from scanner.pipeline.runner import RunContext
+from scanner.utils.config import load_config
+
+CONFIG = Path(__file__).resolve().parents[1] / "config" / "config.yaml"
+RUN_DATE = date(2026, 6, 30)
+# ZZZZZZ isn't on the mock Tiingo; its CIK isn't on the mock EDGAR.
+UNIVERSE = [symbol(i) for i in range(5)] + ["ZZZZZZ"]
+
+
+def run(con, tmp_path, dd=False, min_score=70, **pipeline):
+    con.executemany("INSERT OR IGNORE INTO tickers (symbol, exchange, cik) VALUES (?, 'NASDAQ', ?)",
+                    [(s, cik10(i)) for i, s in enumerate(UNIVERSE[:5])] + [("ZZZZZZ", cik10(99))])
+    cfg = bench_config(load_config(CONFIG), tmp_path)
+    cfg["pipeline"] = {"mode": "async", **pipeline}
+    cfg["signals"] = {**cfg.get("signals", {}), "min_score": min_score}
+    cfg["dd_brain"] = {**cfg.get("dd_brain", {}), "top_n": 2, "max_retries": 0}
+    args = SimpleNamespace(repair_gaps=False, sync="incremental", dd=dd)
+    ctx = RunContext("test", RUN_DATE, cfg, "", con, args, tmp_path, tmp_path)
+    orch = FetchOrchestrator(ctx, UNIVERSE)
+    # A lane that never reports back would hang here instead of failing.
+    return orch, asyncio.run(asyncio.wait_for(orch.run(), timeout=60))
+
+
+def test_every_lane_completes_with_failures(con, tmp_path, mock_stack):
+    orch, out = run(con, tmp_path)
+    assert sorted(out.features.index) == UNIVERSE[:5]
+    assert list(out.bars.failures) == ["ZZZZZZ"]
+    assert (out.bars.requested, out.bars.rows_written > 0) == (6, True)
+    assert list(out.filings.failures) == [cik10(99)]
+    assert (out.filings.requested, out.filings.fetched) == (6, 5)
+    assert orch.ciks_left == 0 and not orch.cik_waiting
+    assert con.execute("SELECT COUNT(DISTINCT cik) FROM filings").fetchone() == (5,)
+    assert out.lanes["tiingo"][0] == 6 and out.lanes["edgar"][0] == 6
+
+    # Second run: bars and filings are current, so no lane has work and it still ends.
+    mock_stack.reset_stats()
+    _, again = run(con, tmp_path)
+    assert again.bars.up_to_date == 5 and again.filings.fresh == 5
+    assert sorted(again.features.index) == UNIVERSE[:5]
+    assert mock_stack.stats()["edgar"]["requests"] == 1  # only the CIK that failed
+
+
+def test_tiered_prunes_every_company(con, tmp_path, mock_stack):
+    # Bar-only bounds here are 50 for symbols 0-3 and 35 for symbol 4, so at 70
+    # every company is pruned and the EDGAR lane never runs.
+    orch, out = run(con, tmp_path, tiered=True)
+    assert sorted(out.features.index) == UNIVERSE[:5]
+    assert (out.edgar_skipped, out.filings.fetched, out.lanes["edgar"][0]) == (6, 0, 0)
+    assert orch.ciks_left == 0
+
+
+def test_tiered_fetches_only_reachable_companies(con, tmp_path, mock_stack):
+    orch, out = run(con, tmp_path, tiered=True, min_score=40)
+    assert (out.edgar_skipped, out.filings.fetched, out.lanes["edgar"][0]) == (2, 4, 4)
+    assert {c for (c,) in con.execute("SELECT DISTINCT cik FROM filings")} == {cik10(i) for i in range(4)}
+    assert orch.ciks_left == 0
+
+
+def test_dd_notes_started_for_the_top_n(con, tmp_path, mock_stack):
+    _, out = run(con, tmp_path, dd=True)
+    assert not out.dd_failures
+    # Four symbols tie at 50; stage_score breaks ties by symbol.
+    assert sorted(out.dd_notes) == [symbol(0), symbol(1)]
+    assert con.execute("SELECT COUNT(*) FROM dd_notes").fetchone() == (len(out.dd_notes),)
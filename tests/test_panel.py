@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scanner.features.momentum import stacked_returns
+from scanner.features.panel import compute_panel, latest_features
+from scanner.features.volume import volume_expansion
+from scanner.storage.columnar import BarColumns
+
+COMPARED = ["ret_5d", "ret_10d", "ret_20d", "accel", "vol_ratio_5_30", "dvol_ratio_5_30"]
+
+
+def random_bars(seed: int, n_symbols: int = 40) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_symbols):
+        n = int(rng.integers(1, 70))
+        dates = pd.bdate_range("2026-01-02", periods=n).strftime("%Y-%m-%d")
+        close = rng.lognormal(0.0, 0.4, n)
+        volume = rng.integers(0, 2_000_000, n).astype(float)
+        volume[rng.random(n) < 0.1] = np.nan
+        volume[rng.random(n) < 0.05] = 0.0
+        for d, c, v in zip(dates, close, volume):
+            rows.append({"symbol": f"S{i:03d}", "date": d, "open": c, "high": c, "low": c,
+                         "close": c, "volume": v, "dollar_volume": c * v})
+    # Shuffled: the panel must not depend on input order.
+    return pd.DataFrame(rows).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def reference(history: pd.DataFrame) -> dict:
+    out = {**stacked_returns(history), **volume_expansion(history)}
+    a = out["accel"]
+    out["accel"] = float(a) if isinstance(a, (bool, np.bool_)) else a
+    return out
+
+
+def assert_same(got: dict, want: dict, where: str) -> None:
+    for k in COMPARED:
+        g, w = float(got[k]), float(want[k])
+        assert (np.isnan(g) and np.isnan(w)) or g == w, f"{where} {k}: {g} != {w}"
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_compute_panel_matches_per_symbol_functions(seed):
+    bars = random_bars(seed)
+    panel = compute_panel(bars)
+    for sym, hist in bars.sort_values(["symbol", "date"]).groupby("symbol"):
+        hist = hist.reset_index(drop=True)
+        rows = panel[panel["symbol"] == sym].reset_index(drop=True)
+        assert len(rows) == len(hist)
+        for i in range(len(hist)):
+            assert_same(rows.iloc[i], reference(hist.iloc[:i + 1]), f"{sym}@{hist['date'][i]}")
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_latest_features_matches_per_symbol_functions(seed):
+    bars = random_bars(seed)
+    from_frame = latest_features(bars)
+    from_columns = latest_features(BarColumns.from_frame(bars))
+    pd.testing.assert_frame_equal(from_frame, from_columns)
+    for sym, hist in bars.sort_values(["symbol", "date"]).groupby("symbol"):
+        assert_same(from_columns.loc[sym], reference(hist), sym)
+        assert from_columns.at[sym, "n_bars"] == len(hist)
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from scanner.storage.db import connect, init_db, upsert_daily_bars
+from scanner.storage.queries import (
+    last_n_bars, latest_filings, latest_score_date, top_scores, universe_on_date,
+)
+
+DATES = [f"2026-03-{d:02d}" for d in (2, 3, 4, 5, 6)]
+
+
+@pytest.fixture
+def con(tmp_path):
+    con = connect(tmp_path / "scanner.sqlite")
+    init_db(con)
+    rows = [
+        {"symbol": sym, "date": d, "open": px, "high": px, "low": px, "close": px + i,
+         "volume": 1000.0, "dollar_volume": (px + i) * 1000.0}
+        for sym, px in (("AAA", 1.0), ("BBB", 3.0), ("CCC", 10.0))
+        for i, d in enumerate(DATES)
+    ]
+    upsert_daily_bars(con, pd.DataFrame(rows))
+    con.executemany(
+        "INSERT INTO filings (cik, accession, form, filed_at, primary_doc, url) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ("0000000001", "a1", "10-Q", "2025-11-10", "q3.htm", "https://example/q3.htm"),
+            ("0000000001", "a2", "10-K", "2026-03-01", "k.htm", None),
+            ("0000000001", "a3", "8-K", "2026-03-03", "e.htm", "https://example/e.htm"),
+            ("0000000002", "b1", "10-Q", "2026-02-14", "q.htm", "https://example/q.htm"),
+        ],
+    )
+    con.executemany(
+        "INSERT INTO scores_daily (symbol, date, score_total, components_json, setup_class) VALUES (?, ?, ?, ?, ?)",
+        [("AAA", DATES[-1], 55.0, "{}", "none"), ("BBB", DATES[-1], 80.0, "{}", "none"),
+         ("CCC", DATES[-1], 70.0, "{}", "none"), ("AAA", DATES[0], 99.0, "{}", "none")],
+    )
+    con.commit()
+    yield con
+    con.close()
+
+
+def test_last_n_bars(con):
+    df = last_n_bars(con, ["BBB", "AAA", "ZZZ"], 2, asof=DATES[3])
+    assert df["symbol"].tolist() == ["AAA", "AAA", "BBB", "BBB"]
+    assert df["date"].tolist() == [DATES[2], DATES[3]] * 2
+    assert df["close"].tolist() == [3.0, 4.0, 5.0, 6.0]
+
+
+def test_universe_on_date(con):
+    df = universe_on_date(con, DATES[1], min_price=1.5, max_price=5.0)
+    assert df["symbol"].tolist() == ["AAA", "BBB"]
+    assert df["close"].tolist() == [2.0, 4.0]
+    assert universe_on_date(con, "2026-03-07").empty
+
+
+def test_latest_filings(con):
+    got = latest_filings(con, ["10-K", "10-Q"])
+    assert [f.accession for f in got] == ["a2", "b1", "a1"]
+    got = latest_filings(con, ["10-Q"], since="2026-01-01")
+    assert [f.accession for f in got] == ["b1"]
+    got = latest_filings(con, ["10-K", "10-Q", "8-K"], cik="0000000001", limit=2)
+    assert [(f.accession, f.form) for f in got] == [("a3", "8-K"), ("a2", "10-K")]
+    assert got[1].url is None
+
+
+def test_top_scores(con):
+    assert latest_score_date(con) == DATES[-1]
+    got = top_scores(con, DATES[-1], n=2)
+    assert [(r.symbol, r.score_total) for r in got] == [("BBB", 80.0), ("CCC", 70.0)]
@@ -0,0 +1,42 @@
+import pytest
+import requests
+
+from scanner.utils.retry import retry_after_seconds, send_with_retry
+
+
+def failing(*errors):
+    calls = []
+
+    def send():
+        calls.append(1)
+        raise errors[min(len(calls), len(errors)) - 1]
+    return send, calls
+
+
+def test_read_timeout_not_retried_without_retry_timeouts():
+    send, calls = failing(requests.ReadTimeout("read"))
+    with pytest.raises(requests.ReadTimeout):
+        send_with_retry(send, "test", 3, 0.0, retry_timeouts=False)
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("error", [requests.ConnectTimeout("connect"), requests.ConnectionError("refused")])
+def test_connection_failures_retried_without_retry_timeouts(error):
+    send, calls = failing(error)
+    with pytest.raises(type(error)):
+        send_with_retry(send, "test", 2, 0.0, retry_timeouts=False)
+    assert len(calls) == 3
+
+
+def test_read_timeout_retried_by_default():
+    send, calls = failing(requests.ReadTimeout("read"))
+    with pytest.raises(requests.ReadTimeout):
+        send_with_retry(send, "test", 2, 0.0)
+    assert len(calls) == 3
+
+
+def test_retry_after_formats():
+    assert retry_after_seconds("2.5") == 2.5
+    assert retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert retry_after_seconds("soon") is None
+    assert retry_after_seconds(None) is None
@@ -0,0 +1,88 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scanner.scoring.scorecard import (
+    COMPONENTS, FILING_GATES, ScoreWeights, score_batch, score_candidate, score_upper_bound,
+)
+
+GATES = ["liquidity_ok", "sec_current", "recent_dilution_risk",
+         "earnings_anticipation_window", "post_earnings_window"]
+
+
+def random_rows(seed: int, n: int = 500) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+
+    def returns() -> np.ndarray:
+        r = rng.normal(0.0, 0.1, n)
+        r[rng.random(n) < 0.1] = 0.0
+        r[rng.random(n) < 0.1] = np.nan
+        return r
+
+    # accel as latest_features leaves it: True / False / NaN in an object column.
+    accel = np.array([True, False, np.nan], dtype=object)[rng.integers(0, 3, n)]
+    # Ratios on and around the 1.5 / 2.0 thresholds, plus NaN.
+    ratio = rng.choice([0.0, 1.0, 1.4999, 1.5, 1.9999, 2.0, 3.0, np.nan], n)
+    features = pd.DataFrame({
+        "ret_5d": returns(), "ret_10d": returns(), "ret_20d": returns(),
+        "accel": accel, "dvol_ratio_5_30": ratio,
+    })
+    gates = pd.DataFrame({g: rng.random(n) < 0.5 for g in GATES})
+    return features, gates
+
+
+def random_weights(seed: int) -> ScoreWeights:
+    if seed == 0:
+        return ScoreWeights()
+    rng = np.random.default_rng(seed)
+    return ScoreWeights(**{
+        "liquidity": rng.uniform(-30, 30), "momentum_accel": rng.uniform(-30, 30),
+        "momentum_positive": rng.uniform(-30, 30), "volume_strong": rng.uniform(-30, 30),
+        "volume_moderate": rng.uniform(-30, 30), "dilution_penalty": rng.uniform(-30, 30),
+        "sec_current": rng.uniform(-30, 30), "sec_stale": rng.uniform(-60, 0),
+        "setup_bonus": rng.uniform(-30, 30),
+    })
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_score_batch_matches_score_candidate(seed):
+    features, gates = random_rows(seed)
+    weights = random_weights(seed)
+    batch = score_batch(features, gates, weights)
+    for i in range(len(features)):
+        want = score_candidate(features.iloc[i].to_dict(), gates.iloc[i].to_dict(), weights)
+        got = batch.iloc[i]
+        assert got["total"] == want.total, f"row {i}: {got['total']} != {want.total}"
+        assert got["setup_class"] == want.setup_class, f"row {i}"
+        for c in COMPONENTS:
+            assert got[c] == want.components[c], f"row {i} {c}"
+
+
+def test_missing_columns_match_empty_dicts():
+    features = pd.DataFrame(index=range(3))
+    gates = pd.DataFrame({"sec_current": [True, None, False]}, dtype=object)
+    batch = score_batch(features, gates)
+    for i in range(3):
+        want = score_candidate({}, {"sec_current": gates.iloc[i, 0]})
+        assert batch.iloc[i]["total"] == want.total
+        assert batch.iloc[i]["setup_class"] == want.setup_class
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_upper_bound_covers_every_filing_outcome(seed):
+    features, gates = random_rows(seed)
+    weights = random_weights(seed)
+    # What the pruner sees: filing gates not computed yet.
+    bound = score_upper_bound(features, gates.drop(columns=list(FILING_GATES)), weights)
+    totals = []
+    for sec_current, dilution in itertools.product([False, True], repeat=2):
+        g = gates.assign(sec_current=sec_current, recent_dilution_risk=dilution)
+        totals.append(score_batch(features, g, weights)["total"].to_numpy())
+    totals = np.array(totals)
+    assert (totals <= bound).all()
+    # Exact, not just safe: some outcome reaches the bound.
+    assert np.array_equal(totals.max(axis=0), bound)
+    # The rows' own filing gates are one of those outcomes.
+    assert (score_batch(features, gates, weights)["total"].to_numpy() <= bound).all()
@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+
+from scanner.bench.mock_servers import MockServer, MockUniverse, symbol, tiingo_route
+from scanner.market.tiingo import TiingoClient
+
+START, END = date(2026, 3, 2), date(2026, 3, 6)
+BROKEN = symbol(1)
+
+
+@pytest.fixture
+def tiingo(monkeypatch):
+    # symbol(1) always answers 500; symbols outside the universe 404.
+    good = tiingo_route(MockUniverse(8))
+
+    def route(path, headers, body):
+        if f"/daily/{BROKEN}/" in path:
+            return 500, b'{"error": "boom"}', "application/json"
+        return good(path, headers, body)
+
+    server = MockServer("tiingo", route).start()
+    monkeypatch.setenv("TIINGO_BASE_URL", f"{server.url}/tiingo")
+    monkeypatch.setenv("TIINGO_API_KEY", "mock")
+    yield server
+    server.stop()
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_failures_are_collected_per_symbol(tiingo, max_workers):
+    symbols = [symbol(i) for i in range(8)] + ["ZZZZZZ"]
+    client = TiingoClient(max_workers=max_workers, max_retries=2, backoff_s=0.0)
+    bars = client.eod_prices(symbols, START, END)
+
+    assert set(client.failures) == {BROKEN}
+    assert "500" in client.failures[BROKEN]
+    assert client.no_data == {"ZZZZZZ"}
+    # Everything else came back, in request order, 5 sessions each.
+    want = [s for s in symbols if s not in (BROKEN, "ZZZZZZ")]
+    assert list(dict.fromkeys(bars["symbol"])) == want
+    assert bars.groupby("symbol").size().eq(5).all()
+    # The 500 was retried; the 404 was not.
+    assert tiingo.stats.snapshot()["requests"] == len(want) + 3 + 1
+
+
+def test_failures_reset_between_calls(tiingo):
+    client = TiingoClient(max_workers=4, max_retries=0, backoff_s=0.0)
+    client.eod_prices([symbol(0), BROKEN, "ZZZZZZ"], START, END)
+    assert client.failures and client.no_data
+    client.eod_prices([symbol(0), symbol(2)], START, END)
+    assert client.failures == {} and client.no_data == set()
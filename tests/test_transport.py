@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from scanner.edgar.transport import SEC_MAX_RPS, EdgarTransport
+from scanner.utils import ratelimit
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    for k in ("SEC_DATA_URL", "SEC_WWW_URL"):
+        monkeypatch.delenv(k, raising=False)
+    return now
+
+
+def sent_within_one_second(bucket, clock) -> int:
+    # Greedy client: takes every token the moment it appears, t .. t+1 inclusive.
+    start, sent = clock[0], 0
+    while clock[0] <= start + 1.0 + 1e-9:
+        while bucket.try_acquire():
+            sent += 1
+        clock[0] += 0.01
+    return sent
+
+
+@pytest.mark.parametrize("max_rps,burst", [(5, 5), (5, None), (10, 10), (8, 50), (50, 50)])
+def test_first_second_within_sec_cap(clock, max_rps, burst):
+    bucket = EdgarTransport(max_rps=max_rps, burst=burst).bucket
+    assert sent_within_one_second(bucket, clock) <= SEC_MAX_RPS
+    clock[0] += 60.0  # idle: the bucket refills to capacity
+    assert sent_within_one_second(bucket, clock) <= SEC_MAX_RPS
+
+
+def test_tighten_only_lowers(clock):
+    t = EdgarTransport(max_rps=5, burst=5)
+    t.tighten(8, 50)
+    assert (t.bucket.rate, t.bucket.capacity) == (5.0, 5.0)
+    t.tighten(2, 1)
+    assert (t.bucket.rate, t.bucket.capacity) == (2.0, 1.0)
+    assert sent_within_one_second(t.bucket, clock) <= 3
+
+
+def test_tighten_takes_the_lock(clock):
+    bucket = EdgarTransport(max_rps=5, burst=5).bucket
+    with bucket._lock:
+        th = threading.Thread(target=bucket.tighten, args=(1, 1))
+        th.start()
+        th.join(0.2)
+        assert th.is_alive() and bucket.rate == 5.0
+    th.join(2.0)
+    assert (bucket.rate, bucket.capacity) == (1.0, 1.0)
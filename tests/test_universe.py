@@ -0,0 +1,49 @@
+import json
+import zipfile
+from datetime import date, timedelta
+
+from scanner.bench.mock_servers import symbol
+from scanner.edgar.bulk import ingest_submissions_zip
+from scanner.market.sync import sync_bars
+from scanner.market.tiingo import TiingoClient
+from scanner.universe.builder import UniverseFilter, build_universe, exchange_symbols
+
+
+def write_submissions(path, companies: dict) -> None:
+    with zipfile.ZipFile(path, "w") as zf:
+        for cik, (tickers, exchanges) in companies.items():
+            zf.writestr(f"CIK{cik:010d}.json", json.dumps({
+                "cik": str(cik), "tickers": tickers, "exchanges": exchanges,
+                "filings": {"recent": {"accessionNumber": [], "form": [], "filingDate": [], "primaryDocument": []}},
+            }))
+
+
+def test_bulk_ingested_exchanges_match(con, tmp_path):
+    # submissions.zip carries SEC's display names ("Nasdaq", "NYSE American").
+    write_submissions(tmp_path / "submissions.zip", {1: (["AAA"], ["Nasdaq"]), 2: (["BBB"], ["NYSE American"]),
+                                                     3: (["CCC"], ["OTC"])})
+    ingest_submissions_zip(con, tmp_path / "submissions.zip")
+    assert dict(con.execute("SELECT symbol, exchange FROM tickers")) == {
+        "AAA": "NASDAQ", "BBB": "NYSEAMERICAN", "CCC": "OTC",
+    }
+    # Rows stored raw by an older ingest still match.
+    con.execute("UPDATE tickers SET exchange = 'Nasdaq' WHERE symbol = 'AAA'")
+    assert exchange_symbols(con, ["NASDAQ", "nyse-american"]) == ["AAA", "BBB"]
+
+
+def test_no_data_symbols_wait_for_recheck(con, mock_stack):
+    # WARRW isn't on the mock Tiingo: every prices request 404s.
+    listed = [symbol(0), symbol(1), "WARRW"]
+    con.executemany("INSERT INTO tickers (symbol, exchange, cik) VALUES (?, 'NASDAQ', '0000000001')",
+                    [(s,) for s in listed])
+    run = date(2026, 3, 6)
+    flt = UniverseFilter(exchanges=("NASDAQ",))
+    assert build_universe(con, flt, run, 60, recheck_days=5).unseen == listed
+
+    sync = sync_bars(con, TiingoClient(backoff_s=0.0), listed, run - timedelta(days=60), run)
+    assert sync.no_data == ["WARRW"] and not sync.failures
+
+    res = build_universe(con, flt, run + timedelta(days=1), 60, recheck_days=5)
+    assert res.symbols == sorted(listed[:2]) and res.no_data == ["WARRW"]
+    res = build_universe(con, flt, run + timedelta(days=5), 60, recheck_days=5)
+    assert "WARRW" in res.unseen and "WARRW" in res.symbols